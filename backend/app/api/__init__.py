@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from .endpoints import knowledge, learning, review, graph
+from .endpoints import knowledge, learning, review, graph, jobs
 
 api_router = APIRouter()
 
@@ -8,6 +8,7 @@ api_router.include_router(knowledge.router, prefix="/knowledge", tags=["knowledg
 api_router.include_router(learning.router, prefix="/learning", tags=["learning"])
 api_router.include_router(review.router, prefix="/review", tags=["review"])
 api_router.include_router(graph.router, prefix="/graph", tags=["graph"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 
 __all__ = ["api_router"]
 
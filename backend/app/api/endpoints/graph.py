@@ -1,109 +1,174 @@
 """
 知识图谱 API
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, List, Optional
+import json
 
-from ...db.database import get_db
+from ...db.database import AsyncReadSessionLocal, get_db, get_write_db
+from ..response_cache import response_cache
 from ...schemas.knowledge import (
     KnowledgeRelationCreate,
     KnowledgeRelationResponse,
+    KnowledgeRelationBatchResponse,
     KnowledgeGraph
 )
 from ...services.knowledge_service import KnowledgeService
+from ...services.stats_service import StatsService
 
 router = APIRouter()
 
 
 @router.post("/relations", response_model=KnowledgeRelationResponse, status_code=201)
-def create_knowledge_relation(
+async def create_knowledge_relation(
     data: KnowledgeRelationCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """创建知识点之间的关系"""
+    # 与批量导入一致，首尾相同的关系无效
+    if data.parent_id == data.child_id:
+        raise HTTPException(status_code=400, detail="关系的首尾不能是同一个知识点")
+    
     service = KnowledgeService(db)
-    return service.create_knowledge_relation(data)
+    try:
+        relation = await service.create_knowledge_relation(data)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if not relation:
+        raise HTTPException(status_code=404, detail="知识点不存在")
+    return relation
+
+
+async def _stream_graph_ndjson(
+    center_id: Optional[int],
+    depth: int,
+    max_nodes: int,
+    max_edges: int
+) -> AsyncIterator[str]:
+    """逐块输出 NDJSON，每行一个 {"type": "node"|"edge", ...} 对象"""
+    # 流式响应在依赖清理之后才发送，使用独立的只读会话
+    async with AsyncReadSessionLocal() as db:
+        service = KnowledgeService(db)
+        if center_id:
+            graph_data = await service.get_knowledge_graph(
+                center_id=center_id,
+                depth=depth,
+                max_nodes=max_nodes,
+                max_edges=max_edges
+            )
+            chunks = [("node", graph_data["nodes"]), ("edge", graph_data["edges"])]
+            for kind, items in chunks:
+                yield _ndjson_lines(kind, items)
+        else:
+            async for kind, items in service.iter_knowledge_graph():
+                yield _ndjson_lines(kind, items)
+
+
+def _ndjson_lines(kind: str, items: List[dict]) -> str:
+    return "".join(
+        json.dumps({"type": kind, **item}, ensure_ascii=False) + "\n"
+        for item in items
+    )
 
 
 @router.get("/", response_model=KnowledgeGraph)
-def get_knowledge_graph(
+async def get_knowledge_graph(
+    request: Request,
     center_id: Optional[int] = Query(None, description="中心节点ID，为空则返回全局图谱"),
     depth: int = Query(2, description="图谱深度", ge=1, le=5),
-    db: Session = Depends(get_db)
+    max_nodes: int = Query(200, description="子图最大节点数", ge=1, le=5000),
+    max_edges: int = Query(1000, description="子图最大边数", ge=1, le=20000),
+    format: str = Query("json", description="输出格式：json，或 ndjson（流式逐行输出节点和边）", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取知识图谱"""
+    """获取知识图谱（支持 ETag / If-None-Match）"""
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_graph_ndjson(center_id, depth, max_nodes, max_edges),
+            media_type="application/x-ndjson"
+        )
+    
     service = KnowledgeService(db)
-    graph_data = service.get_knowledge_graph(center_id=center_id, depth=depth)
-    return graph_data
+    return await response_cache.respond(
+        request,
+        db,
+        ("knowledge_points", "knowledge_relations"),
+        lambda: service.get_knowledge_graph(
+            center_id=center_id,
+            depth=depth,
+            max_nodes=max_nodes,
+            max_edges=max_edges
+        ),
+        response_model=KnowledgeGraph
+    )
 
 
-@router.get("/suggest/{kp_id}")
-def suggest_relations(
+@router.get("/neighbors/{kp_id}")
+async def get_neighbors(
+    kp_id: int,
+    direction: str = Query("both", description="邻居方向：out（子节点）, in（父节点）, both", pattern="^(in|out|both)$"),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取知识点的直接邻居和出入度"""
+    service = KnowledgeService(db)
+    result = await service.get_neighbors(kp_id, direction=direction)
+    if result is None:
+        raise HTTPException(status_code=404, detail="知识点不存在")
+    return result
+
+
+@router.get("/suggest/{kp_id}", status_code=202)
+async def suggest_relations(
     kp_id: int,
     max_suggestions: int = Query(5, description="最大建议数量", ge=1, le=10),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     """
     使用 AI 自动建议知识关系
     
-    系统会分析指定知识点与其他知识点的关联，
-    并建议可能的关系类型和强度
+    系统会在后台分析指定知识点与其他知识点的关联，
+    建议结果通过 /jobs/{job_id} 的 result.suggestions 获取
     """
     service = KnowledgeService(db)
-    suggestions = service.auto_suggest_relations(kp_id, max_suggestions=max_suggestions)
+    job = await service.auto_suggest_relations(kp_id, max_suggestions=max_suggestions)
+    if not job:
+        raise HTTPException(status_code=404, detail="知识点不存在")
     
     return {
         "knowledge_point_id": kp_id,
-        "suggestions": suggestions
+        "job_id": job.id,
+        "status": job.status
     }
 
 
-@router.post("/batch-relations", status_code=201)
-def create_batch_relations(
+@router.post("/batch-relations", response_model=KnowledgeRelationBatchResponse, status_code=201)
+async def create_batch_relations(
     relations: List[KnowledgeRelationCreate],
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """批量创建知识关系"""
-    service = KnowledgeService(db)
-    created = []
-    
-    for relation_data in relations:
-        try:
-            relation = service.create_knowledge_relation(relation_data, created_by_ai=True)
-            created.append(relation)
-        except Exception as e:
-            # 跳过错误的关系，继续处理其他
-            continue
+    """
+    批量创建知识关系（AI 建议导入）
     
-    return {
-        "created_count": len(created),
-        "relations": created
-    }
+    已存在或请求内重复的关系（同一端点和类型）跳过，端点不存在的关系记为无效，
+    其余在一个事务中写入
+    """
+    service = KnowledgeService(db)
+    try:
+        return await service.create_knowledge_relations(relations, created_by_ai=True)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="部分关系已被同时创建，请重试")
 
 
 @router.get("/categories")
-def get_knowledge_categories(db: Session = Depends(get_db)):
-    """获取所有知识分类及其统计"""
-    from ...models.knowledge import KnowledgePoint
-    from sqlalchemy import func
-    
-    results = db.query(
-        KnowledgePoint.category,
-        func.count(KnowledgePoint.id).label('count'),
-        func.avg(KnowledgePoint.ease_factor).label('avg_ease_factor'),
-        func.sum(KnowledgePoint.is_mastered).label('mastered_count')
-    ).group_by(KnowledgePoint.category).all()
+async def get_knowledge_categories(request: Request, db: AsyncSession = Depends(get_db)):
+    """获取所有知识分类及其统计（支持 ETag / If-None-Match）"""
+    service = StatsService(db)
     
-    categories = []
-    for result in results:
-        categories.append({
-            "name": result.category or "未分类",
-            "count": result.count,
-            "average_ease_factor": round(result.avg_ease_factor or 0, 2),
-            "mastered_count": result.mastered_count or 0,
-            "mastery_rate": round((result.mastered_count or 0) / result.count * 100, 2)
-        })
+    async def _categories():
+        return {"categories": await service.get_categories()}
     
-    return {"categories": categories}
+    return await response_cache.respond(request, db, ("knowledge_points",), _categories)
 
@@ -0,0 +1,40 @@
+"""
+后台任务 API
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from ...db.database import get_db
+from ...schemas.job import AIJobResponse
+from ...models.job import AIJob
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=AIJobResponse)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    """查询后台任务状态、进度和结果"""
+    job = await db.get(AIJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return job
+
+
+@router.get("/", response_model=List[AIJobResponse])
+async def list_jobs(
+    status: Optional[str] = Query(None, description="按状态过滤：pending, running, succeeded, failed"),
+    job_type: Optional[str] = Query(None, description="按任务类型过滤"),
+    limit: int = Query(50, description="返回数量限制", ge=1, le=200),
+    db: AsyncSession = Depends(get_db)
+):
+    """列出最近的后台任务"""
+    query = select(AIJob)
+    
+    if status:
+        query = query.where(AIJob.status == status)
+    if job_type:
+        query = query.where(AIJob.job_type == job_type)
+    
+    return list(await db.scalars(query.order_by(AIJob.created_at.desc()).limit(limit)))
@@ -1,109 +1,209 @@
 """
 知识点管理 API
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
 
 from ...db.database import get_db
+from ..response_cache import response_cache
+from ..serialization import paginated_response
 from ...schemas.knowledge import (
     KnowledgePointCreate,
     KnowledgePointUpdate,
-    KnowledgePointResponse
+    KnowledgePointResponse,
+    KnowledgePointCompact,
+    KnowledgePointCreateResponse,
+    KnowledgePointBatchDelete,
+    KnowledgePointBatchDeleteResponse,
+    TagCount,
+    KnowledgeSearchResult,
+    SimilarKnowledgePoint
 )
 from ...services.knowledge_service import KnowledgeService
-from sqlalchemy import func
+from ...services.stats_service import StatsService
 
 router = APIRouter()
 
+# 相似度索引构建期间建议客户端重试的间隔（秒）
+SIMILARITY_RETRY_AFTER_SECONDS = 10
 
-@router.post("/", response_model=KnowledgePointResponse, status_code=201)
-def create_knowledge_point(
+
+@router.post("/", response_model=KnowledgePointCreateResponse, status_code=201)
+async def create_knowledge_point(
     data: KnowledgePointCreate,
     generate_summary: bool = Query(True, description="是否自动生成摘要"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    创建新的知识点
+    
+    摘要由后台任务生成，可通过返回的 job_id 查询任务状态
+    """
+    service = KnowledgeService(db)
+    return await service.create_knowledge_point(data, generate_summary=generate_summary)
+
+
+@router.get("/tags", response_model=List[TagCount])
+async def list_tags(
+    limit: int = Query(100, ge=1, le=1000, description="返回数量限制"),
+    db: AsyncSession = Depends(get_db)
 ):
-    """创建新的知识点"""
+    """列出标签及其知识点数量（按数量降序）"""
     service = KnowledgeService(db)
-    return service.create_knowledge_point(data, generate_summary=generate_summary)
+    return await service.list_tags(limit=limit)
+
+
+@router.get("/search", response_model=KnowledgeSearchResult)
+async def search_knowledge_points(
+    q: str = Query(..., min_length=1, max_length=200, description="搜索词，空格分隔的多个词需同时出现"),
+    limit: int = Query(20, ge=1, le=100, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    全文搜索知识点
+    
+    在标题、正文和摘要中检索，按相关度排序并返回高亮片段；
+    每个搜索词按子串匹配；全部搜索词都少于 3 个字符时按子串扫描，结果按ID倒序
+    """
+    if db.bind.dialect.name != "sqlite":
+        raise HTTPException(status_code=501, detail="全文搜索需要 SQLite FTS5")
+    
+    service = KnowledgeService(db)
+    try:
+        return await service.search_knowledge_points(q, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/{kp_id}", response_model=KnowledgePointResponse)
-def get_knowledge_point(kp_id: int, db: Session = Depends(get_db)):
+async def get_knowledge_point(kp_id: int, db: AsyncSession = Depends(get_db)):
     """获取指定知识点"""
     service = KnowledgeService(db)
-    kp = service.get_knowledge_point(kp_id)
+    kp = await service.get_knowledge_point(kp_id)
     if not kp:
         raise HTTPException(status_code=404, detail="知识点不存在")
     return kp
 
 
-@router.get("/", response_model=List[KnowledgePointResponse])
-def list_knowledge_points(
+@router.get("/{kp_id}/similar", response_model=List[SimilarKnowledgePoint])
+async def get_similar_knowledge_points(
+    kp_id: int,
+    limit: int = Query(10, ge=1, le=100, description="返回数量限制"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    查询内容相似的知识点
+    
+    基于本地 TF-IDF 向量的余弦相似度，按相似度降序返回；
+    索引首次加载或与数据库不一致需要重建时返回 503，构建在后台进行
+    """
+    service = KnowledgeService(db)
+    if not service.similarity_index_ready():
+        raise HTTPException(
+            status_code=503,
+            detail="相似度索引正在构建，请稍后重试",
+            headers={"Retry-After": str(SIMILARITY_RETRY_AFTER_SECONDS)}
+        )
+    similar = await service.get_similar_knowledge_points(kp_id, limit=limit)
+    if similar is None:
+        raise HTTPException(status_code=404, detail="知识点不存在")
+    return similar
+
+
+@router.get("/", response_model=Union[List[KnowledgePointResponse], List[KnowledgePointCompact]])
+async def list_knowledge_points(
     category: Optional[str] = None,
     tag: Optional[str] = None,
     is_mastered: Optional[bool] = None,
     skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=10000, description="返回数量限制"),
+    tags: Optional[List[str]] = Query(None, description="按多个标签筛选，可重复传入或用逗号分隔"),
+    tag_match: str = Query("any", description="多标签匹配方式：any（任一）, all（全部）", pattern="^(any|all)$"),
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 的值，传入时忽略 skip"),
+    view: str = Query("full", description="返回视图：full（完整字段）, compact（不含正文和摘要）", pattern="^(full|compact)$"),
+    db: AsyncSession = Depends(get_db)
 ):
-    """列出知识点"""
+    """
+    列出知识点
+    
+    按创建时间倒序；还有下一页时响应头 X-Next-Cursor 返回游标，
+    深翻页请使用游标代替 skip。列表页使用 view=compact 只返回展示需要的字段
+    """
     service = KnowledgeService(db)
-    return service.list_knowledge_points(
-        category=category,
-        tag=tag,
-        is_mastered=is_mastered,
-        skip=skip,
-        limit=limit
-    )
+    try:
+        # 多取一条判断是否还有下一页
+        rows = await service.list_knowledge_points(
+            category=category,
+            tag=tag,
+            is_mastered=is_mastered,
+            skip=skip,
+            limit=limit + 1,
+            tags=tags,
+            tag_match=tag_match,
+            cursor=cursor,
+            view=view
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return paginated_response(rows, limit, ("created_at", "id"))
 
 
 @router.put("/{kp_id}", response_model=KnowledgePointResponse)
-def update_knowledge_point(
+async def update_knowledge_point(
     kp_id: int,
     data: KnowledgePointUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """更新知识点"""
     service = KnowledgeService(db)
-    kp = service.update_knowledge_point(kp_id, data)
+    kp = await service.update_knowledge_point(kp_id, data)
     if not kp:
         raise HTTPException(status_code=404, detail="知识点不存在")
     return kp
 
 
 @router.delete("/{kp_id}", status_code=204)
-def delete_knowledge_point(kp_id: int, db: Session = Depends(get_db)):
-    """删除知识点"""
+async def delete_knowledge_point(kp_id: int, db: AsyncSession = Depends(get_db)):
+    """删除知识点（连同标签关联、复习记录和关系）"""
     service = KnowledgeService(db)
-    if not service.delete_knowledge_point(kp_id):
+    if not await service.delete_knowledge_point(kp_id):
         raise HTTPException(status_code=404, detail="知识点不存在")
     return None
 
 
-@router.get("/stats/summary")
-def get_knowledge_stats(db: Session = Depends(get_db)):
-    """获取知识点统计信息"""
-    from ...models.knowledge import KnowledgePoint
-    
-    total = db.query(KnowledgePoint).count()
-    mastered = db.query(KnowledgePoint).filter(KnowledgePoint.is_mastered == True).count()
-    
-    # 按分类统计
-    categories = {}
-    results = db.query(
-        KnowledgePoint.category, 
-        db.query(func.count(KnowledgePoint.id)).scalar() # db.count(KnowledgePoint.id)
-    ).group_by(KnowledgePoint.category).all()
-    
-    for category, count in results:
-        categories[category or "未分类"] = count
+@router.delete("/", response_model=KnowledgePointBatchDeleteResponse)
+async def delete_knowledge_points(
+    data: KnowledgePointBatchDelete,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    批量删除知识点
     
-    return {
-        "total": total,
-        "mastered": mastered,
-        "in_progress": total - mastered,
-        "mastery_rate": round(mastered / total * 100, 2) if total > 0 else 0,
-        "by_category": categories
-    }
+    请求体给出 ids，或给出与列表接口相同的筛选条件（category、tag、tags、is_mastered），
+    不存在的ID被忽略
+    """
+    service = KnowledgeService(db)
+    filters = data.model_dump(exclude={"ids", "tag_match"}, exclude_none=True)
+    if data.ids is not None:
+        if filters:
+            raise HTTPException(status_code=400, detail="ids 与筛选条件不能同时使用")
+        deleted = await service.delete_knowledge_points(data.ids)
+    else:
+        try:
+            deleted = await service.delete_knowledge_points_where(
+                **filters, tag_match=data.tag_match
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return {"deleted_count": len(deleted), "deleted_ids": deleted}
 
+
+@router.get("/stats/summary")
+async def get_knowledge_stats(request: Request, db: AsyncSession = Depends(get_db)):
+    """获取知识点统计信息（支持 ETag / If-None-Match）"""
+    service = StatsService(db)
+    return await response_cache.respond(
+        request, db, ("knowledge_points",), service.get_knowledge_summary
+    )
@@ -2,87 +2,99 @@
 学习内容管理 API
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
 from datetime import datetime, timedelta
 
 from ...db.database import get_db
+from ...db.pagination import after_cursor, decode_cursor
+from ..serialization import paginated_response
 from ...schemas.knowledge import (
     LearningContentCreate,
-    LearningContentResponse
+    LearningContentResponse,
+    LearningContentCompact,
+    LearningContentCreateResponse,
+    LEARNING_CONTENT_VIEWS
 )
+from ...schemas.rows import response_columns, row_dicts
 from ...services.knowledge_service import KnowledgeService
+from ...services.stats_service import StatsService
 from ...models.knowledge import LearningContent
 
 router = APIRouter()
 
 
-@router.post("/", response_model=LearningContentResponse, status_code=201)
-def create_learning_content(
+@router.post("/", response_model=LearningContentCreateResponse, status_code=201)
+async def create_learning_content(
     data: LearningContentCreate,
     auto_extract: bool = Query(True, description="是否自动提取知识点"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     创建学习内容
     
     如果未指定 knowledge_point_id 且 auto_extract=True，
-    系统会使用 GPT 自动提取知识点
+    系统会在后台任务中使用 GPT 自动提取知识点，
+    可通过返回的 job_id 查询任务状态
     """
     service = KnowledgeService(db)
-    return service.create_learning_content(data, auto_extract_knowledge=auto_extract)
+    return await service.create_learning_content(data, auto_extract_knowledge=auto_extract)
 
 
-@router.get("/", response_model=List[LearningContentResponse])
-def list_learning_contents(
+@router.get("/", response_model=Union[List[LearningContentResponse], List[LearningContentCompact]])
+async def list_learning_contents(
     knowledge_point_id: int = None,
     days: int = Query(7, description="查询最近几天的学习内容"),
     skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    limit: int = Query(100, ge=1, le=10000, description="返回数量限制"),
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 的值，传入时忽略 skip"),
+    view: str = Query("full", description="返回视图：full（完整字段）, compact（不含正文和笔记）", pattern="^(full|compact)$"),
+    db: AsyncSession = Depends(get_db)
 ):
-    """列出学习内容"""
-    query = db.query(LearningContent)
+    """
+    列出学习内容
+    
+    按学习日期倒序；还有下一页时响应头 X-Next-Cursor 返回游标
+    """
+    query = select(*response_columns(LearningContent, LEARNING_CONTENT_VIEWS[view]))
     
     if knowledge_point_id:
-        query = query.filter(LearningContent.knowledge_point_id == knowledge_point_id)
+        query = query.where(LearningContent.knowledge_point_id == knowledge_point_id)
     
     # 按日期过滤
     start_date = datetime.utcnow() - timedelta(days=days)
-    query = query.filter(LearningContent.learning_date >= start_date)
+    query = query.where(LearningContent.learning_date >= start_date)
     
-    return query.order_by(
-        LearningContent.learning_date.desc()
-    ).offset(skip).limit(limit).all()
+    if cursor:
+        try:
+            after = decode_cursor(cursor, datetime, int)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(after_cursor((LearningContent.learning_date, LearningContent.id), after))
+    else:
+        query = query.offset(skip)
+    
+    # 多取一条判断是否还有下一页
+    rows = row_dicts(await db.execute(
+        query.order_by(
+            LearningContent.learning_date.desc(), LearningContent.id.desc()
+        ).limit(limit + 1)
+    ))
+    return paginated_response(rows, limit, ("learning_date", "id"))
 
 
 @router.get("/stats/daily")
-def get_daily_learning_stats(
-    days: int = Query(30, description="统计最近几天"),
-    db: Session = Depends(get_db)
+async def get_daily_learning_stats(
+    days: int = Query(30, ge=1, le=3660, description="统计最近几天"),
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取每日学习统计"""
-    from sqlalchemy import func
-    
-    start_date = datetime.utcnow() - timedelta(days=days)
-    
-    results = db.query(
-        func.date(LearningContent.learning_date).label('date'),
-        func.count(LearningContent.id).label('count')
-    ).filter(
-        LearningContent.learning_date >= start_date
-    ).group_by(
-        func.date(LearningContent.learning_date)
-    ).all()
-    
-    stats = {
-        str(result.date): result.count
-        for result in results
-    }
+    """获取每日学习统计（读取每日汇总）"""
+    start_day = (datetime.utcnow() - timedelta(days=days)).date()
+    stats = await StatsService(db).get_daily_learning(start_day)
     
     return {
         "period_days": days,
         "total_items": sum(stats.values()),
         "daily_stats": stats
     }
-
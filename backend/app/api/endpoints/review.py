@@ -1,29 +1,40 @@
 """
 复习管理 API
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+from datetime import datetime, timedelta
 
 from ...db.database import get_db
+from ...db.pagination import after_cursor, decode_cursor
+from ..response_cache import response_cache
+from ..serialization import FastJSONResponse, paginated_response
 from ...schemas.knowledge import (
     ReviewRecordCreate,
     ReviewRecordResponse,
+    ReviewBatchCreate,
+    ReviewBatchResponse,
     DailyReviewPlan,
-    KnowledgePointResponse
+    DailyReviewPlanCompact,
+    KnowledgePointResponse,
+    KnowledgePointCompact,
+    KNOWLEDGE_POINT_VIEWS
 )
+from ...schemas.rows import response_columns, row_dicts
 from ...services.knowledge_service import KnowledgeService
 from ...services.openai_service import openai_service
+from ...services.stats_service import StatsService
 from ...models.knowledge import ReviewRecord
 
 router = APIRouter()
 
 
 @router.post("/", response_model=ReviewRecordResponse, status_code=201)
-def create_review_record(
+async def create_review_record(
     data: ReviewRecordCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     创建复习记录
@@ -38,67 +49,123 @@ def create_review_record(
     """
     service = KnowledgeService(db)
     try:
-        return service.create_review_record(data)
+        return await service.create_review_record(data)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
-@router.get("/plan", response_model=dict)
-def get_review_plan(
-    date: datetime = Query(None, description="指定日期，默认为今天"),
-    db: Session = Depends(get_db)
+@router.post("/batch", response_model=ReviewBatchResponse, status_code=201)
+async def create_review_records_batch(
+    data: ReviewBatchCreate,
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取复习计划"""
+    """
+    批量提交复习记录
+    
+    一次提交整轮复习结果，所有记录在一个事务中写入；
+    知识点不存在的条目在结果中标记失败，不影响其他条目
+    """
     service = KnowledgeService(db)
-    plan = service.get_daily_review_plan(date)
-    
-    # 将知识点对象转换为响应模型
-    result = {
-        "date": plan["date"],
-        "total_reviews": plan["total_reviews"],
-        "estimated_time_minutes": plan["estimated_time_minutes"],
-        "reviews_by_priority": {}
-    }
+    records = await service.create_review_records(data.reviews)
     
-    for priority, kps in plan["reviews_by_priority"].items():
-        result["reviews_by_priority"][priority] = [
-            KnowledgePointResponse.model_validate(kp) for kp in kps
-        ]
+    results = []
+    for index, (item, record) in enumerate(zip(data.reviews, records)):
+        if record is None:
+            results.append({
+                "index": index,
+                "knowledge_point_id": item.knowledge_point_id,
+                "success": False,
+                "error": f"知识点 {item.knowledge_point_id} 不存在"
+            })
+        else:
+            results.append({
+                "index": index,
+                "knowledge_point_id": item.knowledge_point_id,
+                "success": True,
+                "record": record
+            })
     
-    return result
+    created_count = sum(1 for result in results if result["success"])
+    return {
+        "created_count": created_count,
+        "failed_count": len(results) - created_count,
+        "results": results
+    }
 
 
-@router.get("/due", response_model=List[KnowledgePointResponse])
-def get_due_reviews(
+@router.get("/plan", response_model=Union[DailyReviewPlan, DailyReviewPlanCompact])
+async def get_review_plan(
+    request: Request,
+    date: datetime = Query(None, description="指定日期，默认为今天"),
+    page_size: int = Query(20, ge=0, le=200, description="每个优先级附带的卡片数量，0 表示只返回汇总"),
+    view: str = Query("full", description="返回视图：full（完整字段）, compact（不含正文和摘要）", pattern="^(full|compact)$"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    获取复习计划（各优先级的数量、预估时间和第一页卡片）
+    
+    支持 ETag / If-None-Match；计划随时间变化，数据未变化时最多缓存
+    RESPONSE_CACHE_TIME_BUCKET_SECONDS 秒
+    """
+    service = KnowledgeService(db)
+    return await response_cache.respond(
+        request,
+        db,
+        ("knowledge_points",),
+        lambda: service.get_daily_review_plan(date, page_size=page_size, view=view),
+        time_sensitive=True
+    )
+
+
+@router.get("/plan/{priority}", response_model=Union[List[KnowledgePointResponse], List[KnowledgePointCompact]])
+async def get_review_plan_page(
+    priority: str = Path(..., description="优先级：high, medium, low", pattern="^(high|medium|low)$"),
+    date: datetime = Query(None, description="指定日期，默认为今天"),
+    skip: int = Query(0, ge=0, description="跳过的数量"),
+    limit: int = Query(20, ge=1, le=200, description="返回数量限制"),
+    view: str = Query("full", description="返回视图：full（完整字段）, compact（不含正文和摘要）", pattern="^(full|compact)$"),
+    db: AsyncSession = Depends(get_db)
+):
+    """分页获取复习计划中某一优先级的知识点"""
+    service = KnowledgeService(db)
+    return FastJSONResponse(
+        await service.list_due_reviews(priority, date, offset=skip, limit=limit, view=view)
+    )
+
+
+@router.get("/due", response_model=Union[List[KnowledgePointResponse], List[KnowledgePointCompact]])
+async def get_due_reviews(
     limit: int = Query(10, description="返回数量限制"),
-    db: Session = Depends(get_db)
+    view: str = Query("full", description="返回视图：full（完整字段）, compact（不含正文和摘要）", pattern="^(full|compact)$"),
+    db: AsyncSession = Depends(get_db)
 ):
     """获取待复习的知识点（按优先级排序）"""
     from ...models.knowledge import KnowledgePoint
-    from sqlalchemy import and_
     
     # 查询需要复习的知识点
-    knowledge_points = db.query(KnowledgePoint).filter(
-        and_(
-            KnowledgePoint.is_mastered == False,
-            KnowledgePoint.next_review_date <= datetime.utcnow()
-        )
-    ).order_by(
-        KnowledgePoint.next_review_date.asc(),
-        KnowledgePoint.ease_factor.asc()
-    ).limit(limit).all()
+    knowledge_points = await db.execute(
+        select(*response_columns(KnowledgePoint, KNOWLEDGE_POINT_VIEWS[view])).where(
+            and_(
+                KnowledgePoint.is_mastered == False,
+                KnowledgePoint.next_review_date <= datetime.utcnow()
+            )
+        ).order_by(
+            KnowledgePoint.next_review_date.asc(),
+            KnowledgePoint.ease_factor.asc()
+        ).limit(limit)
+    )
     
-    return knowledge_points
+    return FastJSONResponse(row_dicts(knowledge_points))
 
 
 @router.get("/question/{kp_id}")
 async def generate_review_question(
     kp_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """为指定知识点生成复习问题"""
     service = KnowledgeService(db)
-    kp = service.get_knowledge_point(kp_id)
+    kp = await service.get_knowledge_point(kp_id)
     
     if not kp:
         raise HTTPException(status_code=404, detail="知识点不存在")
@@ -117,47 +184,110 @@ async def generate_review_question(
 
 
 @router.get("/history/{kp_id}", response_model=List[ReviewRecordResponse])
-def get_review_history(
+async def get_review_history(
     kp_id: int,
-    limit: int = Query(50, description="返回记录数量"),
-    db: Session = Depends(get_db)
+    limit: int = Query(50, ge=1, le=1000, description="返回记录数量"),
+    cursor: Optional[str] = Query(None, description="上一页响应头 X-Next-Cursor 的值"),
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取知识点的复习历史"""
-    records = db.query(ReviewRecord).filter(
+    """
+    获取知识点的复习历史
+    
+    按复习时间倒序；还有更早的记录时响应头 X-Next-Cursor 返回游标
+    """
+    query = select(*response_columns(ReviewRecord, ReviewRecordResponse)).where(
         ReviewRecord.knowledge_point_id == kp_id
-    ).order_by(
-        ReviewRecord.reviewed_at.desc()
-    ).limit(limit).all()
+    )
+    if cursor:
+        try:
+            after = decode_cursor(cursor, datetime, int)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(after_cursor((ReviewRecord.reviewed_at, ReviewRecord.id), after))
     
-    return records
+    # 多取一条判断是否还有下一页
+    rows = row_dicts(await db.execute(
+        query.order_by(ReviewRecord.reviewed_at.desc(), ReviewRecord.id.desc()).limit(limit + 1)
+    ))
+    return paginated_response(rows, limit, ("reviewed_at", "id"))
 
 
 @router.get("/stats/overall")
-def get_review_stats(db: Session = Depends(get_db)):
+async def get_review_stats(db: AsyncSession = Depends(get_db)):
     """获取复习统计信息"""
     from ...models.knowledge import KnowledgePoint
-    from sqlalchemy import func, and_
     
     # 待复习数量
-    due_count = db.query(KnowledgePoint).filter(
-        and_(
-            KnowledgePoint.is_mastered == False,
-            KnowledgePoint.next_review_date <= datetime.utcnow()
+    due_count = await db.scalar(
+        select(func.count(KnowledgePoint.id)).where(
+            and_(
+                KnowledgePoint.is_mastered == False,
+                KnowledgePoint.next_review_date <= datetime.utcnow()
+            )
         )
-    ).count()
-    
-    # 今日已复习数量
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    reviewed_today = db.query(ReviewRecord).filter(
-        ReviewRecord.reviewed_at >= today_start
-    ).count()
+    )
     
-    # 平均复习质量
-    avg_quality = db.query(func.avg(ReviewRecord.quality)).scalar() or 0
+    # 今日已复习数量和平均复习质量（读取每日汇总和统计计数）
+    stats_service = StatsService(db)
+    reviewed_today = await stats_service.get_review_count_on(datetime.utcnow().date())
+    average_quality = await stats_service.get_average_quality()
     
     return {
         "due_reviews": due_count,
         "reviewed_today": reviewed_today,
-        "average_quality": round(avg_quality, 2)
+        "average_quality": average_quality
+    }
+
+
+
+@router.get("/stats/daily")
+async def get_daily_review_stats(
+    days: int = Query(30, ge=1, le=3660, description="统计最近几天"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    获取每日复习统计（趋势图）
+    
+    每天的复习次数、平均质量、各评分分布和花费时间，没有复习的日期不返回
+    """
+    start_day = (datetime.utcnow() - timedelta(days=days)).date()
+    stats = await StatsService(db).get_daily_reviews(start_day)
+    
+    total_reviews = sum(day["count"] for day in stats.values())
+    quality_sum = sum(day["average_quality"] * day["count"] for day in stats.values())
+    return {
+        "period_days": days,
+        "total_reviews": total_reviews,
+        "average_quality": round(quality_sum / total_reviews, 2) if total_reviews else 0,
+        "time_spent_seconds": sum(day["time_spent_seconds"] for day in stats.values()),
+        "daily_stats": stats
     }
 
+
+@router.get("/stats/activity")
+async def get_activity_heatmap(
+    days: int = Query(365, ge=1, le=3660, description="统计最近几天"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    获取学习和复习活动热力图数据
+    
+    每天的学习内容数和复习次数，只返回有活动的日期
+    """
+    start_day = (datetime.utcnow() - timedelta(days=days)).date()
+    stats_service = StatsService(db)
+    learning = await stats_service.get_daily_learning(start_day)
+    reviews = await stats_service.get_daily_reviews(start_day)
+    
+    return {
+        "period_days": days,
+        "start_date": start_day.isoformat(),
+        "activity": [
+            {
+                "date": day,
+                "learning_items": learning.get(day, 0),
+                "reviews": reviews.get(day, {}).get("count", 0)
+            }
+            for day in sorted(learning.keys() | reviews.keys())
+        ]
+    }
@@ -0,0 +1,162 @@
+"""
+响应缓存 - 按数据版本号失效的只读接口缓存
+
+缓存键由路由、查询参数和相关表的版本号（data_versions，由触发器在每次写入时加一）组成，
+同时作为 ETag：客户端带 If-None-Match 且数据未变化时返回 304，不执行查询也不序列化；
+否则从进程内 LRU 读取已序列化的响应体，未命中时才执行查询。
+版本号与查询在同一个读事务中读取，缓存的响应体与版本号对应同一份数据快照。
+
+ETag 只由缓存键决定，多个工作进程之间 304 判断一致，各进程的 LRU 独立。
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..models.version import DataVersion
+from .serialization import FastJSONResponse
+
+
+class ResponseCache:
+    """按数据版本号失效的响应体 LRU"""
+
+    def __init__(self, enabled: bool, max_bytes: int, time_bucket_seconds: int):
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self.time_bucket_seconds = time_bucket_seconds
+
+        self._bodies: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._adapters: Dict[Any, TypeAdapter] = {}
+        self._stats = {
+            "not_modified": 0,
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0
+        }
+
+    async def respond(
+        self,
+        request: Request,
+        db: AsyncSession,
+        tables: Sequence[str],
+        compute: Callable[[], Awaitable[Any]],
+        response_model: Any = None,
+        time_sensitive: bool = False
+    ) -> Any:
+        """
+        返回缓存的响应，数据变化后才调用 compute 重新生成
+
+        Args:
+            tables: 响应依赖的表，任一表有写入即失效
+            compute: 生成响应数据
+            response_model: 路由的 response_model，用于校验和序列化；
+                compute 返回的已是响应形状的数据时省略，直接编码不再校验
+            time_sensitive: 响应依赖当前时间，最多缓存 RESPONSE_CACHE_TIME_BUCKET_SECONDS 秒
+        """
+        if not self.enabled or db.bind.dialect.name != "sqlite":
+            content = await compute()
+            return content if response_model is not None else FastJSONResponse(content)
+
+        key = self._key(request, await self._versions(db, tables), time_sensitive)
+        etag = f'"{key}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if self._matches(request.headers.get("if-none-match"), etag):
+            self._stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+
+        body = self._bodies.get(key)
+        if body is not None:
+            self._bodies.move_to_end(key)
+            self._stats["hits"] += 1
+        else:
+            self._stats["misses"] += 1
+            body = self._render(await compute(), response_model)
+            self._store(key, body)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def clear(self):
+        """清空进程内缓存"""
+        self._bodies.clear()
+        self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """命中/未命中计数和缓存大小"""
+        return {
+            **self._stats,
+            "entries": len(self._bodies),
+            "bytes": self._size
+        }
+
+    # ========== 内部实现 ==========
+
+    @staticmethod
+    async def _versions(db: AsyncSession, tables: Sequence[str]) -> Tuple[Tuple[str, int], ...]:
+        rows = await db.execute(
+            select(DataVersion.table_name, DataVersion.version)
+            .where(DataVersion.table_name.in_(tables))
+        )
+        return tuple(sorted(rows.tuples()))
+
+    def _key(
+        self,
+        request: Request,
+        versions: Tuple[Tuple[str, int], ...],
+        time_sensitive: bool
+    ) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        parts = [
+            request.url.path,
+            *(f"{name}={value}" for name, value in sorted(request.query_params.multi_items())),
+            *(f"{table}@{version}" for table, version in versions)
+        ]
+        if time_sensitive:
+            parts.append(str(int(time.time() // self.time_bucket_seconds)))
+        for part in parts:
+            encoded = part.encode("utf-8")
+            # 写入长度前缀，避免不同切分方式拼出相同的字节串
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _matches(if_none_match: Optional[str], etag: str) -> bool:
+        if not if_none_match:
+            return False
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+    def _render(self, content: Any, response_model: Any) -> bytes:
+        """与路由默认的序列化一致：按 response_model 校验后转为 JSON"""
+        if response_model is None:
+            return to_json(content)
+        adapter = self._adapters.get(response_model)
+        if adapter is None:
+            adapter = self._adapters[response_model] = TypeAdapter(response_model)
+        return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+    def _store(self, key: str, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        self._bodies[key] = body
+        self._size += len(body)
+        while self._size > self.max_bytes:
+            _, evicted = self._bodies.popitem(last=False)
+            self._size -= len(evicted)
+            self._stats["evictions"] += 1
+
+
+# 创建全局实例
+response_cache = ResponseCache(
+    enabled=settings.RESPONSE_CACHE_ENABLED,
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    time_bucket_seconds=settings.RESPONSE_CACHE_TIME_BUCKET_SECONDS
+)
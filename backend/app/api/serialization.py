@@ -0,0 +1,39 @@
+"""
+快速 JSON 响应
+
+使用 pydantic-core 的 Rust 编码器（to_json）直接编码 dict/list，
+日期时间等类型的输出格式与 FastAPI 默认的序列化一致，但不再经过 jsonable_encoder 逐层转换。
+"""
+from typing import Any, Dict, List, Sequence
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+from ..db.pagination import next_page
+
+# 下一页游标的响应头，响应体保持列表形状以兼容旧客户端
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class FastJSONResponse(JSONResponse):
+    """内容已是响应形状（字典、列表、基本类型）时使用，跳过 response_model 校验"""
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def paginated_response(
+    rows: List[Dict[str, Any]],
+    limit: int,
+    keys: Sequence[str]
+) -> FastJSONResponse:
+    """
+    返回一页响应行，还有下一页时在响应头中附带游标
+
+    Args:
+        rows: 按 limit + 1 查询的响应行
+        keys: 排序键字段名，如 ("created_at", "id")
+    """
+    page, cursor = next_page(rows, limit, keys)
+    headers = {NEXT_CURSOR_HEADER: cursor} if cursor else None
+    return FastJSONResponse(page, headers=headers)
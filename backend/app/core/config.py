@@ -15,6 +15,21 @@ class Settings(BaseSettings):
     
     # 数据库配置
     DATABASE_URL: str = "sqlite:///./learner.db"
+    ASYNC_DATABASE_URL: Optional[str] = None  # 异步驱动 URL，为空时由 DATABASE_URL 推导
+    
+    # SQLite 连接配置（每个连接建立时设置，其他数据库忽略）
+    SQLITE_JOURNAL_MODE: str = "WAL"  # WAL 下读写互不阻塞
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # WAL 下 NORMAL 只在检查点时同步
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024  # 每个连接的页缓存（KB）
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # 内存映射读取上限（字节），0 为关闭
+    SQLITE_TEMP_STORE: str = "MEMORY"  # 临时表和排序放在内存中
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # 遇到锁时的等待时间（毫秒）
+    
+    # 数据库连接池配置：读写分离
+    DB_READ_POOL_SIZE: int = 8  # 只读连接池大小
+    DB_READ_MAX_OVERFLOW: int = 8  # 只读连接池的临时溢出连接数
+    DB_WRITE_POOL_SIZE: int = 4  # 写连接池大小（不溢出），设为 1 时写请求在连接池中排队
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0  # 等待空闲连接的超时（秒）
     
     # Azure OpenAI 配置
     AZURE_OPENAI_ENDPOINT:str = os.environ.get("AZURE_OPENAI_ENDPOINT")
@@ -22,6 +37,43 @@ class Settings(BaseSettings):
     AZURE_OPENAI_DEPLOYMENT_NAME: str = os.environ.get("AZURE_OPENAI_DEPLOYMENT_NAME")
     AZURE_OPENAI_API_VERSION: str =  os.environ.get("AZURE_OPENAI_API_VERSION")
     
+    # Azure OpenAI 连接池与超时配置
+    AZURE_OPENAI_TIMEOUT: float = 60.0  # 单次请求总超时（秒）
+    AZURE_OPENAI_CONNECT_TIMEOUT: float = 5.0  # 建立连接超时（秒）
+    AZURE_OPENAI_MAX_CONNECTIONS: int = 20  # 连接池最大连接数
+    AZURE_OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 10  # 保持活跃的空闲连接数
+    AZURE_OPENAI_MAX_RETRIES: int = 2  # SDK 自动重试次数
+    
+    # 间隔重复调度算法（见 services/spaced_repetition.py 中注册的算法）
+    SCHEDULER_ALGORITHM: str = "sm2"
+    
+    # LLM 结果缓存配置
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = "./llm_cache.db"  # 持久层 SQLite 文件，为空则仅使用内存
+    LLM_CACHE_TTL_SECONDS: float = 60 * 60 * 24 * 30  # 30天
+    LLM_CACHE_MEMORY_ENTRIES: int = 1024  # 内存 LRU 条目上限
+    LLM_CACHE_MAX_ENTRIES: int = 50000  # 持久层条目上限
+    
+    # 本地相似度索引配置（哈希 TF-IDF 向量，内存映射文件在多进程间共享）
+    SIMILARITY_INDEX_DIR: str = "./similarity_index"  # 索引文件目录
+    SIMILARITY_DIM: int = 256  # 向量维度，修改后自动重建索引
+    SIMILARITY_BLOCK_ROWS: int = 32768  # 查询时每批参与矩阵乘法的向量数
+    
+    # 响应缓存配置（按数据版本号失效，见 data_versions）
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 进程内缓存的响应体总大小上限
+    RESPONSE_CACHE_TIME_BUCKET_SECONDS: int = 60  # 依赖当前时间的响应（复习计划）最长缓存时间
+    
+    # 后台任务队列配置
+    JOB_WORKER_CONCURRENCY: int = 4  # 并发工作协程数
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0  # 空闲时轮询间隔（秒）
+    JOB_MAX_ATTEMPTS: int = 3  # 单个任务最大尝试次数
+    JOB_RETRY_BACKOFF_SECONDS: float = 10.0  # 重试退避基数（秒），按次数指数增长
+    AI_SUMMARY_CONCURRENCY: int = 5  # 批量导入时并发生成摘要的上限
+    RELATION_CANDIDATE_LIMIT: int = 200  # 建议关系时按本地相似度选取的候选知识点数
+    RELATION_BATCH_SIZE: int = 40  # 每次 AI 调用提交的候选知识点数，限制提示词长度
+    RELATION_BATCH_CONCURRENCY: int = 5  # 建议关系时并发 AI 调用的上限
+    
     # CORS 配置
     BACKEND_CORS_ORIGINS: list[str] = ["http://localhost:3001", "http://localhost:3000"]
     
@@ -1,26 +1,158 @@
-from sqlalchemy import create_engine
+"""
+数据库连接 - 读写分离的异步引擎和会话
+
+API 和后台任务通过 AsyncSession 访问数据库，查询在事件循环中等待而不占用线程；
+异步驱动由 DATABASE_URL 推导（sqlite -> aiosqlite, postgresql -> asyncpg,
+mysql -> aiomysql），也可以用 ASYNC_DATABASE_URL 单独指定。
+同步引擎用于迁移、离线工具，以及在工作线程中全量读取数据构建内存索引。
+
+使用 SQLite 时每个连接建立后按配置设置 PRAGMA（默认 WAL + busy_timeout）：
+写事务由 SQLite 逐个执行，遇到锁时等待而不是立即报 "database is locked"；
+只读连接在 WAL 模式下与写事务并行，并开启 query_only 防止误写。
+写连接池大小固定、不溢出，限制同时排队等锁的写连接数。
+其他数据库下读写共用同一个引擎。
+"""
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from ..core.config import settings
 
-# 创建数据库引擎
-engine = create_engine(
-    settings.DATABASE_URL, 
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
 
-# 创建会话工厂
+_IS_SQLITE = settings.DATABASE_URL.startswith("sqlite")
+
+# 只读请求的 HTTP 方法
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def sqlite_pragmas(read_only: bool = False) -> List[str]:
+    """按配置生成每个 SQLite 连接需要执行的 PRAGMA"""
+    pragmas = [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}",  # 负数表示以 KB 为单位
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA temp_store={settings.SQLITE_TEMP_STORE}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    return pragmas
+
+
+# 同步驱动到异步驱动的映射
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def async_database_url(url: str) -> URL:
+    """把同步数据库 URL 转换为对应异步驱动的 URL"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"不支持的异步数据库: {parsed.get_backend_name()}")
+    if parsed.drivername == parsed.get_backend_name():
+        parsed = parsed.set(drivername=driver)
+    return parsed
+
+
+def _configure_sqlite(sync_engine: Engine, read_only: bool):
+    pragmas = sqlite_pragmas(read_only)
+
+    @event.listens_for(sync_engine, "connect")
+    def _configure_connection(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def _engine_options(read_only: bool) -> Dict[str, Any]:
+    if not _IS_SQLITE:
+        return {"pool_pre_ping": True}
+
+    if read_only:
+        pool_size, max_overflow = settings.DB_READ_POOL_SIZE, settings.DB_READ_MAX_OVERFLOW
+    else:
+        pool_size, max_overflow = settings.DB_WRITE_POOL_SIZE, 0
+
+    return {
+        "connect_args": {
+            "check_same_thread": False,
+            "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+        },
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS
+    }
+
+
+def _create_engine() -> Engine:
+    sync_engine = create_engine(settings.DATABASE_URL, **_engine_options(read_only=False))
+    if _IS_SQLITE:
+        _configure_sqlite(sync_engine, read_only=False)
+    return sync_engine
+
+
+def _create_async_engine(read_only: bool) -> AsyncEngine:
+    async_engine = create_async_engine(
+        settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL),
+        **_engine_options(read_only)
+    )
+    if _IS_SQLITE:
+        _configure_sqlite(async_engine.sync_engine, read_only)
+    return async_engine
+
+
+# 同步引擎（用于迁移、离线工具和工作线程中的索引构建）
+engine = _create_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 异步引擎（API 请求和后台任务）
+async_engine = _create_async_engine(read_only=False)
+async_read_engine = _create_async_engine(read_only=True) if _IS_SQLITE else async_engine
+
+# 创建异步会话工厂：提交后不过期对象，已加载的属性可以直接返回，不会再触发查询
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(
+    async_read_engine, autoflush=False, expire_on_commit=False
+)
+
 # 创建基础模型类
 Base = declarative_base()
 
 
-def get_db():
-    """获取数据库会话的依赖注入函数"""
-    db = SessionLocal()
-    try:
+async def get_db(request: Request) -> AsyncIterator[AsyncSession]:
+    """获取数据库会话的依赖注入函数：GET 等只读请求使用只读连接池，其余使用写连接"""
+    factory = AsyncReadSessionLocal if request.method in READ_METHODS else AsyncSessionLocal
+    async with factory() as db:
+        yield db
+
+
+async def get_write_db() -> AsyncIterator[AsyncSession]:
+    """获取写会话的依赖注入函数（用于会写入数据的 GET 接口）"""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
+
+def run_in_session(fn: Callable[[Session], Any]) -> Any:
+    """用独立的同步会话执行 fn（在工作线程中调用，不占用事件循环和请求的连接）"""
+    with SessionLocal() as db:
+        return fn(db)
+
+
+async def dispose_engines():
+    """关闭连接池"""
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+    engine.dispose()
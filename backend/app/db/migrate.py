@@ -0,0 +1,54 @@
+"""
+数据库迁移 - 应用启动时把数据库升级到最新版本
+
+迁移脚本位于 app/db/migrations，也可以在 backend 目录下用 alembic 命令行管理。
+引入迁移之前由 create_all 建出的数据库没有版本记录，会先按已有的表标记版本再升级。
+"""
+from logging import getLogger
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from .database import engine as default_engine
+
+
+logger = getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+
+# 未纳入迁移管理的旧数据库：按存在的表推断对应版本（从新到旧匹配）
+_LEGACY_REVISIONS = (
+    ("ai_jobs", "0002"),
+    ("knowledge_points", "0001"),
+)
+
+
+def alembic_config(engine: Engine) -> Config:
+    """不依赖 alembic.ini 的迁移配置"""
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    config.set_main_option(
+        "sqlalchemy.url",
+        engine.url.render_as_string(hide_password=False).replace("%", "%%")
+    )
+    return config
+
+
+def upgrade_database(engine: Engine = default_engine, revision: str = "head"):
+    """把数据库升级到指定版本（默认最新）"""
+    with engine.begin() as connection:
+        config = alembic_config(engine)
+        config.attributes["connection"] = connection
+
+        tables = set(inspect(connection).get_table_names())
+        if "alembic_version" not in tables:
+            for table, legacy_revision in _LEGACY_REVISIONS:
+                if table in tables:
+                    logger.info(f"为已有数据库标记迁移版本 {legacy_revision}")
+                    command.stamp(config, legacy_revision)
+                    break
+
+        command.upgrade(config, revision)
@@ -0,0 +1,84 @@
+"""
+Alembic 迁移环境
+
+命令行（alembic.ini）和应用启动（app.db.migrate）共用，
+数据库地址默认取自应用配置；启动时复用应用的数据库连接。
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from app.core.config import settings
+from app.db.database import Base
+from app import models  # noqa: F401  注册所有模型
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+if not config.get_main_option("sqlalchemy.url"):
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+
+target_metadata = Base.metadata
+
+# 迁移中直接用 SQL 创建、不在模型元数据里的表（FTS5 虚拟表及其影子表）
+UNMANAGED_TABLE_PREFIXES = ("knowledge_points_fts",)
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """autogenerate 时忽略非模型管理的表，避免生成删除语句"""
+    if type_ == "table" and reflected and name.startswith(UNMANAGED_TABLE_PREFIXES):
+        return False
+    return True
+
+
+def run_migrations_offline():
+    """离线模式：只输出 SQL"""
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+        include_object=include_object,
+        dialect_opts={"paramstyle": "named"}
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """在线模式：连接数据库执行迁移"""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_with_connection(connection)
+        return
+
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool
+    )
+    with connectable.connect() as connection:
+        _run_with_connection(connection)
+
+
+def _run_with_connection(connection):
+    # SQLite 不支持大部分 ALTER TABLE，以批量模式重建表
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=True,
+        include_object=include_object
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,94 @@
+"""初始表结构：知识点、学习内容、复习记录、知识关系
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "knowledge_points",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(length=200), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("summary", sa.Text(), nullable=True),
+        sa.Column("category", sa.String(length=100), nullable=True),
+        sa.Column("tags", sa.String(length=500), nullable=True),
+        sa.Column("ease_factor", sa.Float(), nullable=True),
+        sa.Column("interval", sa.Integer(), nullable=True),
+        sa.Column("repetitions", sa.Integer(), nullable=True),
+        sa.Column("next_review_date", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("is_mastered", sa.Boolean(), nullable=True),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_knowledge_points_id", "knowledge_points", ["id"])
+    op.create_index("ix_knowledge_points_title", "knowledge_points", ["title"])
+    op.create_index("ix_knowledge_points_category", "knowledge_points", ["category"])
+
+    op.create_table(
+        "learning_contents",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("knowledge_point_id", sa.Integer(), nullable=True),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("source", sa.String(length=200), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("learning_date", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["knowledge_point_id"], ["knowledge_points.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_learning_contents_id", "learning_contents", ["id"])
+    op.create_index("ix_learning_contents_learning_date", "learning_contents", ["learning_date"])
+
+    op.create_table(
+        "review_records",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("knowledge_point_id", sa.Integer(), nullable=False),
+        sa.Column("quality", sa.Integer(), nullable=False),
+        sa.Column("ease_factor_before", sa.Float(), nullable=True),
+        sa.Column("interval_before", sa.Integer(), nullable=True),
+        sa.Column("ease_factor_after", sa.Float(), nullable=True),
+        sa.Column("interval_after", sa.Integer(), nullable=True),
+        sa.Column("reviewed_at", sa.DateTime(), nullable=True),
+        sa.Column("time_spent_seconds", sa.Integer(), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(["knowledge_point_id"], ["knowledge_points.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_review_records_id", "review_records", ["id"])
+    op.create_index("ix_review_records_reviewed_at", "review_records", ["reviewed_at"])
+
+    op.create_table(
+        "knowledge_relations",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("parent_id", sa.Integer(), nullable=False),
+        sa.Column("child_id", sa.Integer(), nullable=False),
+        sa.Column("relation_type", sa.String(length=50), nullable=True),
+        sa.Column("strength", sa.Float(), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("created_by_ai", sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(["parent_id"], ["knowledge_points.id"]),
+        sa.ForeignKeyConstraint(["child_id"], ["knowledge_points.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_knowledge_relations_id", "knowledge_relations", ["id"])
+
+
+def downgrade():
+    op.drop_table("knowledge_relations")
+    op.drop_table("review_records")
+    op.drop_table("learning_contents")
+    op.drop_table("knowledge_points")
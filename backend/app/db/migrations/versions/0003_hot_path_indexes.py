@@ -0,0 +1,43 @@
+"""热点查询索引
+
+- knowledge_points (is_mastered, next_review_date, ease_factor)：/review/due、/review/plan、/review/stats/overall
+- knowledge_points.created_at：知识点列表排序
+- knowledge_relations.parent_id / child_id：邻居查询和删除知识点
+- review_records (knowledge_point_id, reviewed_at)：复习历史
+- learning_contents (knowledge_point_id, learning_date)：按知识点查询学习内容
+- ai_jobs.dedup_key / created_at：任务去重和任务列表
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_knowledge_points_due", "knowledge_points", ["is_mastered", "next_review_date", "ease_factor"]),
+    ("ix_knowledge_points_created_at", "knowledge_points", ["created_at"]),
+    ("ix_knowledge_relations_parent_id", "knowledge_relations", ["parent_id"]),
+    ("ix_knowledge_relations_child_id", "knowledge_relations", ["child_id"]),
+    ("ix_review_records_kp_reviewed_at", "review_records", ["knowledge_point_id", "reviewed_at"]),
+    ("ix_learning_contents_kp_learning_date", "learning_contents", ["knowledge_point_id", "learning_date"]),
+    ("ix_ai_jobs_dedup_key", "ai_jobs", ["dedup_key"]),
+    ("ix_ai_jobs_created_at", "ai_jobs", ["created_at"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
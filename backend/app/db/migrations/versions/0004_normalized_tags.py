@@ -0,0 +1,97 @@
+"""规范化标签：tags 表和 knowledge_point_tags 关联表
+
+knowledge_points.tags 逗号分隔字符串只保留用于展示，按标签筛选改为通过关联表的
+(tag_id, knowledge_point_id) 索引查找；已有知识点的标签字符串拆分后写入新表。
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+import re
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+# 与 KnowledgeService.parse_tags 的拆分规则一致（迁移不依赖应用代码）
+_TAG_SEPARATORS = re.compile(r"[,，]")
+_TAG_MAX_LENGTH = 100
+
+
+def _parse_tags(tags):
+    names = []
+    for name in _TAG_SEPARATORS.split(tags or ""):
+        name = name.strip()[:_TAG_MAX_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def upgrade():
+    tags = op.create_table(
+        "tags",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.create_index("ix_tags_id", "tags", ["id"])
+
+    links = op.create_table(
+        "knowledge_point_tags",
+        sa.Column("knowledge_point_id", sa.Integer(), nullable=False),
+        sa.Column("tag_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["knowledge_point_id"], ["knowledge_points.id"]),
+        sa.ForeignKeyConstraint(["tag_id"], ["tags.id"]),
+        sa.PrimaryKeyConstraint("knowledge_point_id", "tag_id"),
+    )
+    op.create_index(
+        "ix_knowledge_point_tags_tag_kp", "knowledge_point_tags", ["tag_id", "knowledge_point_id"]
+    )
+
+    # 迁移已有的逗号分隔标签，并把标签字符串规范化
+    bind = op.get_bind()
+    points = sa.table("knowledge_points", sa.column("id"), sa.column("tags"))
+    rows = bind.execute(
+        sa.select(points.c.id, points.c.tags).where(points.c.tags.isnot(None))
+    ).all()
+
+    point_tags = {kp_id: _parse_tags(value) for kp_id, value in rows}
+    names = sorted({name for names in point_tags.values() for name in names})
+    if names:
+        now = datetime.utcnow()
+        op.bulk_insert(tags, [{"name": name, "created_at": now} for name in names])
+        tag_ids = dict(bind.execute(sa.select(tags.c.name, tags.c.id)).all())
+        op.bulk_insert(links, [
+            {"knowledge_point_id": kp_id, "tag_id": tag_ids[name]}
+            for kp_id, names in point_tags.items()
+            for name in names
+        ])
+
+    normalized = [
+        {"kp_id": kp_id, "normalized": ",".join(names) or None}
+        for kp_id, names in point_tags.items()
+    ]
+    if normalized:
+        bind.execute(
+            points.update()
+            .where(points.c.id == sa.bindparam("kp_id"))
+            .values(tags=sa.bindparam("normalized")),
+            normalized
+        )
+
+
+def downgrade():
+    op.drop_index("ix_knowledge_point_tags_tag_kp", table_name="knowledge_point_tags")
+    op.drop_table("knowledge_point_tags")
+    op.drop_index("ix_tags_id", table_name="tags")
+    op.drop_table("tags")
@@ -0,0 +1,78 @@
+"""知识点全文索引 knowledge_points_fts（SQLite FTS5）
+
+外部内容表：索引只存词项，title/content/summary 从 knowledge_points 读取。
+触发器在插入、删除和修改这三列时同步索引，复习等只改调度字段的更新不会触发重建。
+使用 trigram 分词器，中文无需分词即可按子串检索（每个搜索词至少 3 个字符）。
+
+注意：批量模式（render_as_batch）重建 knowledge_points 会丢失触发器，
+之后修改该表的迁移需要重新执行本迁移中的 CREATE TRIGGER。
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+TRIGGERS = {
+    "knowledge_points_fts_ai": """
+        CREATE TRIGGER knowledge_points_fts_ai AFTER INSERT ON knowledge_points BEGIN
+            INSERT INTO knowledge_points_fts(rowid, title, content, summary)
+            VALUES (new.id, new.title, new.content, new.summary);
+        END
+    """,
+    "knowledge_points_fts_ad": """
+        CREATE TRIGGER knowledge_points_fts_ad AFTER DELETE ON knowledge_points BEGIN
+            INSERT INTO knowledge_points_fts(knowledge_points_fts, rowid, title, content, summary)
+            VALUES ('delete', old.id, old.title, old.content, old.summary);
+        END
+    """,
+    "knowledge_points_fts_au": """
+        CREATE TRIGGER knowledge_points_fts_au AFTER UPDATE OF title, content, summary
+        ON knowledge_points BEGIN
+            INSERT INTO knowledge_points_fts(knowledge_points_fts, rowid, title, content, summary)
+            VALUES ('delete', old.id, old.title, old.content, old.summary);
+            INSERT INTO knowledge_points_fts(rowid, title, content, summary)
+            VALUES (new.id, new.title, new.content, new.summary);
+        END
+    """,
+}
+
+
+def upgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    op.execute("""
+        CREATE VIRTUAL TABLE knowledge_points_fts USING fts5(
+            title, content, summary,
+            content='knowledge_points',
+            content_rowid='id',
+            tokenize='trigram'
+        )
+    """)
+    # 默认排序：标题权重最高，其次摘要、正文
+    op.execute(
+        "INSERT INTO knowledge_points_fts(knowledge_points_fts, rank) "
+        "VALUES ('rank', 'bm25(10.0, 1.0, 3.0)')"
+    )
+    for sql in TRIGGERS.values():
+        op.execute(sql)
+    # 为已有知识点建立索引
+    op.execute("INSERT INTO knowledge_points_fts(knowledge_points_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.execute("DROP TABLE IF EXISTS knowledge_points_fts")
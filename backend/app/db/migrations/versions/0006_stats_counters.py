@@ -0,0 +1,130 @@
+"""统计计数表 category_stats 和 review_stats
+
+仪表盘统计（/knowledge/stats/summary、/graph/categories、/review/stats/overall）
+直接读取计数表，不再对 knowledge_points 和 review_records 全表聚合。
+计数由触发器在增删改知识点和复习记录的同一事务中维护；出现偏差时可以重建：
+    python -m app.services.stats_service --rebuild
+
+触发器只在 SQLite 上创建，其他数据库上统计接口直接聚合查询。
+注意：批量模式（render_as_batch）重建 knowledge_points 或 review_records 会丢失触发器，
+之后修改这两张表的迁移需要重新执行本迁移中的 CREATE TRIGGER。
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+# 知识点计入/移出所在分类的计数
+_ADD_POINT = """
+    INSERT INTO category_stats(category, point_count, mastered_count, ease_factor_sum)
+    VALUES (coalesce(new.category, ''), 1, coalesce(new.is_mastered, 0), coalesce(new.ease_factor, 0))
+    ON CONFLICT(category) DO UPDATE SET
+        point_count = point_count + 1,
+        mastered_count = mastered_count + excluded.mastered_count,
+        ease_factor_sum = ease_factor_sum + excluded.ease_factor_sum;
+"""
+_REMOVE_POINT = """
+    UPDATE category_stats SET
+        point_count = point_count - 1,
+        mastered_count = mastered_count - coalesce(old.is_mastered, 0),
+        ease_factor_sum = ease_factor_sum - coalesce(old.ease_factor, 0)
+    WHERE category = coalesce(old.category, '');
+    DELETE FROM category_stats WHERE category = coalesce(old.category, '') AND point_count <= 0;
+"""
+
+TRIGGERS = {
+    "category_stats_ai": f"""
+        CREATE TRIGGER category_stats_ai AFTER INSERT ON knowledge_points BEGIN
+            {_ADD_POINT}
+        END
+    """,
+    "category_stats_ad": f"""
+        CREATE TRIGGER category_stats_ad AFTER DELETE ON knowledge_points BEGIN
+            {_REMOVE_POINT}
+        END
+    """,
+    "category_stats_au": f"""
+        CREATE TRIGGER category_stats_au AFTER UPDATE OF category, is_mastered, ease_factor
+        ON knowledge_points BEGIN
+            {_REMOVE_POINT}
+            {_ADD_POINT}
+        END
+    """,
+    "review_stats_ai": """
+        CREATE TRIGGER review_stats_ai AFTER INSERT ON review_records BEGIN
+            UPDATE review_stats SET
+                review_count = review_count + 1,
+                quality_sum = quality_sum + new.quality
+            WHERE id = 1;
+        END
+    """,
+    "review_stats_ad": """
+        CREATE TRIGGER review_stats_ad AFTER DELETE ON review_records BEGIN
+            UPDATE review_stats SET
+                review_count = review_count - 1,
+                quality_sum = quality_sum - old.quality
+            WHERE id = 1;
+        END
+    """,
+    "review_stats_au": """
+        CREATE TRIGGER review_stats_au AFTER UPDATE OF quality ON review_records BEGIN
+            UPDATE review_stats SET quality_sum = quality_sum - old.quality + new.quality
+            WHERE id = 1;
+        END
+    """,
+}
+
+
+def upgrade():
+    op.create_table(
+        "category_stats",
+        sa.Column("category", sa.String(length=100), nullable=False),
+        sa.Column("point_count", sa.Integer(), nullable=False),
+        sa.Column("mastered_count", sa.Integer(), nullable=False),
+        sa.Column("ease_factor_sum", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("category"),
+    )
+    op.create_table(
+        "review_stats",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("review_count", sa.Integer(), nullable=False),
+        sa.Column("quality_sum", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    # 按已有数据初始化计数
+    op.execute("""
+        INSERT INTO category_stats(category, point_count, mastered_count, ease_factor_sum)
+        SELECT coalesce(category, ''), count(*),
+               sum(CASE WHEN is_mastered THEN 1 ELSE 0 END),
+               coalesce(sum(ease_factor), 0)
+        FROM knowledge_points
+        GROUP BY coalesce(category, '')
+    """)
+    op.execute("""
+        INSERT INTO review_stats(id, review_count, quality_sum)
+        SELECT 1, count(*), coalesce(sum(quality), 0) FROM review_records
+    """)
+
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for sql in TRIGGERS.values():
+        op.execute(sql)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        for name in TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.drop_table("review_stats")
+    op.drop_table("category_stats")
@@ -0,0 +1,151 @@
+"""每日汇总表 daily_learning_stats 和 daily_review_stats
+
+学习和复习的按日统计（趋势图、年度热力图）读取汇总表，每天一行，
+不再按时间窗口扫描 learning_contents 和 review_records。
+汇总由触发器在写入学习内容和复习记录的同一事务中维护，按 UTC 日期归档；
+出现偏差时与统计计数一起重建：
+    python -m app.services.stats_service --rebuild
+
+与 0006 相同，触发器只在 SQLite 上创建，其他数据库上统计接口直接聚合查询；
+批量模式重建 learning_contents 或 review_records 后需要重新创建触发器。
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+QUALITY_LEVELS = range(6)
+
+_ADD_LEARNING = """
+    INSERT INTO daily_learning_stats(day, item_count)
+    SELECT date(new.learning_date), 1
+    WHERE new.learning_date IS NOT NULL
+    ON CONFLICT(day) DO UPDATE SET item_count = item_count + 1;
+"""
+_REMOVE_LEARNING = """
+    UPDATE daily_learning_stats SET item_count = item_count - 1
+    WHERE day = date(old.learning_date);
+    DELETE FROM daily_learning_stats WHERE day = date(old.learning_date) AND item_count <= 0;
+"""
+
+_QUALITY_COLUMNS = ", ".join(f"quality_{q}" for q in QUALITY_LEVELS)
+_ADD_REVIEW = f"""
+    INSERT INTO daily_review_stats(day, review_count, quality_sum, {_QUALITY_COLUMNS}, time_spent_seconds)
+    SELECT
+        date(new.reviewed_at), 1, new.quality,
+        {", ".join(f"new.quality = {q}" for q in QUALITY_LEVELS)},
+        coalesce(new.time_spent_seconds, 0)
+    WHERE new.reviewed_at IS NOT NULL
+    ON CONFLICT(day) DO UPDATE SET
+        review_count = review_count + 1,
+        quality_sum = quality_sum + excluded.quality_sum,
+        {", ".join(f"quality_{q} = quality_{q} + excluded.quality_{q}" for q in QUALITY_LEVELS)},
+        time_spent_seconds = time_spent_seconds + excluded.time_spent_seconds;
+"""
+_REMOVE_REVIEW = f"""
+    UPDATE daily_review_stats SET
+        review_count = review_count - 1,
+        quality_sum = quality_sum - old.quality,
+        {", ".join(f"quality_{q} = quality_{q} - (old.quality = {q})" for q in QUALITY_LEVELS)},
+        time_spent_seconds = time_spent_seconds - coalesce(old.time_spent_seconds, 0)
+    WHERE day = date(old.reviewed_at);
+    DELETE FROM daily_review_stats WHERE day = date(old.reviewed_at) AND review_count <= 0;
+"""
+
+TRIGGERS = {
+    "daily_learning_stats_ai": f"""
+        CREATE TRIGGER daily_learning_stats_ai AFTER INSERT ON learning_contents BEGIN
+            {_ADD_LEARNING}
+        END
+    """,
+    "daily_learning_stats_ad": f"""
+        CREATE TRIGGER daily_learning_stats_ad AFTER DELETE ON learning_contents BEGIN
+            {_REMOVE_LEARNING}
+        END
+    """,
+    "daily_learning_stats_au": f"""
+        CREATE TRIGGER daily_learning_stats_au AFTER UPDATE OF learning_date
+        ON learning_contents BEGIN
+            {_REMOVE_LEARNING}
+            {_ADD_LEARNING}
+        END
+    """,
+    "daily_review_stats_ai": f"""
+        CREATE TRIGGER daily_review_stats_ai AFTER INSERT ON review_records BEGIN
+            {_ADD_REVIEW}
+        END
+    """,
+    "daily_review_stats_ad": f"""
+        CREATE TRIGGER daily_review_stats_ad AFTER DELETE ON review_records BEGIN
+            {_REMOVE_REVIEW}
+        END
+    """,
+    "daily_review_stats_au": f"""
+        CREATE TRIGGER daily_review_stats_au AFTER UPDATE OF reviewed_at, quality, time_spent_seconds
+        ON review_records BEGIN
+            {_REMOVE_REVIEW}
+            {_ADD_REVIEW}
+        END
+    """,
+}
+
+
+def upgrade():
+    op.create_table(
+        "daily_learning_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("item_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day"),
+    )
+    op.create_table(
+        "daily_review_stats",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("review_count", sa.Integer(), nullable=False),
+        sa.Column("quality_sum", sa.Integer(), nullable=False),
+        *[sa.Column(f"quality_{q}", sa.Integer(), nullable=False) for q in QUALITY_LEVELS],
+        sa.Column("time_spent_seconds", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day"),
+    )
+
+    # 回填已有记录
+    op.execute("""
+        INSERT INTO daily_learning_stats(day, item_count)
+        SELECT date(learning_date), count(*)
+        FROM learning_contents
+        WHERE learning_date IS NOT NULL
+        GROUP BY date(learning_date)
+    """)
+    quality_sums = ", ".join(
+        f"sum(CASE WHEN quality = {q} THEN 1 ELSE 0 END)" for q in QUALITY_LEVELS
+    )
+    op.execute(f"""
+        INSERT INTO daily_review_stats(day, review_count, quality_sum, {_QUALITY_COLUMNS}, time_spent_seconds)
+        SELECT date(reviewed_at), count(*), sum(quality), {quality_sums},
+               coalesce(sum(time_spent_seconds), 0)
+        FROM review_records
+        WHERE reviewed_at IS NOT NULL
+        GROUP BY date(reviewed_at)
+    """)
+
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for sql in TRIGGERS.values():
+        op.execute(sql)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        for name in TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.drop_table("daily_review_stats")
+    op.drop_table("daily_learning_stats")
@@ -0,0 +1,64 @@
+"""数据版本表 data_versions
+
+每张业务表一行版本号，触发器在该表每次插入、更新、删除时加一（与写入同一事务）。
+只读接口的响应缓存以相关表的版本号作为缓存键和 ETag，数据未变化时直接返回缓存或 304。
+
+与 0005-0007 相同，触发器只在 SQLite 上创建，其他数据库上不启用响应缓存；
+批量模式重建这些表后需要重新创建触发器。
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+VERSIONED_TABLES = (
+    "knowledge_points",
+    "knowledge_relations",
+    "learning_contents",
+    "review_records",
+    "tags",
+    "knowledge_point_tags",
+)
+_OPERATIONS = {"ai": "INSERT", "au": "UPDATE", "ad": "DELETE"}
+
+TRIGGERS = {
+    f"data_versions_{table}_{suffix}": f"""
+        CREATE TRIGGER data_versions_{table}_{suffix} AFTER {operation} ON {table} BEGIN
+            UPDATE data_versions SET version = version + 1 WHERE table_name = '{table}';
+        END
+    """
+    for table in VERSIONED_TABLES
+    for suffix, operation in _OPERATIONS.items()
+}
+
+
+def upgrade():
+    data_versions = op.create_table(
+        "data_versions",
+        sa.Column("table_name", sa.String(length=100), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("table_name"),
+    )
+    op.bulk_insert(data_versions, [{"table_name": table, "version": 0} for table in VERSIONED_TABLES])
+
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for sql in TRIGGERS.values():
+        op.execute(sql)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        for name in TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    op.drop_table("data_versions")
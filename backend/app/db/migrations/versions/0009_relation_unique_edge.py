@@ -0,0 +1,43 @@
+"""知识关系唯一索引 uq_knowledge_relations_edge
+
+同一对知识点之间同一类型的关系只保留一条，批量导入依此去重：
+- 空的 relation_type 规范为 related（图谱索引本来就按 related 处理）
+- 删除重复的关系，每组保留最早创建的一条
+- 建立 (parent_id, child_id, relation_type) 唯一索引；它以 parent_id 开头，
+  可替代 0003 中的 ix_knowledge_relations_parent_id，后者删除以减少写入开销
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("UPDATE knowledge_relations SET relation_type = 'related' WHERE relation_type IS NULL")
+    op.execute("""
+        DELETE FROM knowledge_relations WHERE id NOT IN (
+            SELECT min(id) FROM knowledge_relations
+            GROUP BY parent_id, child_id, relation_type
+        )
+    """)
+    op.create_index(
+        "uq_knowledge_relations_edge",
+        "knowledge_relations",
+        ["parent_id", "child_id", "relation_type"],
+        unique=True
+    )
+    op.drop_index("ix_knowledge_relations_parent_id", table_name="knowledge_relations")
+
+
+def downgrade():
+    # 规范化和删除的重复关系无法恢复
+    op.create_index("ix_knowledge_relations_parent_id", "knowledge_relations", ["parent_id"])
+    op.drop_index("uq_knowledge_relations_edge", table_name="knowledge_relations")
@@ -0,0 +1,77 @@
+"""
+键集分页 - 按 (排序列, ID) 翻页的游标
+
+游标是上一页最后一行排序键的编码（对客户端不透明），下一页从该位置之后继续，
+查询走 (排序列, ID) 索引直接定位，翻到第几页代价都相同，不像 OFFSET 需要逐行跳过。
+SQLite 的二级索引末尾隐含 rowid（即整数主键 id），单列排序索引即可满足 (排序列, id) 顺序。
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.sql import ColumnElement
+
+
+def encode_cursor(*values: Any) -> str:
+    """编码排序键为游标（日期时间按 ISO 格式）"""
+    return base64.urlsafe_b64encode(
+        json.dumps([
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ]).encode()
+    ).decode()
+
+
+def decode_cursor(cursor: str, *types: Callable[[Any], Any]) -> Tuple[Any, ...]:
+    """
+    解码游标，按 types 依次转换各排序键
+
+    Raises:
+        ValueError: 游标无效
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError
+        return tuple(
+            datetime.fromisoformat(value) if convert is datetime else convert(value)
+            for convert, value in zip(types, values)
+        )
+    except (ValueError, TypeError):
+        raise ValueError("无效的分页游标")
+
+
+def after_cursor(
+    columns: Sequence[ColumnElement],
+    values: Sequence[Any],
+    descending: bool = True
+) -> ColumnElement:
+    """游标之后的行：(列...) 按行值比较，降序取更小的，升序取更大的"""
+    if descending:
+        return tuple_(*columns) < tuple_(*values)
+    return tuple_(*columns) > tuple_(*values)
+
+
+def next_page(
+    rows: List[Dict[str, Any]],
+    limit: int,
+    keys: Sequence[str]
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    截取一页并生成下一页游标
+
+    Args:
+        rows: 按 limit + 1 查询的结果，多出的一行表示还有下一页
+        keys: 排序键在行中的字段名
+
+    Returns:
+        (本页行, 下一页游标或 None)
+    """
+    if limit <= 0 or not rows:
+        return rows[:max(limit, 0)], None
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*(rows[-1][key] for key in keys))
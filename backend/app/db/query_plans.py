@@ -0,0 +1,377 @@
+"""
+查询计划检查 - 确保热点查询都能走索引
+
+在迁移到最新版本的临时 SQLite 数据库上，通过 API 和服务层实际执行每个热点查询，
+记录发出的 SQL 并逐条运行 EXPLAIN QUERY PLAN。任何一条语句对业务表做全表扫描
+（SCAN <表> 且没有使用索引）都视为回归，除非该查询本身就需要读取整张表。
+
+用法（在 backend 目录下）:
+    python -m app.db.query_plans
+
+存在全表扫描时以非零状态码退出，可直接用于 CI。
+"""
+import asyncio
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List, NamedTuple, Optional, Tuple
+
+import httpx
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from .database import Base, async_database_url, get_db
+from .migrate import upgrade_database
+from .pagination import encode_cursor
+from ..models.job import AIJob
+from ..models.knowledge import (
+    KnowledgePoint,
+    KnowledgePointTag,
+    KnowledgeRelation,
+    LearningContent,
+    ReviewRecord,
+    Tag
+)
+
+
+class HotQuery(NamedTuple):
+    """一个热点查询：await run(client, db) 通过 API 或服务层触发查询"""
+    name: str
+    run: Callable[[httpx.AsyncClient, AsyncSession], Awaitable[Any]]
+    # 本身需要读取整张表的查询，允许对这些表全表扫描
+    allow_scans: Tuple[str, ...] = ()
+
+
+class QueryPlanIssue(NamedTuple):
+    query: str
+    table: str
+    statement: str
+    plan: List[str]
+
+
+def _job_queue():
+    from ..services.job_queue import job_queue
+    return job_queue
+
+
+def _service(db: AsyncSession):
+    from ..services.knowledge_service import KnowledgeService
+    return KnowledgeService(db)
+
+
+HOT_QUERIES: List[HotQuery] = [
+    # 知识点
+    HotQuery("GET /knowledge/{id}", lambda c, db: c.get("/api/v1/knowledge/1")),
+    HotQuery("GET /knowledge/", lambda c, db: c.get("/api/v1/knowledge/", params={"limit": 20})),
+    HotQuery(
+        "GET /knowledge/?cursor=",
+        lambda c, db: c.get(
+            "/api/v1/knowledge/", params={"cursor": encode_cursor(datetime.utcnow(), 10**9), "limit": 20}
+        )
+    ),
+    HotQuery(
+        "GET /knowledge/?category=",
+        lambda c, db: c.get("/api/v1/knowledge/", params={"category": "c1", "limit": 20})
+    ),
+    HotQuery(
+        "GET /knowledge/?is_mastered=",
+        lambda c, db: c.get("/api/v1/knowledge/", params={"is_mastered": False, "limit": 20})
+    ),
+    HotQuery(
+        "GET /knowledge/?tag=",
+        lambda c, db: c.get("/api/v1/knowledge/", params={"tag": "t1", "limit": 20})
+    ),
+    HotQuery(
+        "GET /knowledge/?tags=&tag_match=all",
+        lambda c, db: c.get(
+            "/api/v1/knowledge/", params={"tags": ["t1", "t2"], "tag_match": "all", "limit": 20}
+        )
+    ),
+    HotQuery(
+        "GET /knowledge/search",
+        lambda c, db: c.get("/api/v1/knowledge/search", params={"q": "知识点 1", "limit": 5})
+    ),
+    HotQuery(
+        "GET /knowledge/search（短词）",
+        lambda c, db: c.get("/api/v1/knowledge/search", params={"q": "识点", "limit": 5}),
+        # 短词无法走 trigram 索引，沿主键倒序扫描，凑满一页即停止
+        allow_scans=("knowledge_points",)
+    ),
+    HotQuery(
+        "GET /knowledge/tags",
+        lambda c, db: c.get("/api/v1/knowledge/tags"),
+        # 标签计数是对全部关联的聚合
+        allow_scans=("tags", "knowledge_point_tags")
+    ),
+    HotQuery("DELETE /knowledge/{id}", lambda c, db: c.delete("/api/v1/knowledge/20")),
+    HotQuery(
+        "DELETE /knowledge/",
+        lambda c, db: c.request("DELETE", "/api/v1/knowledge/", json={"ids": [17, 18, 999]})
+    ),
+    HotQuery(
+        "DELETE /knowledge/?category=",
+        lambda c, db: c.request("DELETE", "/api/v1/knowledge/", json={"category": "c1", "tag": "t3"})
+    ),
+    HotQuery(
+        "GET /knowledge/stats/summary",
+        lambda c, db: c.get("/api/v1/knowledge/stats/summary"),
+        # 计数表每个分类一行
+        allow_scans=("category_stats",)
+    ),
+    # 复习
+    HotQuery("GET /review/due", lambda c, db: c.get("/api/v1/review/due", params={"limit": 10})),
+    HotQuery("GET /review/plan", lambda c, db: c.get("/api/v1/review/plan")),
+    HotQuery("GET /review/plan/{priority}", lambda c, db: c.get("/api/v1/review/plan/high")),
+    HotQuery("GET /review/history/{id}", lambda c, db: c.get("/api/v1/review/history/1")),
+    HotQuery(
+        "GET /review/history/{id}?cursor=",
+        lambda c, db: c.get(
+            "/api/v1/review/history/1", params={"cursor": encode_cursor(datetime.utcnow(), 10**9)}
+        )
+    ),
+    HotQuery(
+        "POST /review/batch",
+        lambda c, db: c.post("/api/v1/review/batch", json={
+            "reviews": [{"knowledge_point_id": 2, "quality": 4}, {"knowledge_point_id": 3, "quality": 2}]
+        })
+    ),
+    HotQuery("GET /review/stats/overall", lambda c, db: c.get("/api/v1/review/stats/overall")),
+    HotQuery(
+        "GET /review/stats/daily",
+        lambda c, db: c.get("/api/v1/review/stats/daily", params={"days": 365})
+    ),
+    HotQuery(
+        "GET /review/stats/activity",
+        lambda c, db: c.get("/api/v1/review/stats/activity", params={"days": 365})
+    ),
+    # 学习内容
+    HotQuery(
+        "GET /learning/?knowledge_point_id=",
+        lambda c, db: c.get("/api/v1/learning/", params={"knowledge_point_id": 1})
+    ),
+    HotQuery("GET /learning/", lambda c, db: c.get("/api/v1/learning/")),
+    HotQuery(
+        "GET /learning/?cursor=",
+        lambda c, db: c.get(
+            "/api/v1/learning/", params={"cursor": encode_cursor(datetime.utcnow(), 10**9)}
+        )
+    ),
+    HotQuery("GET /learning/stats/daily", lambda c, db: c.get("/api/v1/learning/stats/daily")),
+    # 知识图谱
+    HotQuery(
+        "POST /graph/batch-relations",
+        lambda c, db: c.post("/api/v1/graph/batch-relations", json=[
+            {"parent_id": 1, "child_id": 2},
+            {"parent_id": 2, "child_id": 12, "relation_type": "extends"},
+            {"parent_id": 3, "child_id": 999},
+        ])
+    ),
+    HotQuery(
+        "GET /graph/?center_id=",
+        lambda c, db: c.get("/api/v1/graph/", params={"center_id": 1, "depth": 2})
+    ),
+    HotQuery(
+        "GET /graph/",
+        lambda c, db: c.get("/api/v1/graph/"),
+        # 全局图谱本身就要返回全部节点和边
+        allow_scans=("knowledge_points", "knowledge_relations")
+    ),
+    HotQuery("GET /graph/neighbors/{id}", lambda c, db: c.get("/api/v1/graph/neighbors/1")),
+    HotQuery(
+        "GET /graph/categories",
+        lambda c, db: c.get("/api/v1/graph/categories"),
+        allow_scans=("category_stats",)
+    ),
+    HotQuery(
+        "GET /knowledge/{id}/similar",
+        lambda c, db: c.get("/api/v1/knowledge/1/similar", params={"limit": 5})
+    ),
+    HotQuery(
+        "KnowledgeService.get_relation_candidates",
+        lambda c, db: _service(db).get_relation_candidates(1)
+    ),
+    # 后台任务
+    HotQuery("GET /jobs/{id}", lambda c, db: c.get("/api/v1/jobs/1")),
+    HotQuery("GET /jobs/", lambda c, db: c.get("/api/v1/jobs/", params={"status": "pending"})),
+    HotQuery(
+        "JobQueue.enqueue（去重）",
+        lambda c, db: _job_queue()._find_active(db, "generate_summary:1")
+    ),
+    HotQuery("JobQueue 领取任务", lambda c, db: _job_queue()._claim(db)),
+]
+
+
+# ========== 检查 ==========
+
+_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+_CHECKED_STATEMENTS = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+def _seed(db: Session):
+    now = datetime.utcnow()
+    points = [
+        KnowledgePoint(
+            title=f"知识点 {i}",
+            content=f"内容 {i}",
+            category=f"c{i % 3}",
+            ease_factor=1.5 + i * 0.1,
+            next_review_date=now + timedelta(days=i - 10)
+        )
+        for i in range(1, 21)
+    ]
+    db.add_all(points)
+    db.flush()
+    db.add_all(
+        KnowledgeRelation(parent_id=points[i].id, child_id=points[i + 1].id)
+        for i in range(10)
+    )
+    tags = [Tag(name=f"t{i}") for i in range(1, 4)]
+    db.add_all(tags)
+    db.flush()
+    db.add_all(
+        KnowledgePointTag(knowledge_point_id=point.id, tag_id=tag.id)
+        for i, point in enumerate(points)
+        for tag in tags[:i % 4]
+    )
+    db.add(ReviewRecord(knowledge_point_id=points[0].id, quality=4))
+    db.add(LearningContent(knowledge_point_id=points[0].id, content="学习内容"))
+    db.add(AIJob(job_type="generate_summary", payload={}, dedup_key="generate_summary:1"))
+    db.commit()
+
+
+def _full_scans(plan: List[str], allow_scans: Tuple[str, ...]) -> List[str]:
+    tables = set(Base.metadata.tables)
+    scanned = []
+    for detail in plan:
+        match = _SCAN.match(detail)
+        if not match:
+            continue
+        table = re.sub(r"_\d+$", "", match.group(1))  # 去掉 SQLAlchemy 生成的别名后缀
+        if table in tables and table not in allow_scans:
+            scanned.append(table)
+    return scanned
+
+
+def check_query_plans(
+    queries: Optional[List[HotQuery]] = None,
+    verbose: bool = False
+) -> List[QueryPlanIssue]:
+    """
+    执行热点查询并检查查询计划
+
+    Returns:
+        全表扫描问题列表，为空表示全部通过
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        return asyncio.run(_check(Path(tmpdir), queries or HOT_QUERIES, verbose))
+
+
+async def _check(tmpdir: Path, queries: List[HotQuery], verbose: bool) -> List[QueryPlanIssue]:
+    from ..main import app
+    from ..services.graph_index import graph_index
+    from ..services.similarity_index import similarity_index
+
+    issues: List[QueryPlanIssue] = []
+    url = f"sqlite:///{tmpdir / 'query_plans.db'}"
+    index_directory = similarity_index.directory
+    # 同步引擎负责迁移、造数和 EXPLAIN，查询本身走与线上相同的异步会话
+    engine = create_engine(url)
+    async_engine = create_async_engine(async_database_url(url))
+    session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def _get_db():
+        async with session_factory() as db:
+            yield db
+
+    upgrade_database(engine)
+    app.dependency_overrides[get_db] = _get_db
+    try:
+        with Session(engine) as db:
+            _seed(db)
+            # 图谱索引和相似度索引只构建一次，不计入单个查询
+            graph_index.invalidate()
+            graph_index.ensure_loaded(db)
+            similarity_index.invalidate()
+            similarity_index.directory = tmpdir / "similarity_index"
+            similarity_index.ensure_loaded(db)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for query in queries:
+                async with session_factory() as db:
+                    statements = await _capture(
+                        async_engine.sync_engine, lambda: query.run(client, db)
+                    )
+                issues.extend(_explain(engine, query, statements, verbose))
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        graph_index.invalidate()
+        similarity_index.directory = index_directory
+        similarity_index.invalidate()
+        await async_engine.dispose()
+        engine.dispose()
+
+    return issues
+
+
+async def _capture(engine: Engine, fn: Callable[[], Awaitable[Any]]) -> List[Tuple[str, Any]]:
+    """执行 fn 并记录发出的查询语句（executemany 的批量写入不检查）"""
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(_CHECKED_STATEMENTS):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        result = await fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+    # 请求失败时查询可能根本没有执行，检查结果不可信
+    status_code = getattr(result, "status_code", None)
+    if status_code is not None and status_code >= 400:
+        raise RuntimeError(f"请求失败 ({status_code}): {result.text}")
+    return statements
+
+
+def _explain(
+    engine: Engine,
+    query: HotQuery,
+    statements: List[Tuple[str, Any]],
+    verbose: bool
+) -> List[QueryPlanIssue]:
+    issues = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            plan = [row[-1] for row in rows]
+            for table in _full_scans(plan, query.allow_scans):
+                issues.append(QueryPlanIssue(query.name, table, statement, plan))
+            if verbose:
+                print(f"[{query.name}] {' '.join(statement.split())}")
+                for detail in plan:
+                    print(f"    {detail}")
+    return issues
+
+
+def main(argv: List[str]) -> int:
+    issues = check_query_plans(verbose="-v" in argv)
+    if not issues:
+        print(f"全部 {len(HOT_QUERIES)} 个热点查询均使用索引")
+        return 0
+
+    for issue in issues:
+        print(f"全表扫描 {issue.table}: {issue.query}")
+        print(f"    {' '.join(issue.statement.split())}")
+        for detail in issue.plan:
+            print(f"    -> {detail}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
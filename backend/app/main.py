@@ -5,18 +5,36 @@ Learner - 智能学习管理系统
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 from .core.config import settings
-from .db.database import engine, Base
+from .db.database import SessionLocal, dispose_engines, run_in_session
+from .db.migrate import upgrade_database
 from .api import api_router
+from .api.serialization import NEXT_CURSOR_HEADER
+from .services.openai_service import openai_service
+from .services.job_queue import job_queue
+from .services.llm_cache import llm_cache
+from .api.response_cache import response_cache
+from .services.graph_index import graph_index
+from .services.similarity_index import similarity_index
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
-    # 启动时：创建数据库表
-    Base.metadata.create_all(bind=engine)
+    # 启动时：执行数据库迁移
+    upgrade_database()
+    # 在后台线程中核对相似度索引与数据库是否一致，不一致时重建
+    similarity_index.start_loading(SessionLocal)
+    # 启动后台任务工作协程
+    await job_queue.start()
     yield
-    # 关闭时：清理资源（如果需要）
+    # 关闭时：停止后台任务和索引加载，记录相似度索引的数据库版本戳，释放 OpenAI 和数据库连接池
+    await job_queue.stop()
+    await asyncio.to_thread(similarity_index.stop_loading)
+    await asyncio.to_thread(run_in_session, similarity_index.save_stamp)
+    await openai_service.close()
+    await dispose_engines()
 
 
 # 创建 FastAPI 应用
@@ -52,6 +70,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # 注册 API 路由
@@ -71,12 +90,14 @@ async def root():
 @app.get("/health")
 async def health_check():
     """健康检查"""
-    from .services.openai_service import openai_service
-    
     return {
         "status": "healthy",
         "version": settings.VERSION,
-        "openai_available": openai_service.is_available()
+        "openai_available": openai_service.is_available(),
+        "llm_cache": llm_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "graph_index": graph_index.stats(),
+        "similarity_index": similarity_index.stats()
     }
 
 
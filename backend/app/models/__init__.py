@@ -1,9 +1,27 @@
-from .knowledge import KnowledgePoint, LearningContent, ReviewRecord, KnowledgeRelation
+from .knowledge import (
+    KnowledgePoint,
+    Tag,
+    KnowledgePointTag,
+    LearningContent,
+    ReviewRecord,
+    KnowledgeRelation
+)
+from .job import AIJob
+from .stats import CategoryStats, ReviewStats, DailyLearningStats, DailyReviewStats
+from .version import DataVersion
 
 __all__ = [
     "KnowledgePoint",
+    "Tag",
+    "KnowledgePointTag",
     "LearningContent", 
     "ReviewRecord",
-    "KnowledgeRelation"
+    "KnowledgeRelation",
+    "AIJob",
+    "CategoryStats",
+    "ReviewStats",
+    "DailyLearningStats",
+    "DailyReviewStats",
+    "DataVersion"
 ]
 
@@ -0,0 +1,41 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, JSON, Index, text
+from datetime import datetime
+from ..db.database import Base
+
+
+class AIJob(Base):
+    """后台任务模型 - 持久化的 AI 富化任务（摘要生成、知识提取、关系建议）"""
+    __tablename__ = "ai_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_type = Column(String(50), nullable=False, index=True)  # 任务类型
+    payload = Column(JSON, nullable=False)  # 任务参数
+    dedup_key = Column(String(200), index=True)  # 去重键，同一键同时只允许一个活动任务
+    
+    # 执行状态：pending(等待), running(执行中), succeeded(成功), failed(失败)
+    status = Column(String(20), default="pending", nullable=False)
+    progress = Column(Float, default=0.0)  # 进度（0-1）
+    message = Column(String(200))  # 进度说明
+    attempts = Column(Integer, default=0)  # 已尝试次数
+    max_attempts = Column(Integer, default=3)  # 最大尝试次数
+    result = Column(JSON)  # 执行结果
+    error = Column(Text)  # 最近一次错误信息
+    
+    # 元数据
+    run_after = Column(DateTime, default=datetime.utcnow)  # 最早执行时间（重试退避）
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime)
+    
+    __table_args__ = (
+        # 工作进程按状态和执行时间领取任务
+        Index("ix_ai_jobs_status_run_after", "status", "run_after"),
+        # 活动任务（等待或执行中）按去重键唯一
+        Index(
+            "uq_ai_jobs_active_dedup_key",
+            "dedup_key",
+            unique=True,
+            sqlite_where=text("status IN ('pending', 'running')"),
+            postgresql_where=text("status IN ('pending', 'running')")
+        ),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..db.database import Base
@@ -13,7 +13,7 @@ class KnowledgePoint(Base):
     content = Column(Text, nullable=False)
     summary = Column(Text)  # GPT生成的摘要
     category = Column(String(100), index=True)  # 分类
-    tags = Column(String(500))  # 标签，逗号分隔
+    tags = Column(String(500))  # 标签，逗号分隔（用于展示，筛选走 knowledge_point_tags）
     
     # 遗忘曲线相关字段
     ease_factor = Column(Float, default=2.5)  # 难易度因子（SM-2算法）
@@ -22,7 +22,7 @@ class KnowledgePoint(Base):
     next_review_date = Column(DateTime, default=datetime.utcnow)  # 下次复习时间
     
     # 元数据
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_mastered = Column(Boolean, default=False)  # 是否已掌握
     
@@ -39,6 +39,41 @@ class KnowledgePoint(Base):
         foreign_keys="KnowledgeRelation.parent_id",
         back_populates="parent"
     )
+    tag_links = relationship("KnowledgePointTag", back_populates="knowledge_point")
+    
+    __table_args__ = (
+        # 待复习查询：未掌握且复习日期已到，按复习日期、难易度排序
+        Index("ix_knowledge_points_due", "is_mastered", "next_review_date", "ease_factor"),
+    )
+
+
+class Tag(Base):
+    """标签模型"""
+    __tablename__ = "tags"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), nullable=False, unique=True)  # 标签名（唯一索引）
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # 关系
+    knowledge_point_links = relationship("KnowledgePointTag", back_populates="tag")
+
+
+class KnowledgePointTag(Base):
+    """知识点-标签关联"""
+    __tablename__ = "knowledge_point_tags"
+    
+    knowledge_point_id = Column(Integer, ForeignKey("knowledge_points.id"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id"), primary_key=True)
+    
+    # 关系
+    knowledge_point = relationship("KnowledgePoint", back_populates="tag_links")
+    tag = relationship("Tag", back_populates="knowledge_point_links")
+    
+    __table_args__ = (
+        # 按标签查知识点（主键以知识点ID开头，只能按知识点查标签）
+        Index("ix_knowledge_point_tags_tag_kp", "tag_id", "knowledge_point_id"),
+    )
 
 
 class LearningContent(Base):
@@ -57,6 +92,11 @@ class LearningContent(Base):
     
     # 关系
     knowledge_point = relationship("KnowledgePoint", back_populates="learning_contents")
+    
+    __table_args__ = (
+        # 按知识点查询学习内容，按学习日期排序
+        Index("ix_learning_contents_kp_learning_date", "knowledge_point_id", "learning_date"),
+    )
 
 
 class ReviewRecord(Base):
@@ -83,6 +123,11 @@ class ReviewRecord(Base):
     
     # 关系
     knowledge_point = relationship("KnowledgePoint", back_populates="review_records")
+    
+    __table_args__ = (
+        # 知识点的复习历史，按复习时间倒序
+        Index("ix_review_records_kp_reviewed_at", "knowledge_point_id", "reviewed_at"),
+    )
 
 
 class KnowledgeRelation(Base):
@@ -91,7 +136,7 @@ class KnowledgeRelation(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     parent_id = Column(Integer, ForeignKey("knowledge_points.id"), nullable=False)
-    child_id = Column(Integer, ForeignKey("knowledge_points.id"), nullable=False)
+    child_id = Column(Integer, ForeignKey("knowledge_points.id"), nullable=False, index=True)
     
     # 关系类型：prerequisite(前置), related(相关), extends(扩展), applies_to(应用于)
     relation_type = Column(String(50), default="related")
@@ -113,4 +158,9 @@ class KnowledgeRelation(Base):
         foreign_keys=[child_id],
         back_populates="parent_relations"
     )
+    
+    __table_args__ = (
+        # 同一对知识点之间同一类型的关系只有一条，也用于按 parent_id 查询
+        Index("uq_knowledge_relations_edge", "parent_id", "child_id", "relation_type", unique=True),
+    )
 
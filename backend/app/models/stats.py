@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, String, Float, Date
+from ..db.database import Base
+
+
+class CategoryStats(Base):
+    """分类统计计数 - 由数据库触发器随知识点增删改同步维护"""
+    __tablename__ = "category_stats"
+    
+    category = Column(String(100), primary_key=True)  # 分类，未分类为空字符串
+    point_count = Column(Integer, nullable=False, default=0)  # 知识点数量
+    mastered_count = Column(Integer, nullable=False, default=0)  # 已掌握数量
+    ease_factor_sum = Column(Float, nullable=False, default=0.0)  # 难度因子之和，用于计算平均值
+
+
+class ReviewStats(Base):
+    """复习统计计数 - 只有一行（id=1），由数据库触发器随复习记录增删改同步维护"""
+    __tablename__ = "review_stats"
+    
+    id = Column(Integer, primary_key=True)
+    review_count = Column(Integer, nullable=False, default=0)  # 复习记录总数
+    quality_sum = Column(Integer, nullable=False, default=0)  # 复习质量之和，用于计算平均值
+
+
+class DailyLearningStats(Base):
+    """每日学习汇总 - 由数据库触发器随学习内容增删改同步维护"""
+    __tablename__ = "daily_learning_stats"
+    
+    day = Column(Date, primary_key=True)  # 学习日期（UTC）
+    item_count = Column(Integer, nullable=False, default=0)  # 学习内容数量
+
+
+class DailyReviewStats(Base):
+    """每日复习汇总 - 由数据库触发器随复习记录增删改同步维护"""
+    __tablename__ = "daily_review_stats"
+    
+    day = Column(Date, primary_key=True)  # 复习日期（UTC）
+    review_count = Column(Integer, nullable=False, default=0)  # 复习次数
+    quality_sum = Column(Integer, nullable=False, default=0)  # 复习质量之和
+    # 各质量评分（0-5）的复习次数
+    quality_0 = Column(Integer, nullable=False, default=0)
+    quality_1 = Column(Integer, nullable=False, default=0)
+    quality_2 = Column(Integer, nullable=False, default=0)
+    quality_3 = Column(Integer, nullable=False, default=0)
+    quality_4 = Column(Integer, nullable=False, default=0)
+    quality_5 = Column(Integer, nullable=False, default=0)
+    time_spent_seconds = Column(Integer, nullable=False, default=0)  # 复习花费时间之和（秒）
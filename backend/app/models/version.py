@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String
+from ..db.database import Base
+
+
+class DataVersion(Base):
+    """数据版本号 - 每张业务表一行，由数据库触发器在该表每次增删改时加一"""
+    __tablename__ = "data_versions"
+    
+    table_name = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -2,31 +2,70 @@ from .knowledge import (
     KnowledgePointCreate,
     KnowledgePointUpdate,
     KnowledgePointResponse,
+    KnowledgePointCompact,
+    KnowledgePointCreateResponse,
+    KNOWLEDGE_POINT_VIEWS,
+    KnowledgePointBatchDelete,
+    KnowledgePointBatchDeleteResponse,
+    TagCount,
+    KnowledgeSearchHit,
+    KnowledgeSearchResult,
+    SimilarKnowledgePoint,
     LearningContentCreate,
     LearningContentResponse,
+    LearningContentCompact,
+    LearningContentCreateResponse,
+    LEARNING_CONTENT_VIEWS,
     ReviewRecordCreate,
     ReviewRecordResponse,
+    ReviewBatchCreate,
+    ReviewBatchItemResult,
+    ReviewBatchResponse,
     KnowledgeRelationCreate,
     KnowledgeRelationResponse,
+    KnowledgeRelationBatchResponse,
     DailyReviewPlan,
+    DailyReviewPlanCompact,
     KnowledgeGraphNode,
     KnowledgeGraphEdge,
     KnowledgeGraph
 )
+from .job import AIJobResponse
+from .rows import response_columns, row_dicts
 
 __all__ = [
     "KnowledgePointCreate",
     "KnowledgePointUpdate",
     "KnowledgePointResponse",
+    "KnowledgePointCompact",
+    "KnowledgePointCreateResponse",
+    "KNOWLEDGE_POINT_VIEWS",
+    "KnowledgePointBatchDelete",
+    "KnowledgePointBatchDeleteResponse",
+    "TagCount",
+    "KnowledgeSearchHit",
+    "KnowledgeSearchResult",
+    "SimilarKnowledgePoint",
     "LearningContentCreate",
     "LearningContentResponse",
+    "LearningContentCompact",
+    "LearningContentCreateResponse",
+    "LEARNING_CONTENT_VIEWS",
     "ReviewRecordCreate",
     "ReviewRecordResponse",
+    "ReviewBatchCreate",
+    "ReviewBatchItemResult",
+    "ReviewBatchResponse",
     "KnowledgeRelationCreate",
     "KnowledgeRelationResponse",
+    "KnowledgeRelationBatchResponse",
     "DailyReviewPlan",
+    "DailyReviewPlanCompact",
     "KnowledgeGraphNode",
     "KnowledgeGraphEdge",
-    "KnowledgeGraph"
+    "KnowledgeGraph",
+    "AIJobResponse",
+    "response_columns",
+    "row_dicts"
 ]
 
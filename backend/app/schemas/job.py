@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, Any, Dict
+
+
+# 后台任务 Schemas
+class AIJobResponse(BaseModel):
+    id: int
+    job_type: str
+    status: str
+    progress: float
+    message: Optional[str]
+    attempts: int
+    max_attempts: int
+    payload: Dict[str, Any]
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
@@ -39,6 +39,68 @@ class KnowledgePointResponse(KnowledgePointBase):
         from_attributes = True
 
 
+class KnowledgePointCompact(BaseModel):
+    """列表精简视图：不含正文、摘要和调度参数"""
+    id: int
+    title: str
+    category: Optional[str] = None
+    tags: Optional[str] = None
+    repetitions: int
+    next_review_date: datetime
+    created_at: datetime
+    is_mastered: bool
+
+
+# 列表视图：full 为完整字段，compact 只查询列表页展示需要的列
+KNOWLEDGE_POINT_VIEWS = {"full": KnowledgePointResponse, "compact": KnowledgePointCompact}
+
+
+class KnowledgePointCreateResponse(KnowledgePointResponse):
+    job_id: Optional[int] = None  # 摘要生成任务ID
+
+
+class KnowledgePointBatchDelete(BaseModel):
+    """按ID列表或筛选条件（与列表接口相同）批量删除，二者选一"""
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=10000)
+    category: Optional[str] = None
+    tag: Optional[str] = None
+    tags: Optional[List[str]] = None
+    tag_match: str = Field("any", pattern="^(any|all)$")
+    is_mastered: Optional[bool] = None
+
+
+class KnowledgePointBatchDeleteResponse(BaseModel):
+    deleted_count: int
+    deleted_ids: List[int]
+
+
+class TagCount(BaseModel):
+    name: str
+    count: int  # 带有该标签的知识点数量
+
+
+# 搜索 Schemas
+class KnowledgeSearchHit(BaseModel):
+    id: int
+    title: str
+    category: Optional[str] = None
+    tags: Optional[str] = None
+    snippet: str  # 匹配片段，命中词用 <mark></mark> 标出
+    rank: float  # BM25 相关度，越小越相关
+
+
+class KnowledgeSearchResult(BaseModel):
+    items: List[KnowledgeSearchHit]
+    next_cursor: Optional[str] = None  # 下一页游标，为空表示没有更多结果
+
+
+class SimilarKnowledgePoint(BaseModel):
+    id: int
+    title: str
+    category: Optional[str] = None
+    score: float  # 余弦相似度 (0, 1]，越大越相似
+
+
 # 学习内容 Schemas
 class LearningContentBase(BaseModel):
     content: str = Field(..., min_length=1)
@@ -52,7 +114,7 @@ class LearningContentCreate(LearningContentBase):
 
 class LearningContentResponse(LearningContentBase):
     id: int
-    knowledge_point_id: int
+    knowledge_point_id: Optional[int]  # 知识点提取任务完成前为空
     learning_date: datetime
     created_at: datetime
     
@@ -60,6 +122,22 @@ class LearningContentResponse(LearningContentBase):
         from_attributes = True
 
 
+class LearningContentCompact(BaseModel):
+    """列表精简视图：不含正文和笔记"""
+    id: int
+    knowledge_point_id: Optional[int]
+    source: Optional[str] = None
+    learning_date: datetime
+    created_at: datetime
+
+
+LEARNING_CONTENT_VIEWS = {"full": LearningContentResponse, "compact": LearningContentCompact}
+
+
+class LearningContentCreateResponse(LearningContentResponse):
+    job_id: Optional[int] = None  # 知识点提取任务ID
+
+
 # 复习记录 Schemas
 class ReviewRecordCreate(BaseModel):
     knowledge_point_id: int
@@ -80,6 +158,24 @@ class ReviewRecordResponse(ReviewRecordCreate):
         from_attributes = True
 
 
+class ReviewBatchCreate(BaseModel):
+    reviews: List[ReviewRecordCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class ReviewBatchItemResult(BaseModel):
+    index: int  # 在请求中的位置
+    knowledge_point_id: int
+    success: bool
+    record: Optional[ReviewRecordResponse] = None
+    error: Optional[str] = None
+
+
+class ReviewBatchResponse(BaseModel):
+    created_count: int
+    failed_count: int
+    results: List[ReviewBatchItemResult]
+
+
 # 知识关系 Schemas
 class KnowledgeRelationCreate(BaseModel):
     parent_id: int
@@ -98,14 +194,27 @@ class KnowledgeRelationResponse(KnowledgeRelationCreate):
         from_attributes = True
 
 
+class KnowledgeRelationBatchResponse(BaseModel):
+    created_count: int
+    duplicate_count: int  # 请求内重复或已存在的关系
+    invalid_count: int  # 端点知识点不存在或首尾相同
+    relations: List[KnowledgeRelationResponse]  # 新建的关系，按请求中的顺序
+
+
 # 每日复习计划
 class DailyReviewPlan(BaseModel):
     date: datetime
     total_reviews: int
-    reviews_by_priority: dict[str, List[KnowledgePointResponse]]  # high, medium, low
+    counts_by_priority: dict[str, int]  # high, medium, low
+    estimated_time_by_priority: dict[str, int]
+    reviews_by_priority: dict[str, List[KnowledgePointResponse]]  # 每个优先级的第一页
     estimated_time_minutes: int
 
 
+class DailyReviewPlanCompact(DailyReviewPlan):
+    reviews_by_priority: dict[str, List[KnowledgePointCompact]]
+
+
 # 知识图谱相关
 class KnowledgeGraphNode(BaseModel):
     id: int
@@ -126,4 +235,5 @@ class KnowledgeGraphEdge(BaseModel):
 class KnowledgeGraph(BaseModel):
     nodes: List[KnowledgeGraphNode]
     edges: List[KnowledgeGraphEdge]
+    truncated: bool = False  # 是否因节点/边数量上限被截断
 
@@ -0,0 +1,22 @@
+"""
+响应行 - 直接从查询列构建响应字典
+
+列表接口按响应模型的字段顺序只查询需要的列，每行转为字典后直接编码为 JSON，
+不构建 ORM 对象，也不经过 Pydantic 逐行校验。字段与响应模型一一对应，
+OpenAPI 文档仍使用路由的 response_model。
+"""
+from typing import Any, Dict, List, Type
+
+from pydantic import BaseModel
+from sqlalchemy.engine import Result
+
+
+def response_columns(model: Any, schema: Type[BaseModel]) -> List[Any]:
+    """响应模型各字段对应的 ORM 列（按字段顺序）"""
+    return [getattr(model, name).label(name) for name in schema.model_fields]
+
+
+def row_dicts(result: Result) -> List[Dict[str, Any]]:
+    """查询结果转为字典列表"""
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in result]
@@ -1,11 +1,27 @@
-from .spaced_repetition import SpacedRepetitionAlgorithm
+from .spaced_repetition import (
+    SpacedRepetitionAlgorithm,
+    Scheduler,
+    SM2Scheduler,
+    get_scheduler,
+    register_scheduler
+)
 from .openai_service import OpenAIService, openai_service
+from .job_queue import JobQueue, job_queue
 from .knowledge_service import KnowledgeService
+from .stats_service import StatsService
+from . import ai_jobs  # 注册后台任务处理函数
 
 __all__ = [
     "SpacedRepetitionAlgorithm",
+    "Scheduler",
+    "SM2Scheduler",
+    "get_scheduler",
+    "register_scheduler",
     "OpenAIService",
     "openai_service",
-    "KnowledgeService"
+    "JobQueue",
+    "job_queue",
+    "KnowledgeService",
+    "StatsService"
 ]
 
@@ -0,0 +1,199 @@
+"""
+AI 富化任务 - 在后台任务队列中执行的摘要生成、知识提取和关系建议
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..models.knowledge import LearningContent
+from .job_queue import job_queue, JobType, JobContext
+from .knowledge_service import KnowledgeService
+from .openai_service import openai_service
+
+
+async def _load_point(db: AsyncSession, kp_id: int) -> Optional[Dict[str, Any]]:
+    kp = await KnowledgeService(db).get_knowledge_point(kp_id)
+    if not kp:
+        return None
+    return {"id": kp.id, "title": kp.title, "content": kp.content}
+
+
+async def _load_learning_content(db: AsyncSession, lc_id: int) -> Optional[str]:
+    lc = await db.get(LearningContent, lc_id)
+    return lc.content if lc else None
+
+
+async def _summarize_all(points: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """以有限并发为多个知识点生成摘要，单个失败时该摘要为空"""
+    semaphore = asyncio.Semaphore(settings.AI_SUMMARY_CONCURRENCY)
+
+    async def _summarize(point: Dict[str, Any]) -> Optional[str]:
+        async with semaphore:
+            try:
+                return await openai_service.generate_knowledge_summary(
+                    point["title"], point["content"], raise_errors=True
+                )
+            except Exception:
+                return None
+
+    return await asyncio.gather(*[_summarize(point) for point in points])
+
+
+@job_queue.register(JobType.GENERATE_SUMMARY)
+async def generate_summary(ctx: JobContext) -> Dict[str, Any]:
+    """生成并保存知识点摘要"""
+    kp_id = ctx.payload["knowledge_point_id"]
+    point = await ctx.run_db(_load_point, kp_id)
+    if point is None:
+        return {"knowledge_point_id": kp_id, "summary": None}
+
+    summary = await openai_service.generate_knowledge_summary(
+        point["title"], point["content"], raise_errors=True
+    )
+    await ctx.run_db(
+        lambda db: KnowledgeService(db).save_knowledge_summary(kp_id, summary)
+    )
+    return {"knowledge_point_id": kp_id, "summary": summary}
+
+
+@job_queue.register(JobType.EXTRACT_KNOWLEDGE)
+async def extract_knowledge(ctx: JobContext) -> Dict[str, Any]:
+    """从学习内容中提取全部知识点，并发生成摘要后一次性写入"""
+    lc_id = ctx.payload["learning_content_id"]
+    content = await ctx.run_db(_load_learning_content, lc_id)
+    if content is None:
+        return {"learning_content_id": lc_id, "knowledge_point_ids": []}
+
+    await ctx.set_progress(0.1, "正在提取知识点")
+    try:
+        extracted_points = await openai_service.extract_knowledge_points(content, raise_errors=True)
+    except Exception as e:
+        if not ctx.is_last_attempt:
+            raise
+        # 重试次数用尽时关联默认知识点，保证学习内容不会一直没有知识点
+        kp_id = await ctx.run_db(
+            lambda db: KnowledgeService(db).link_default_knowledge_point(lc_id)
+        )
+        return {
+            "learning_content_id": lc_id,
+            "knowledge_point_ids": [kp_id] if kp_id else [],
+            "fallback": True,
+            "error": str(e)
+        }
+    points = [
+        {
+            "title": point.get("title") or "未命名知识点",
+            "content": point.get("content") or content,
+            "category": point.get("category")
+        }
+        for point in extracted_points
+    ] or [{"title": KnowledgeService.default_knowledge_point_title(), "content": content}]
+
+    await ctx.set_progress(0.4, f"正在为 {len(points)} 个知识点生成摘要")
+    summaries = await _summarize_all(points)
+    for point, summary in zip(points, summaries):
+        point["summary"] = summary
+
+    await ctx.set_progress(0.9, "正在保存知识点")
+    kp_ids = await ctx.run_db(
+        lambda db: KnowledgeService(db).create_extracted_knowledge_points(lc_id, points)
+    )
+    return {"learning_content_id": lc_id, "knowledge_point_ids": kp_ids}
+
+
+async def _suggest_in_batches(
+    knowledge_point: Dict[str, Any],
+    candidates: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    候选知识点按 RELATION_BATCH_SIZE 分批并发调用 AI，合并各批建议
+
+    部分批次失败时忽略该批，全部失败时抛出第一个异常以便任务重试
+    """
+    semaphore = asyncio.Semaphore(settings.RELATION_BATCH_CONCURRENCY)
+    batch_size = settings.RELATION_BATCH_SIZE
+
+    async def _suggest(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        async with semaphore:
+            return await openai_service.suggest_knowledge_relations(
+                knowledge_point, batch, raise_errors=True
+            )
+
+    results = await asyncio.gather(
+        *[
+            _suggest(candidates[start:start + batch_size])
+            for start in range(0, len(candidates), batch_size)
+        ],
+        return_exceptions=True
+    )
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors and len(errors) == len(results):
+        raise errors[0]
+    return [
+        suggestion
+        for result in results
+        if not isinstance(result, BaseException)
+        for suggestion in result
+    ]
+
+
+def _merge_suggestions(
+    suggestions: List[Dict[str, Any]],
+    candidate_ids: List[int],
+    related_ids: Set[int],
+    max_suggestions: int
+) -> List[Dict[str, Any]]:
+    """
+    合并建议：只保留候选范围内且尚无关系的目标，同一目标取强度最高的一条，
+    按强度降序排列（强度相同时按本地相似度排名）
+    """
+    rank = {kp_id: i for i, kp_id in enumerate(candidate_ids)}
+    best: Dict[int, Dict[str, Any]] = {}
+    for suggestion in suggestions:
+        if not isinstance(suggestion, dict):
+            continue
+        try:
+            target_id = int(suggestion.get("target_id"))
+            strength = float(suggestion.get("strength") or 0)
+        except (TypeError, ValueError):
+            continue
+        if target_id not in rank or target_id in related_ids:
+            continue
+        suggestion = {**suggestion, "target_id": target_id, "strength": strength}
+        if target_id not in best or strength > best[target_id]["strength"]:
+            best[target_id] = suggestion
+
+    merged = sorted(best.values(), key=lambda s: (-s["strength"], rank[s["target_id"]]))
+    return merged[:max_suggestions]
+
+
+@job_queue.register(JobType.SUGGEST_RELATIONS)
+async def suggest_relations(ctx: JobContext) -> Dict[str, Any]:
+    """使用 AI 建议知识关系（候选按本地相似度预选，分批并发调用）"""
+    kp_id = ctx.payload["knowledge_point_id"]
+    max_suggestions = ctx.payload.get("max_suggestions", 5)
+
+    # 先等待相似度索引就绪再打开会话，构建期间不占用写连接池
+    await KnowledgeService.wait_similarity_index()
+    candidates = await ctx.run_db(
+        lambda db: KnowledgeService(db).get_relation_candidates(kp_id)
+    )
+    if not candidates or not candidates[1]:
+        return {"knowledge_point_id": kp_id, "suggestions": []}
+
+    knowledge_point, other_points = candidates
+    await ctx.set_progress(0.1, f"正在分析 {len(other_points)} 个候选知识点")
+    suggestions = await _suggest_in_batches(knowledge_point, other_points)
+
+    # AI 调用期间可能新增了关系，合并前重新读取
+    related_ids = await ctx.run_db(
+        lambda db: KnowledgeService(db).get_related_point_ids(kp_id)
+    )
+    suggestions = _merge_suggestions(
+        suggestions,
+        [point["id"] for point in other_points],
+        related_ids,
+        max_suggestions
+    )
+    return {"knowledge_point_id": kp_id, "suggestions": suggestions}
@@ -0,0 +1,424 @@
+"""
+知识图谱内存索引 - 基于 CSR（压缩稀疏行）的邻接表
+
+关系图以 NumPy 数组存储正向（parent -> child）和反向（child -> parent）邻接，
+每条边只占用目标节点、关系类型和强度几个字节。索引在首次查询时从数据库构建，
+之后新增关系写入增量缓冲区、删除的节点记为墓碑，积累到一定数量后合并重建，
+邻居、度数和遍历查询都直接在内存中完成。
+
+索引是进程级的：多进程部署时，每个进程只能感知自己写入的变更。
+"""
+import threading
+from logging import getLogger
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..models.knowledge import KnowledgeRelation
+
+
+logger = getLogger(__name__)
+
+
+class _CSR(NamedTuple):
+    """一个方向的压缩稀疏行邻接表"""
+    indptr: np.ndarray  # int64，行 i 的边位于 [indptr[i], indptr[i+1])
+    indices: np.ndarray  # int32，邻居节点ID
+    types: np.ndarray  # uint16，关系类型编码
+    strengths: np.ndarray  # float16，关系强度（0-1，读取时保留三位小数）
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self)
+
+
+def _build_csr(
+    src: np.ndarray,
+    dst: np.ndarray,
+    types: np.ndarray,
+    strengths: np.ndarray,
+    num_rows: int
+) -> _CSR:
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=num_rows), out=indptr[1:])
+    return _CSR(
+        indptr=indptr,
+        indices=dst[order].astype(np.int32),
+        types=types[order].astype(np.uint16),
+        strengths=strengths[order].astype(np.float16)
+    )
+
+
+def _build_both(src, dst, types, strengths) -> Tuple[_CSR, _CSR]:
+    """构建正向和反向两个 CSR"""
+    num_rows = int(max(src.max(initial=0), dst.max(initial=0))) + 1
+    return (
+        _build_csr(src, dst, types, strengths, num_rows),
+        _build_csr(dst, src, types, strengths, num_rows)
+    )
+
+
+def _encode_type(type_names: List[str], type_codes: Dict[str, int], relation_type: Optional[str]) -> int:
+    name = relation_type or "related"
+    code = type_codes.get(name)
+    if code is None:
+        code = len(type_names)
+        type_names.append(name)
+        type_codes[name] = code
+    return code
+
+
+def _empty_csr() -> _CSR:
+    return _CSR(
+        indptr=np.zeros(1, dtype=np.int64),
+        indices=np.zeros(0, dtype=np.int32),
+        types=np.zeros(0, dtype=np.uint16),
+        strengths=np.zeros(0, dtype=np.float16)
+    )
+
+
+# 邻居元组：(邻居ID, 关系类型, 强度)
+Neighbor = Tuple[int, str, float]
+
+
+class GraphIndex:
+    """知识关系图的进程级内存索引"""
+
+    # 增量缓冲区超过该边数时合并重建 CSR
+    COMPACT_THRESHOLD = 4096
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._generation = 0
+        self._reset()
+
+    def _reset(self):
+        self._loaded = False
+        self._generation += 1
+        self._forward = _empty_csr()
+        self._reverse = _empty_csr()
+        self._type_names: List[str] = []
+        self._type_codes: Dict[str, int] = {}
+
+        # 增量缓冲区和墓碑：墓碑只屏蔽 CSR 中的边，增量缓冲区中涉及被删节点的边直接移除，
+        # 因此节点ID被复用（SQLite 的自增ID会重用已删除的最大ID）后新增的边不受墓碑影响
+        self._delta_out: Dict[int, List[Tuple[int, int, float]]] = {}
+        self._delta_in: Dict[int, List[Tuple[int, int, float]]] = {}
+        self._delta_count = 0
+        self._removed: Set[int] = set()
+
+        # 构建期间收到的变更，构建完成后按顺序重放
+        self._journal: Optional[List[Tuple[Callable, Any]]] = None
+
+    # ========== 构建与维护 ==========
+
+    def ensure_loaded(self, db: Session):
+        """
+        首次使用时从数据库构建索引
+
+        读取数据库和构建 CSR 期间不持有查询锁，应在工作线程中调用；
+        期间提交的新增和删除记入日志，构建完成后重放（新增的边按节点对和类型去重）。
+        """
+        if self._loaded:
+            return
+        with self._build_lock:
+            if self._loaded:
+                return
+            with self._lock:
+                generation = self._generation
+                self._journal = []
+
+            try:
+                rows = db.query(
+                    KnowledgeRelation.parent_id,
+                    KnowledgeRelation.child_id,
+                    KnowledgeRelation.relation_type,
+                    KnowledgeRelation.strength
+                ).all()
+
+                type_names: List[str] = []
+                type_codes: Dict[str, int] = {}
+                src = np.fromiter((row.parent_id for row in rows), dtype=np.int64, count=len(rows))
+                dst = np.fromiter((row.child_id for row in rows), dtype=np.int64, count=len(rows))
+                types = np.fromiter(
+                    (_encode_type(type_names, type_codes, row.relation_type) for row in rows),
+                    dtype=np.uint16,
+                    count=len(rows)
+                )
+                strengths = np.fromiter(
+                    (row.strength if row.strength is not None else 1.0 for row in rows),
+                    dtype=np.float32,
+                    count=len(rows)
+                )
+                forward, reverse = _build_both(src, dst, types, strengths)
+            except BaseException:
+                with self._lock:
+                    if self._generation == generation:
+                        self._journal = None
+                raise
+
+            with self._lock:
+                if self._generation != generation:
+                    # 构建期间索引被作废，下次查询时重新构建
+                    return
+                self._type_names, self._type_codes = type_names, type_codes
+                self._forward, self._reverse = forward, reverse
+                journal, self._journal = self._journal, None
+                self._loaded = True
+                for apply, args in journal:
+                    apply(args)
+            logger.info(f"知识图谱索引已构建: {len(rows)} 条边, {self.nbytes} 字节")
+
+    def invalidate(self):
+        """丢弃索引，下次查询时重新构建"""
+        with self._lock:
+            self._reset()
+
+    def add_edges(self, relations: Iterable[KnowledgeRelation]):
+        """记录新提交的关系（索引未构建时忽略，构建时会从数据库读取）"""
+        edges = [
+            (
+                relation.parent_id,
+                relation.child_id,
+                relation.relation_type,
+                relation.strength if relation.strength is not None else 1.0
+            )
+            for relation in relations
+        ]
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((self._add_edges, edges))
+            elif self._loaded:
+                self._add_edges(edges)
+
+    def remove_nodes(self, node_ids: Iterable[int]):
+        """删除节点及其所有关系"""
+        node_ids = set(node_ids)
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((self._remove_nodes, node_ids))
+            elif self._loaded:
+                self._remove_nodes(node_ids)
+
+    def _add_edges(self, edges: List[Tuple[int, int, Optional[str], float]]):
+        for parent_id, child_id, relation_type, strength in edges:
+            edge_type = self._encode_type(relation_type)
+            if self._has_edge(parent_id, child_id, edge_type):
+                continue
+            self._delta_out.setdefault(parent_id, []).append((child_id, edge_type, strength))
+            self._delta_in.setdefault(child_id, []).append((parent_id, edge_type, strength))
+            self._delta_count += 1
+
+        if self._delta_count > self.COMPACT_THRESHOLD:
+            self._compact()
+
+    def _remove_nodes(self, node_ids: Set[int]):
+        self._removed.update(node_ids)
+        if self._delta_count:
+            for delta in (self._delta_out, self._delta_in):
+                for node_id in list(delta):
+                    if node_id in node_ids:
+                        del delta[node_id]
+                        continue
+                    edges = [edge for edge in delta[node_id] if edge[0] not in node_ids]
+                    if edges:
+                        delta[node_id] = edges
+                    else:
+                        del delta[node_id]
+            self._delta_count = sum(len(edges) for edges in self._delta_out.values())
+
+        if len(self._removed) > self.COMPACT_THRESHOLD:
+            self._compact()
+
+    def _has_edge(self, parent_id: int, child_id: int, edge_type: int) -> bool:
+        """索引中是否已有这条边（数据库唯一索引保证同一对节点间同一类型的边至多一条）"""
+        if any(
+            neighbor == child_id and code == edge_type
+            for neighbor, code, _ in self._delta_out.get(parent_id, ())
+        ):
+            return True
+        if parent_id in self._removed or child_id in self._removed:
+            return False
+        indices, types, _ = self._row(self._forward, parent_id)
+        return bool(np.any((indices == child_id) & (types == edge_type)))
+
+    def _encode_type(self, relation_type: Optional[str]) -> int:
+        return _encode_type(self._type_names, self._type_codes, relation_type)
+
+    def _rebuild(self, src, dst, types, strengths):
+        self._forward, self._reverse = _build_both(src, dst, types, strengths)
+        self._delta_out = {}
+        self._delta_in = {}
+        self._delta_count = 0
+        self._removed = set()
+
+    def _compact(self):
+        """把墓碑和增量缓冲区合并进 CSR"""
+        forward = self._forward
+        src = np.repeat(
+            np.arange(len(forward.indptr) - 1, dtype=np.int64),
+            np.diff(forward.indptr)
+        )
+        dst = forward.indices.astype(np.int64)
+        types = forward.types
+        strengths = forward.strengths
+
+        # 先按墓碑过滤 CSR 中的边，增量缓冲区中的边都是有效的
+        if self._removed:
+            removed = np.fromiter(self._removed, dtype=np.int64)
+            keep = ~(np.isin(src, removed) | np.isin(dst, removed))
+            src, dst, types, strengths = src[keep], dst[keep], types[keep], strengths[keep]
+
+        if self._delta_count:
+            delta = [
+                (parent_id, child_id, edge_type, strength)
+                for parent_id, edges in self._delta_out.items()
+                for child_id, edge_type, strength in edges
+            ]
+            src = np.concatenate([src, np.array([e[0] for e in delta], dtype=np.int64)])
+            dst = np.concatenate([dst, np.array([e[1] for e in delta], dtype=np.int64)])
+            types = np.concatenate([types, np.array([e[2] for e in delta], dtype=np.uint16)])
+            strengths = np.concatenate(
+                [strengths, np.array([e[3] for e in delta], dtype=np.float16)]
+            )
+
+        self._rebuild(src, dst, types, strengths)
+
+    # ========== 查询 ==========
+
+    def _row(self, csr: _CSR, node_id: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if node_id < 0 or node_id >= len(csr.indptr) - 1:
+            return csr.indices[:0], csr.types[:0], csr.strengths[:0]
+        start, end = csr.indptr[node_id], csr.indptr[node_id + 1]
+        return csr.indices[start:end], csr.types[start:end], csr.strengths[start:end]
+
+    def _neighbors(self, node_id: int, direction: str) -> List[Tuple[int, int, float]]:
+        result = []
+        sources = []
+        if direction in ("out", "both"):
+            sources.append((self._forward, self._delta_out))
+        if direction in ("in", "both"):
+            sources.append((self._reverse, self._delta_in))
+
+        for csr, delta in sources:
+            if node_id not in self._removed:
+                indices, types, strengths = self._row(csr, node_id)
+                edges = zip(indices.tolist(), types.tolist(), strengths.tolist())
+                if self._removed:
+                    edges = [edge for edge in edges if edge[0] not in self._removed]
+                result.extend(edges)
+            result.extend(delta.get(node_id, ()))
+        return result
+
+    def neighbors(self, node_id: int, direction: str = "both") -> List[Neighbor]:
+        """
+        查询邻居
+
+        Args:
+            node_id: 节点ID
+            direction: out（子节点）, in（父节点）, both（双向）
+
+        Returns:
+            [(邻居ID, 关系类型, 强度), ...]
+        """
+        with self._lock:
+            return [
+                (neighbor, self._type_names[edge_type], round(float(strength), 3))
+                for neighbor, edge_type, strength in self._neighbors(node_id, direction)
+            ]
+
+    def degree(self, node_id: int) -> Dict[str, int]:
+        """查询出度和入度"""
+        with self._lock:
+            out_degree = len(self._neighbors(node_id, "out"))
+            in_degree = len(self._neighbors(node_id, "in"))
+        return {"out_degree": out_degree, "in_degree": in_degree}
+
+    def traverse(
+        self,
+        center_id: int,
+        depth: int,
+        max_nodes: int
+    ) -> Tuple[List[int], bool]:
+        """
+        按无向边广度优先遍历 depth 跳以内的节点
+
+        每一层内按节点ID排序，截断时优先保留离中心近的节点。
+
+        Returns:
+            (节点ID列表, 是否因 max_nodes 被截断)
+        """
+        with self._lock:
+            visited = {center_id}
+            order = [center_id]
+            frontier = [center_id]
+            for _ in range(depth):
+                discovered = set()
+                for node_id in frontier:
+                    for neighbor, _, _ in self._neighbors(node_id, "both"):
+                        if neighbor not in visited:
+                            discovered.add(neighbor)
+                if not discovered:
+                    break
+
+                frontier = sorted(discovered)
+                visited.update(frontier)
+                order.extend(frontier)
+                if len(order) > max_nodes:
+                    return order[:max_nodes], True
+
+            return order, False
+
+    def subgraph_edges(
+        self,
+        node_ids: List[int],
+        max_edges: int
+    ) -> Tuple[List[Dict], bool]:
+        """
+        查询节点集合内部的边
+
+        Returns:
+            (边列表, 是否因 max_edges 被截断)
+        """
+        members = set(node_ids)
+        edges = []
+        with self._lock:
+            for parent_id in node_ids:
+                for child_id, edge_type, strength in self._neighbors(parent_id, "out"):
+                    if child_id not in members:
+                        continue
+                    if len(edges) >= max_edges:
+                        return edges, True
+                    edges.append({
+                        "source": parent_id,
+                        "target": child_id,
+                        "relation_type": self._type_names[edge_type],
+                        "strength": round(float(strength), 3)
+                    })
+        return edges, False
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def nbytes(self) -> int:
+        return self._forward.nbytes + self._reverse.nbytes
+
+    def stats(self) -> Dict[str, int]:
+        """索引规模与内存占用"""
+        with self._lock:
+            return {
+                "loaded": self._loaded,
+                "edges": len(self._forward.indices) + self._delta_count,
+                "pending_edges": self._delta_count,
+                "removed_nodes": len(self._removed),
+                "nbytes": self.nbytes
+            }
+
+
+# 创建全局实例
+graph_index = GraphIndex()
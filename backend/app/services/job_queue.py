@@ -0,0 +1,311 @@
+"""
+后台任务队列 - 持久化的 AI 富化任务与本地工作协程池
+
+任务写入 ai_jobs 表后立即返回任务ID，由应用进程内的工作协程领取执行。
+LLM 调用和数据库读写都在事件循环中异步等待，
+失败的任务按指数退避重试，进程重启后未完成的任务会重新排队。
+"""
+import asyncio
+from datetime import datetime, timedelta
+from logging import getLogger
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import event, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..db.database import AsyncSessionLocal
+from ..models.job import AIJob
+
+
+logger = getLogger(__name__)
+
+
+class JobType:
+    """任务类型"""
+    GENERATE_SUMMARY = "generate_summary"  # 生成知识点摘要
+    EXTRACT_KNOWLEDGE = "extract_knowledge"  # 从学习内容中提取知识点
+    SUGGEST_RELATIONS = "suggest_relations"  # 建议知识关系
+
+
+class JobStatus:
+    """任务状态"""
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    ACTIVE = (PENDING, RUNNING)
+
+
+async def run_in_session(fn: Callable[..., Awaitable[Any]], *args) -> Any:
+    """打开独立的异步会话执行 await fn(db, *args)"""
+    async with AsyncSessionLocal() as db:
+        return await fn(db, *args)
+
+
+class JobContext:
+    """传递给任务处理函数的上下文"""
+
+    def __init__(self, job_id: int, payload: Dict[str, Any], attempt: int = 1, max_attempts: int = 1):
+        self.job_id = job_id
+        self.payload = payload
+        self.attempt = attempt  # 本次是第几次尝试（从 1 开始）
+        self.max_attempts = max_attempts
+
+    @property
+    def is_last_attempt(self) -> bool:
+        """本次失败后不会再重试"""
+        return self.attempt >= self.max_attempts
+
+    async def run_db(self, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        """在独立会话中执行 fn(db, *args)"""
+        return await run_in_session(fn, *args)
+
+    async def set_progress(self, progress: float, message: Optional[str] = None):
+        """更新任务进度（0-1）"""
+        async def _update(db: AsyncSession):
+            await db.execute(
+                update(AIJob)
+                .where(AIJob.id == self.job_id)
+                .values(progress=progress, message=message, updated_at=datetime.utcnow())
+            )
+            await db.commit()
+
+        await self.run_db(_update)
+
+
+JobHandler = Callable[[JobContext], Awaitable[Optional[Dict[str, Any]]]]
+
+
+class JobQueue:
+    """持久化任务队列"""
+
+    def __init__(self, concurrency: int, poll_interval: float):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._handlers: Dict[str, JobHandler] = {}
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def register(self, job_type: str) -> Callable[[JobHandler], JobHandler]:
+        """注册任务处理函数的装饰器"""
+        def decorator(handler: JobHandler) -> JobHandler:
+            self._handlers[job_type] = handler
+            return handler
+        return decorator
+
+    # ========== 入队 ==========
+
+    async def enqueue(
+        self,
+        db: AsyncSession,
+        job_type: str,
+        payload: Dict[str, Any],
+        dedup_key: Optional[str] = None,
+        max_attempts: Optional[int] = None,
+        commit: bool = True
+    ) -> AIJob:
+        """
+        提交任务
+
+        如果存在相同去重键的活动任务，直接返回该任务而不重复创建。
+
+        Args:
+            db: 数据库会话
+            job_type: 任务类型
+            payload: 任务参数（需可 JSON 序列化）
+            dedup_key: 去重键
+            max_attempts: 最大尝试次数，默认取配置
+            commit: 是否立即提交；为 False 时任务只写入当前事务，与调用方的记录一起提交，
+                提交后再唤醒工作协程（进程在两次提交之间崩溃也不会留下没有任务的记录）
+
+        Returns:
+            任务对象
+        """
+        if dedup_key:
+            existing = await self._find_active(db, dedup_key)
+            if existing:
+                return existing
+
+        job = AIJob(
+            job_type=job_type,
+            payload=payload,
+            dedup_key=dedup_key,
+            max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS
+        )
+        db.add(job)
+        if not commit:
+            await db.flush()  # 分配任务ID
+            event.listen(db.sync_session, "after_commit", lambda session: self._notify(), once=True)
+            return job
+
+        try:
+            await db.commit()
+        except IntegrityError:
+            # 并发提交了相同去重键的任务
+            await db.rollback()
+            existing = await self._find_active(db, dedup_key)
+            if existing:
+                return existing
+            raise
+
+        self._notify()
+        return job
+
+    @staticmethod
+    async def _find_active(db: AsyncSession, dedup_key: str) -> Optional[AIJob]:
+        return await db.scalar(
+            select(AIJob).where(
+                AIJob.dedup_key == dedup_key,
+                AIJob.status.in_(JobStatus.ACTIVE)
+            ).limit(1)
+        )
+
+    def _notify(self):
+        """唤醒空闲的工作协程（可在任意线程调用）"""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # ========== 生命周期 ==========
+
+    async def start(self):
+        """启动工作协程，并把上次中断的任务重新排队"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+
+        async def _requeue_interrupted(db: AsyncSession):
+            await db.execute(
+                update(AIJob)
+                .where(AIJob.status == JobStatus.RUNNING)
+                .values(status=JobStatus.PENDING, updated_at=datetime.utcnow())
+            )
+            await db.commit()
+
+        await run_in_session(_requeue_interrupted)
+
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+
+    async def stop(self):
+        """停止工作协程，执行中的任务会在下次启动时重新排队"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._loop = None
+        self._wakeup = None
+
+    # ========== 执行 ==========
+
+    async def _worker(self):
+        while True:
+            self._wakeup.clear()
+            claimed = await run_in_session(self._claim)
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._execute(*claimed)
+
+    async def _claim(self, db: AsyncSession) -> Optional[tuple]:
+        """领取一个到期的等待任务，返回 (id, 类型, 参数, 本次尝试序号, 最大尝试次数)"""
+        now = datetime.utcnow()
+        candidates = (await db.execute(
+            select(
+                AIJob.id, AIJob.job_type, AIJob.payload, AIJob.attempts, AIJob.max_attempts
+            ).where(
+                AIJob.status == JobStatus.PENDING,
+                AIJob.run_after <= now
+            ).order_by(AIJob.run_after.asc()).limit(self.concurrency)
+        )).all()
+
+        for job_id, job_type, payload, attempts, max_attempts in candidates:
+            # 条件更新保证同一任务只被一个工作者领取
+            claimed = (await db.execute(
+                update(AIJob)
+                .where(AIJob.id == job_id, AIJob.status == JobStatus.PENDING)
+                .values(
+                    status=JobStatus.RUNNING,
+                    attempts=AIJob.attempts + 1,
+                    updated_at=now
+                )
+            )).rowcount
+            await db.commit()
+            if claimed:
+                return job_id, job_type, payload, attempts + 1, max_attempts
+        return None
+
+    async def _execute(
+        self,
+        job_id: int,
+        job_type: str,
+        payload: Dict[str, Any],
+        attempt: int,
+        max_attempts: int
+    ):
+        handler = self._handlers.get(job_type)
+        context = JobContext(job_id, payload, attempt, max_attempts)
+
+        try:
+            if handler is None:
+                raise ValueError(f"未知的任务类型: {job_type}")
+            result = await handler(context)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"任务 {job_id} ({job_type}) 执行失败: {e}")
+            await context.run_db(self._mark_failed, job_id, str(e))
+            return
+
+        await context.run_db(self._mark_succeeded, job_id, result)
+
+    @staticmethod
+    async def _mark_succeeded(db: AsyncSession, job_id: int, result: Optional[Dict[str, Any]]):
+        now = datetime.utcnow()
+        await db.execute(
+            update(AIJob)
+            .where(AIJob.id == job_id)
+            .values(
+                status=JobStatus.SUCCEEDED,
+                progress=1.0,
+                result=result,
+                error=None,
+                updated_at=now,
+                finished_at=now
+            )
+        )
+        await db.commit()
+
+    @staticmethod
+    async def _mark_failed(db: AsyncSession, job_id: int, error: str):
+        job = await db.get(AIJob, job_id)
+        if not job:
+            return
+
+        now = datetime.utcnow()
+        job.error = error
+        job.updated_at = now
+        if job.attempts < job.max_attempts:
+            # 指数退避后重新排队
+            backoff = settings.JOB_RETRY_BACKOFF_SECONDS * (2 ** (job.attempts - 1))
+            job.status = JobStatus.PENDING
+            job.run_after = now + timedelta(seconds=backoff)
+        else:
+            job.status = JobStatus.FAILED
+            job.finished_at = now
+        await db.commit()
+
+
+# 创建全局实例
+job_queue = JobQueue(
+    concurrency=settings.JOB_WORKER_CONCURRENCY,
+    poll_interval=settings.JOB_POLL_INTERVAL_SECONDS
+)
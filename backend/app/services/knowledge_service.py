@@ -1,12 +1,17 @@
 """
 知识服务 - 处理知识点的CRUD和业务逻辑
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, delete, func, insert, or_, select, text, update
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterator, List, Optional, Dict, Set, Tuple
+import asyncio
+import re
 from ..models.knowledge import (
     KnowledgePoint, 
+    Tag,
+    KnowledgePointTag,
     LearningContent, 
     ReviewRecord,
     KnowledgeRelation
@@ -14,142 +19,507 @@ from ..models.knowledge import (
 from ..schemas.knowledge import (
     KnowledgePointCreate,
     KnowledgePointUpdate,
+    KNOWLEDGE_POINT_VIEWS,
     LearningContentCreate,
     ReviewRecordCreate,
-    KnowledgeRelationCreate
+    KnowledgeRelationCreate,
+    KnowledgeRelationResponse
 )
-from .spaced_repetition import SpacedRepetitionAlgorithm
+from ..schemas.rows import response_columns, row_dicts
+from ..db.pagination import after_cursor, decode_cursor, encode_cursor
+from .spaced_repetition import PRIORITY_LEVELS, SpacedRepetitionAlgorithm, get_scheduler
 from .openai_service import openai_service
+from .job_queue import job_queue, JobType
+from .graph_index import graph_index
+from .similarity_index import similarity_index
+from ..models.job import AIJob
+from ..core.config import settings
+from ..db.database import SessionLocal, run_in_session
+
+
+# 标签分隔符（兼容中文逗号）
+_TAG_SEPARATORS = re.compile(r"[,，]")
+_TAG_MAX_LENGTH = 100
+
+# 全文检索：trigram 分词器只能匹配至少 3 个字符的子串
+SEARCH_MIN_TERM_LENGTH = 3
+_SEARCH_SNIPPET_TOKENS = 32
+_SEARCH_HIGHLIGHT = ("<mark>", "</mark>")
+
+# 批量操作中每条 IN 语句携带的ID数，关系表按两列匹配时参数数为其两倍，需低于 SQLite 的参数上限
+_IN_CHUNK_SIZE = 5000
+
+
+def _chunks(items: List[Any], size: int) -> Iterator[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _substring_snippet(columns: List[str], terms: List[str]) -> str:
+    """在第一个包含搜索词的列中截取命中位置附近的片段，并用 <mark></mark> 标出各词"""
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+    for value in columns:
+        match = pattern.search(value)
+        if match:
+            break
+    else:
+        value, match = columns[0], None
+    
+    # 与全文检索的 snippet() 相近：以命中位置为中心取约 _SEARCH_SNIPPET_TOKENS 个字符
+    start = max(0, match.start() - _SEARCH_SNIPPET_TOKENS // 2) if match else 0
+    end = min(len(value), start + _SEARCH_SNIPPET_TOKENS)
+    snippet = pattern.sub(
+        lambda m: f"{_SEARCH_HIGHLIGHT[0]}{m.group(0)}{_SEARCH_HIGHLIGHT[1]}",
+        value[start:end]
+    )
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(value) else "")
 
 
 class KnowledgeService:
     """知识点服务"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.sr_algorithm = SpacedRepetitionAlgorithm()
+        self.scheduler = get_scheduler()
     
     # ========== 知识点 CRUD ==========
     
-    def create_knowledge_point(
+    async def create_knowledge_point(
         self, 
         data: KnowledgePointCreate,
         generate_summary: bool = True
     ) -> KnowledgePoint:
         """创建知识点"""
+        kp = await self._add_knowledge_point(data, generate_summary)
+        await self.db.commit()
+        await asyncio.to_thread(
+            similarity_index.upsert, kp.id, kp.title, kp.content, kp.summary, is_new=True
+        )
+        return kp
+    
+    async def _add_knowledge_point(
+        self,
+        data: KnowledgePointCreate,
+        generate_summary: bool = True
+    ) -> KnowledgePoint:
+        """
+        在当前事务中写入知识点（不提交）
+        
+        摘要交给后台任务生成，任务与知识点在同一事务中提交，请求立即返回任务ID
+        """
         kp = KnowledgePoint(
             title=data.title,
             content=data.content,
-            category=data.category,
-            tags=data.tags
+            category=data.category
         )
         
         self.db.add(kp)
-        self.db.commit()
-        self.db.refresh(kp)
+        await self.db.flush()  # 分配知识点ID
+        await self._set_tags(kp, data.tags)
         
-        # 异步生成摘要（如果启用）
+        kp.job_id = None
         if generate_summary and openai_service.is_available():
-            import asyncio
-            summary = asyncio.run(
-                openai_service.generate_knowledge_summary(kp.title, kp.content)
+            job = await job_queue.enqueue(
+                self.db,
+                JobType.GENERATE_SUMMARY,
+                {"knowledge_point_id": kp.id},
+                dedup_key=f"{JobType.GENERATE_SUMMARY}:{kp.id}",
+                commit=False
             )
-            kp.summary = summary
-            self.db.commit()
-            self.db.refresh(kp)
+            kp.job_id = job.id
         
         return kp
     
-    def get_knowledge_point(self, kp_id: int) -> Optional[KnowledgePoint]:
+    async def get_knowledge_point(self, kp_id: int) -> Optional[KnowledgePoint]:
         """获取知识点"""
-        return self.db.query(KnowledgePoint).filter(KnowledgePoint.id == kp_id).first()
+        return await self.db.get(KnowledgePoint, kp_id)
+    
+    async def save_knowledge_summary(self, kp_id: int, summary: str) -> Optional[KnowledgePoint]:
+        """保存生成的摘要"""
+        kp = await self.get_knowledge_point(kp_id)
+        if not kp:
+            return None
+        
+        kp.summary = summary
+        kp.updated_at = datetime.utcnow()
+        await self.db.commit()
+        await asyncio.to_thread(
+            similarity_index.upsert, kp.id, kp.title, kp.content, kp.summary
+        )
+        return kp
     
-    def list_knowledge_points(
+    async def list_knowledge_points(
         self,
         category: Optional[str] = None,
         tag: Optional[str] = None,
         is_mastered: Optional[bool] = None,
         skip: int = 0,
-        limit: int = 100
-    ) -> List[KnowledgePoint]:
-        """列出知识点"""
-        query = self.db.query(KnowledgePoint)
+        limit: int = 100,
+        tags: Optional[List[str]] = None,
+        tag_match: str = "any",
+        cursor: Optional[str] = None,
+        view: str = "full"
+    ) -> List[Dict[str, Any]]:
+        """
+        列出知识点，直接返回对应视图形状的响应行
+        
+        按 (创建时间, ID) 倒序；传入游标时从游标位置之后取，忽略 skip
+        
+        Args:
+            tag: 按单个标签筛选（精确匹配）
+            tags: 按多个标签筛选，与 tag 合并
+            tag_match: any（包含任一标签）或 all（包含全部标签）
+            cursor: 上一页最后一行的 (created_at, id) 游标
+            view: full（KnowledgePointResponse）或 compact（KnowledgePointCompact，不查询正文和摘要）
+        
+        Raises:
+            ValueError: 游标无效
+        """
+        query = select(*response_columns(KnowledgePoint, KNOWLEDGE_POINT_VIEWS[view])).where(
+            *self._point_filters(category, tag, tags, tag_match, is_mastered)
+        )
+        
+        if cursor:
+            query = query.where(after_cursor(
+                (KnowledgePoint.created_at, KnowledgePoint.id),
+                decode_cursor(cursor, datetime, int)
+            ))
+        else:
+            query = query.offset(skip)
         
+        query = query.order_by(
+            KnowledgePoint.created_at.desc(), KnowledgePoint.id.desc()
+        ).limit(limit)
+        return row_dicts(await self.db.execute(query))
+    
+    def _point_filters(
+        self,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        tag_match: str = "any",
+        is_mastered: Optional[bool] = None
+    ) -> List[Any]:
+        """列表和批量删除共用的筛选条件"""
+        conditions = []
         if category:
-            query = query.filter(KnowledgePoint.category == category)
-        if tag:
-            query = query.filter(KnowledgePoint.tags.contains(tag))
+            conditions.append(KnowledgePoint.category == category)
+        tag_names = self.parse_tags(",".join([tag or "", *(tags or [])]))
+        if tag_names:
+            conditions.append(
+                KnowledgePoint.id.in_(self._tagged_point_ids(tag_names, tag_match))
+            )
         if is_mastered is not None:
-            query = query.filter(KnowledgePoint.is_mastered == is_mastered)
-        
-        return query.order_by(KnowledgePoint.created_at.desc()).offset(skip).limit(limit).all()
+            conditions.append(KnowledgePoint.is_mastered == is_mastered)
+        return conditions
     
-    def update_knowledge_point(
+    async def update_knowledge_point(
         self, 
         kp_id: int, 
         data: KnowledgePointUpdate
     ) -> Optional[KnowledgePoint]:
         """更新知识点"""
-        kp = self.get_knowledge_point(kp_id)
+        kp = await self.get_knowledge_point(kp_id)
         if not kp:
             return None
         
         update_data = data.model_dump(exclude_unset=True)
+        if "tags" in update_data:
+            await self._set_tags(kp, update_data.pop("tags"))
         for field, value in update_data.items():
             setattr(kp, field, value)
         
         kp.updated_at = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(kp)
+        await self.db.commit()
+        if update_data.keys() & {"title", "content", "summary"}:
+            await asyncio.to_thread(
+                similarity_index.upsert, kp.id, kp.title, kp.content, kp.summary
+            )
         
         return kp
     
-    def delete_knowledge_point(self, kp_id: int) -> bool:
-        """删除知识点"""
-        kp = self.get_knowledge_point(kp_id)
-        if not kp:
-            return False
+    async def delete_knowledge_point(self, kp_id: int) -> bool:
+        """删除知识点及其标签关联、复习记录和关系"""
+        return bool(await self.delete_knowledge_points([kp_id]))
+    
+    async def delete_knowledge_points_where(
+        self,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        tag_match: str = "any",
+        is_mastered: Optional[bool] = None
+    ) -> List[int]:
+        """按筛选条件批量删除知识点，条件与 list_knowledge_points 相同，返回删除的ID"""
+        conditions = self._point_filters(category, tag, tags, tag_match, is_mastered)
+        if not conditions:
+            raise ValueError("批量删除至少需要一个筛选条件")
+        kp_ids = await self.db.scalars(select(KnowledgePoint.id).where(*conditions))
+        return await self._delete_points(list(kp_ids))
+    
+    async def delete_knowledge_points(self, kp_ids: List[int]) -> List[int]:
+        """批量删除知识点，忽略不存在的ID，返回实际删除的ID"""
+        existing = []
+        for chunk in _chunks(list(dict.fromkeys(kp_ids)), _IN_CHUNK_SIZE):
+            existing += await self.db.scalars(
+                select(KnowledgePoint.id).where(KnowledgePoint.id.in_(chunk))
+            )
+        return await self._delete_points(existing)
+    
+    async def _delete_points(self, kp_ids: List[int]) -> List[int]:
+        """
+        删除已确认存在的知识点
+        
+        用集合操作一次删除每张子表中的关联行（标签关联、复习记录、两个方向的关系），
+        不加载任何 ORM 对象；学习内容保留，只解除与知识点的关联（一段学习内容可能提取出多个知识点）。
+        计数表、每日汇总和全文索引由触发器同步更新。
+        """
+        for chunk in _chunks(kp_ids, _IN_CHUNK_SIZE):
+            for statement in (
+                delete(KnowledgePointTag).where(KnowledgePointTag.knowledge_point_id.in_(chunk)),
+                delete(ReviewRecord).where(ReviewRecord.knowledge_point_id.in_(chunk)),
+                delete(KnowledgeRelation).where(or_(
+                    KnowledgeRelation.parent_id.in_(chunk),
+                    KnowledgeRelation.child_id.in_(chunk)
+                )),
+                update(LearningContent).where(
+                    LearningContent.knowledge_point_id.in_(chunk)
+                ).values(knowledge_point_id=None),
+                delete(KnowledgePoint).where(KnowledgePoint.id.in_(chunk)),
+            ):
+                await self.db.execute(statement.execution_options(synchronize_session=False))
+        await self.db.commit()
+        
+        if kp_ids:
+            # 图谱索引的墓碑只屏蔽删除前的关系，ID 被复用后新建的关系不受影响
+            graph_index.remove_nodes(kp_ids)
+            await asyncio.to_thread(similarity_index.remove, kp_ids)
+        return kp_ids
+    
+    # ========== 标签 ==========
+    
+    @staticmethod
+    def parse_tags(tags: Optional[str]) -> List[str]:
+        """拆分逗号分隔的标签字符串，去掉空白和重复，保留原有顺序"""
+        names = []
+        for name in _TAG_SEPARATORS.split(tags or ""):
+            name = name.strip()[:_TAG_MAX_LENGTH]
+            if name and name not in names:
+                names.append(name)
+        return names
+    
+    async def _set_tags(self, kp: KnowledgePoint, tags: Optional[str]):
+        """替换知识点的标签，缺少的标签自动创建（不提交）"""
+        names = self.parse_tags(tags)
+        kp.tags = ",".join(names) or None
+        
+        tag_ids = dict((await self.db.execute(
+            select(Tag.name, Tag.id).where(Tag.name.in_(names))
+        )).all()) if names else {}
+        missing = [Tag(name=name) for name in names if name not in tag_ids]
+        if missing:
+            self.db.add_all(missing)
+            await self.db.flush()
+            tag_ids.update((t.name, t.id) for t in missing)
+        
+        await self.db.execute(
+            delete(KnowledgePointTag).where(KnowledgePointTag.knowledge_point_id == kp.id)
+        )
+        self.db.add_all(
+            KnowledgePointTag(knowledge_point_id=kp.id, tag_id=tag_ids[name])
+            for name in names
+        )
+    
+    @staticmethod
+    def _tagged_point_ids(names: List[str], match: str = "any"):
+        """带有指定标签的知识点ID子查询，沿 (tag_id, knowledge_point_id) 索引查找"""
+        query = select(KnowledgePointTag.knowledge_point_id).join(
+            Tag, Tag.id == KnowledgePointTag.tag_id
+        ).where(Tag.name.in_(names))
+        if match == "all" and len(names) > 1:
+            query = query.group_by(KnowledgePointTag.knowledge_point_id).having(
+                func.count(KnowledgePointTag.tag_id) == len(names)
+            )
+        return query
+    
+    async def list_tags(self, limit: int = 100) -> List[Dict]:
+        """各标签的知识点数量，按数量降序（不含没有知识点的标签）"""
+        count = func.count(KnowledgePointTag.knowledge_point_id)
+        rows = await self.db.execute(
+            select(Tag.name, count.label("count"))
+            .join(KnowledgePointTag, KnowledgePointTag.tag_id == Tag.id)
+            .group_by(Tag.id)
+            .order_by(count.desc(), Tag.name.asc())
+            .limit(limit)
+        )
+        return [{"name": name, "count": count} for name, count in rows]
+    
+    # ========== 搜索 ==========
+    
+    async def search_knowledge_points(
+        self,
+        query: str,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        全文搜索知识点（标题、正文、摘要）
+        
+        结果按 BM25 相关度排序，带高亮片段；翻页使用上一页返回的游标，
+        按 (相关度, ID) 继续，不使用 OFFSET。
         
-        self.db.delete(kp)
-        self.db.commit()
-        return True
+        Args:
+            query: 搜索词，空格分隔的多个词需同时出现；
+                不少于 3 个字符的词走全文索引，较短的词在匹配结果中按子串过滤；
+                全部是短词（如“算法”）时按子串扫描，结果按ID倒序、rank 为 0
+            limit: 每页数量
+            cursor: 上一页返回的 next_cursor
+        
+        Returns:
+            {"items": [...], "next_cursor": 下一页游标或 None}
+        
+        Raises:
+            ValueError: 搜索词为空或游标无效
+        """
+        terms = list(dict.fromkeys(query.split()))
+        indexed = [term for term in terms if len(term) >= SEARCH_MIN_TERM_LENGTH]
+        short = [term for term in terms if len(term) < SEARCH_MIN_TERM_LENGTH]
+        if not terms:
+            raise ValueError("搜索词不能为空")
+        if not indexed:
+            return await self._search_by_substring(short, limit, cursor)
+        
+        # 每个词作为短语匹配，用户输入中的 FTS5 语法字符不会生效
+        params: Dict[str, Any] = {
+            "match": " ".join('"' + term.replace('"', '""') + '"' for term in indexed),
+            "start": _SEARCH_HIGHLIGHT[0],
+            "end": _SEARCH_HIGHLIGHT[1],
+            "tokens": _SEARCH_SNIPPET_TOKENS,
+            "limit": limit + 1,
+        }
+        conditions = ["knowledge_points_fts MATCH :match"]
+        
+        for i, term in enumerate(short):
+            params[f"short_{i}"] = term.lower()
+            conditions.append(
+                f"instr(lower(kp.title || ' ' || kp.content || ' ' || coalesce(kp.summary, '')), "
+                f":short_{i}) > 0"
+            )
+        
+        if cursor:
+            params["after_rank"], params["after_id"] = decode_cursor(cursor, float, int)
+            conditions.append(
+                "(knowledge_points_fts.rank > :after_rank "
+                "OR (knowledge_points_fts.rank = :after_rank AND kp.id > :after_id))"
+            )
+        
+        rows = (await self.db.execute(
+            text(f"""
+                SELECT kp.id, kp.title, kp.category, kp.tags,
+                       snippet(knowledge_points_fts, -1, :start, :end, '…', :tokens) AS snippet,
+                       knowledge_points_fts.rank AS rank
+                FROM knowledge_points_fts
+                JOIN knowledge_points AS kp ON kp.id = knowledge_points_fts.rowid
+                WHERE {" AND ".join(conditions)}
+                ORDER BY knowledge_points_fts.rank, kp.id
+                LIMIT :limit
+            """),
+            params
+        )).mappings().all()
+        
+        items = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = encode_cursor(last["rank"], last["id"])
+        return {"items": items, "next_cursor": next_cursor}
+    
+    async def _search_by_substring(
+        self,
+        terms: List[str],
+        limit: int,
+        cursor: Optional[str]
+    ) -> Dict[str, Any]:
+        """
+        短词搜索：trigram 索引无法匹配少于 3 个字符的词，改为按子串扫描
+        
+        沿主键倒序扫描，凑满一页即停止，不需要额外排序；
+        没有相关度，rank 固定为 0，高亮片段在 Python 中截取。
+        """
+        params: Dict[str, Any] = {"limit": limit + 1}
+        conditions = []
+        for i, term in enumerate(terms):
+            params[f"term_{i}"] = term.lower()
+            conditions.append(
+                f"instr(lower(title || ' ' || content || ' ' || coalesce(summary, '')), :term_{i}) > 0"
+            )
+        if cursor:
+            _, params["after_id"] = decode_cursor(cursor, float, int)
+            conditions.append("id < :after_id")
+        
+        rows = (await self.db.execute(
+            text(f"""
+                SELECT id, title, category, tags, content, summary
+                FROM knowledge_points
+                WHERE {" AND ".join(conditions)}
+                ORDER BY id DESC
+                LIMIT :limit
+            """),
+            params
+        )).mappings().all()
+        
+        items = [
+            {
+                "id": row["id"],
+                "title": row["title"],
+                "category": row["category"],
+                "tags": row["tags"],
+                "snippet": _substring_snippet(
+                    [row["title"], row["content"], row["summary"] or ""], terms
+                ),
+                "rank": 0.0
+            }
+            for row in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor(0.0, items[-1]["id"])
+        return {"items": items, "next_cursor": next_cursor}
     
     # ========== 学习内容 ==========
     
-    def create_learning_content(
+    async def create_learning_content(
         self,
         data: LearningContentCreate,
         auto_extract_knowledge: bool = True
     ) -> LearningContent:
         """创建学习内容"""
-        # 如果没有指定知识点，尝试自动提取
-        if not data.knowledge_point_id and auto_extract_knowledge:
-            # 使用GPT提取知识点
-            import asyncio
-            extracted_points = asyncio.run(
-                openai_service.extract_knowledge_points(data.content)
+        # 如果没有指定知识点，交给后台任务用GPT提取，请求立即返回任务ID
+        if not data.knowledge_point_id and auto_extract_knowledge and openai_service.is_available():
+            lc = LearningContent(
+                content=data.content,
+                source=data.source,
+                notes=data.notes
             )
+            self.db.add(lc)
+            await self.db.flush()  # 分配学习内容ID
             
-            # 创建第一个提取的知识点
-            if extracted_points:
-                first_point = extracted_points[0]
-                kp = self.create_knowledge_point(
-                    KnowledgePointCreate(
-                        title=first_point.get("title", "未命名知识点"),
-                        content=first_point.get("content", data.content),
-                        category=first_point.get("category")
-                    )
-                )
-                data.knowledge_point_id = kp.id
+            job = await job_queue.enqueue(
+                self.db,
+                JobType.EXTRACT_KNOWLEDGE,
+                {"learning_content_id": lc.id},
+                dedup_key=f"{JobType.EXTRACT_KNOWLEDGE}:{lc.id}",
+                commit=False
+            )
+            await self.db.commit()
+            lc.job_id = job.id
+            return lc
         
         # 如果还是没有知识点ID，创建一个默认的
+        kp = None
         if not data.knowledge_point_id:
-            kp = self.create_knowledge_point(
-                KnowledgePointCreate(
-                    title=f"学习内容 {datetime.utcnow().strftime('%Y-%m-%d')}",
-                    content=data.content
-                )
-            )
+            kp = await self._add_default_knowledge_point(data.content)
             data.knowledge_point_id = kp.id
         
         lc = LearningContent(
@@ -160,111 +530,341 @@ class KnowledgeService:
         )
         
         self.db.add(lc)
-        self.db.commit()
-        self.db.refresh(lc)
+        await self.db.commit()
+        if kp:
+            await asyncio.to_thread(
+                similarity_index.upsert, kp.id, kp.title, kp.content, kp.summary, is_new=True
+            )
         
+        lc.job_id = None
         return lc
     
+    async def link_default_knowledge_point(self, lc_id: int) -> Optional[int]:
+        """
+        为提取失败的学习内容关联默认知识点，在一个事务中提交
+        
+        学习内容已关联知识点时直接返回，保证任务重试时不会重复创建。
+        
+        Returns:
+            关联的知识点ID，学习内容不存在时返回 None
+        """
+        lc = await self.db.get(LearningContent, lc_id)
+        if not lc:
+            return None
+        if lc.knowledge_point_id:
+            return lc.knowledge_point_id
+        
+        kp = await self._add_default_knowledge_point(lc.content)
+        lc.knowledge_point_id = kp.id
+        await self.db.commit()
+        await asyncio.to_thread(
+            similarity_index.upsert, kp.id, kp.title, kp.content, kp.summary, is_new=True
+        )
+        return kp.id
+    
+    async def create_extracted_knowledge_points(
+        self,
+        lc_id: int,
+        extracted_points: List[Dict[str, Any]]
+    ) -> List[int]:
+        """
+        为学习内容批量创建提取出的知识点，在一个事务中提交
+        
+        第一个知识点关联原学习内容，其余每个知识点各自新增一条学习内容记录。
+        学习内容已关联知识点时直接返回，保证任务重试时不会重复创建。
+        
+        Args:
+            lc_id: 学习内容ID
+            extracted_points: 知识点列表 [{"title": "...", "content": "...", "category": "...", "summary": "..."}]，
+                为空时创建默认知识点
+            
+        Returns:
+            创建的知识点ID列表
+        """
+        lc = await self.db.get(LearningContent, lc_id)
+        if not lc:
+            return []
+        if lc.knowledge_point_id:
+            return [lc.knowledge_point_id]
+        
+        if not extracted_points:
+            extracted_points = [{"title": self.default_knowledge_point_title(), "content": lc.content}]
+        
+        kps = []
+        for point in extracted_points:
+            data = KnowledgePointCreate(
+                title=(point.get("title") or "未命名知识点")[:200],
+                content=point.get("content") or lc.content,
+                category=point.get("category")
+            )
+            kps.append(KnowledgePoint(
+                title=data.title,
+                content=data.content,
+                category=data.category,
+                summary=point.get("summary")
+            ))
+        
+        self.db.add_all(kps)
+        await self.db.flush()  # 分配知识点ID
+        
+        lc.knowledge_point_id = kps[0].id
+        self.db.add_all([
+            LearningContent(
+                knowledge_point_id=kp.id,
+                content=lc.content,
+                source=lc.source,
+                notes=lc.notes,
+                learning_date=lc.learning_date
+            )
+            for kp in kps[1:]
+        ])
+        
+        await self.db.commit()
+        for kp in kps:
+            await asyncio.to_thread(
+                similarity_index.upsert, kp.id, kp.title, kp.content, kp.summary, is_new=True
+            )
+        return [kp.id for kp in kps]
+    
+    @staticmethod
+    def default_knowledge_point_title() -> str:
+        """默认知识点标题（以学习日期命名）"""
+        return f"学习内容 {datetime.utcnow().strftime('%Y-%m-%d')}"
+    
+    async def _add_default_knowledge_point(self, content: str) -> KnowledgePoint:
+        """以学习日期命名写入默认知识点（不提交，由调用方与学习内容一起提交）"""
+        return await self._add_knowledge_point(
+            KnowledgePointCreate(
+                title=self.default_knowledge_point_title(),
+                content=content
+            )
+        )
+    
     # ========== 复习记录 ==========
     
-    def create_review_record(self, data: ReviewRecordCreate) -> ReviewRecord:
+    async def create_review_record(self, data: ReviewRecordCreate) -> ReviewRecord:
         """创建复习记录并更新知识点的复习参数"""
-        kp = self.get_knowledge_point(data.knowledge_point_id)
-        if not kp:
+        record = (await self.create_review_records([data]))[0]
+        if record is None:
             raise ValueError(f"知识点 {data.knowledge_point_id} 不存在")
+        return record
+    
+    async def create_review_records(
+        self,
+        items: List[ReviewRecordCreate]
+    ) -> List[Optional[ReviewRecord]]:
+        """
+        批量创建复习记录并更新知识点的复习参数，在一个事务中提交
         
-        # 保存更新前的参数
-        ease_factor_before = kp.ease_factor
-        interval_before = kp.interval
-        
-        # 计算新的复习参数
-        new_ease_factor, new_interval, new_repetitions, next_review_date = \
-            self.sr_algorithm.calculate_next_review(
-                quality=data.quality,
-                ease_factor=kp.ease_factor,
-                interval=kp.interval,
-                repetitions=kp.repetitions
-            )
+        用一条 IN 查询加载所有知识点，用调度器一次计算整批新参数。
+        同一知识点在批次中出现多次时按提交顺序依次应用。
         
-        # 更新知识点
-        kp.ease_factor = new_ease_factor
-        kp.interval = new_interval
-        kp.repetitions = new_repetitions
-        kp.next_review_date = next_review_date
-        kp.updated_at = datetime.utcnow()
+        Returns:
+            与 items 一一对应的复习记录，知识点不存在时为 None
+        """
+        kp_ids = {item.knowledge_point_id for item in items}
+        kps = {
+            kp.id: kp
+            for kp in await self.db.scalars(
+                select(KnowledgePoint).where(KnowledgePoint.id.in_(kp_ids))
+            )
+        }
         
-        # 如果质量很高且重复次数多，标记为已掌握
-        if data.quality >= 4 and new_repetitions >= 5:
-            kp.is_mastered = True
+        # 按同一知识点的出现次数分轮，每轮内每个知识点最多一条
+        rounds: List[List[int]] = []
+        seen: Dict[int, int] = {}
+        for index, item in enumerate(items):
+            if item.knowledge_point_id not in kps:
+                continue
+            occurrence = seen.get(item.knowledge_point_id, 0)
+            seen[item.knowledge_point_id] = occurrence + 1
+            if occurrence == len(rounds):
+                rounds.append([])
+            rounds[occurrence].append(index)
         
-        # 创建复习记录
-        record = ReviewRecord(
-            knowledge_point_id=data.knowledge_point_id,
-            quality=data.quality,
-            ease_factor_before=ease_factor_before,
-            interval_before=interval_before,
-            ease_factor_after=new_ease_factor,
-            interval_after=new_interval,
-            time_spent_seconds=data.time_spent_seconds,
-            notes=data.notes
-        )
+        now = datetime.utcnow()
+        records: List[Optional[ReviewRecord]] = [None] * len(items)
+        for indexes in rounds:
+            cards = [kps[items[i].knowledge_point_id] for i in indexes]
+            qualities = [items[i].quality for i in indexes]
+            
+            # 计算新的复习参数
+            result = self.scheduler.schedule(
+                quality=qualities,
+                ease_factor=[kp.ease_factor for kp in cards],
+                interval=[kp.interval for kp in cards],
+                repetitions=[kp.repetitions for kp in cards],
+                now=now
+            )
+            
+            for i, kp, quality, new_ease_factor, new_interval, new_repetitions, next_review_date in zip(
+                indexes,
+                cards,
+                qualities,
+                result.ease_factor.tolist(),
+                result.interval.tolist(),
+                result.repetitions.tolist(),
+                result.next_review_date.tolist()
+            ):
+                item = items[i]
+                
+                # 创建复习记录（保存更新前后的参数）
+                records[i] = ReviewRecord(
+                    knowledge_point_id=kp.id,
+                    quality=item.quality,
+                    ease_factor_before=kp.ease_factor,
+                    interval_before=kp.interval,
+                    ease_factor_after=new_ease_factor,
+                    interval_after=new_interval,
+                    reviewed_at=now,
+                    time_spent_seconds=item.time_spent_seconds,
+                    notes=item.notes
+                )
+                
+                # 更新知识点
+                kp.ease_factor = new_ease_factor
+                kp.interval = new_interval
+                kp.repetitions = new_repetitions
+                kp.next_review_date = next_review_date
+                kp.updated_at = now
+                
+                # 如果质量很高且重复次数多，标记为已掌握
+                if quality >= 4 and new_repetitions >= 5:
+                    kp.is_mastered = True
         
-        self.db.add(record)
-        self.db.commit()
-        self.db.refresh(record)
+        self.db.add_all([record for record in records if record is not None])
+        await self.db.commit()
         
-        return record
+        return records
     
-    def get_daily_review_plan(self, date: datetime = None) -> Dict:
-        """获取每日复习计划"""
+    async def get_daily_review_plan(
+        self,
+        date: datetime = None,
+        page_size: int = 20,
+        view: str = "full"
+    ) -> Dict:
+        """
+        获取每日复习计划
+        
+        各优先级的数量和预估时间由一条聚合查询得出：数据库按
+        (优先级, 重复次数, 难易度因子) 分组计数，调度器只对分组结果估算时间，
+        成本与待复习卡片数量无关。每个优先级只附带第一页卡片，
+        其余通过 list_due_reviews 分页获取。
+        
+        Args:
+            date: 计划日期，默认为当前时间
+            page_size: 每个优先级附带的卡片数量，0 表示只返回汇总
+            view: 卡片视图，full 或 compact
+        """
         if date is None:
             date = datetime.utcnow()
+        now = datetime.utcnow()
         
-        # 查询需要复习的知识点（未掌握的且复习日期已到）
-        knowledge_points = self.db.query(KnowledgePoint).filter(
-            and_(
-                KnowledgePoint.is_mastered == False,
-                KnowledgePoint.next_review_date <= date
+        priority = self._review_priority(now)
+        rows = (await self.db.execute(
+            select(
+                priority,
+                KnowledgePoint.repetitions,
+                KnowledgePoint.ease_factor,
+                func.count(KnowledgePoint.id)
+            ).where(
+                self._due_filter(date)
+            ).group_by(
+                priority,
+                KnowledgePoint.repetitions,
+                KnowledgePoint.ease_factor
             )
-        ).all()
+        )).all()
         
-        # 按优先级分类
-        reviews_by_priority = {
-            "high": [],
-            "medium": [],
-            "low": []
-        }
+        counts_by_priority = dict.fromkeys(PRIORITY_LEVELS, 0)
+        time_by_priority = dict.fromkeys(PRIORITY_LEVELS, 0)
+        if rows:
+            priorities, repetitions, ease_factors, counts = zip(*rows)
+            times = self.scheduler.estimate_time(repetitions, ease_factors).tolist()
+            for level, count, time in zip(priorities, counts, times):
+                counts_by_priority[level] += count
+                time_by_priority[level] += time * count
         
-        total_time = 0
-        for kp in knowledge_points:
-            priority = self.sr_algorithm.get_priority_level(
-                kp.next_review_date,
-                kp.ease_factor
-            )
-            reviews_by_priority[priority].append(kp)
-            
-            # 累计预估时间
-            time = self.sr_algorithm.estimate_review_time(
-                kp.repetitions,
-                kp.ease_factor
+        reviews_by_priority = {
+            level: (
+                await self.list_due_reviews(level, date, limit=page_size, now=now, view=view)
+                if page_size and counts_by_priority[level] else []
             )
-            total_time += time
+            for level in PRIORITY_LEVELS
+        }
         
         return {
             "date": date,
-            "total_reviews": len(knowledge_points),
+            "total_reviews": sum(counts_by_priority.values()),
+            "counts_by_priority": counts_by_priority,
+            "estimated_time_by_priority": time_by_priority,
             "reviews_by_priority": reviews_by_priority,
-            "estimated_time_minutes": total_time
+            "estimated_time_minutes": sum(time_by_priority.values())
         }
     
+    async def list_due_reviews(
+        self,
+        priority: str,
+        date: datetime = None,
+        offset: int = 0,
+        limit: int = 20,
+        now: datetime = None,
+        view: str = "full"
+    ) -> List[Dict[str, Any]]:
+        """
+        分页获取某一优先级的待复习知识点（按复习日期、难易度排序），
+        直接返回对应视图（full 或 compact）形状的响应行
+        """
+        if date is None:
+            date = datetime.utcnow()
+        
+        return row_dicts(await self.db.execute(
+            select(*response_columns(KnowledgePoint, KNOWLEDGE_POINT_VIEWS[view])).where(
+                self._due_filter(date),
+                self._review_priority(now) == priority
+            ).order_by(
+                KnowledgePoint.next_review_date.asc(),
+                KnowledgePoint.ease_factor.asc(),
+                KnowledgePoint.id.asc()
+            ).offset(offset).limit(limit)
+        ))
+    
+    @staticmethod
+    def _due_filter(date: datetime):
+        """未掌握且复习日期已到"""
+        return and_(
+            KnowledgePoint.is_mastered == False,
+            KnowledgePoint.next_review_date <= date
+        )
+    
+    def _review_priority(self, now: Optional[datetime] = None):
+        return self.scheduler.priority_expression(
+            KnowledgePoint.next_review_date,
+            KnowledgePoint.ease_factor,
+            now
+        )
+    
     # ========== 知识关系 ==========
     
-    def create_knowledge_relation(
+    async def create_knowledge_relation(
         self,
         data: KnowledgeRelationCreate,
         created_by_ai: bool = False
-    ) -> KnowledgeRelation:
-        """创建知识关系"""
+    ) -> Optional[KnowledgeRelation]:
+        """
+        创建知识关系，任一端知识点不存在时返回 None
+        
+        Raises:
+            ValueError: 同类型的关系已存在
+        """
+        found = await self.db.scalar(
+            select(func.count(KnowledgePoint.id)).where(
+                KnowledgePoint.id.in_({data.parent_id, data.child_id})
+            )
+        )
+        if found < len({data.parent_id, data.child_id}):
+            return None
+        
         relation = KnowledgeRelation(
             parent_id=data.parent_id,
             child_id=data.child_id,
@@ -275,41 +875,147 @@ class KnowledgeService:
         )
         
         self.db.add(relation)
-        self.db.commit()
-        self.db.refresh(relation)
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise ValueError("该关系已存在")
+        graph_index.add_edges([relation])
         
         return relation
     
-    def get_knowledge_graph(self, center_id: Optional[int] = None, depth: int = 2) -> Dict:
-        """获取知识图谱"""
-        if center_id:
-            # 获取以某个知识点为中心的子图
-            center_kp = self.get_knowledge_point(center_id)
-            if not center_kp:
-                return {"nodes": [], "edges": []}
-            
-            # TODO: 实现基于深度的图遍历
-            # 这里简化实现，返回直接相关的节点
-            related_relations = self.db.query(KnowledgeRelation).filter(
-                or_(
-                    KnowledgeRelation.parent_id == center_id,
-                    KnowledgeRelation.child_id == center_id
+    async def create_knowledge_relations(
+        self,
+        relations: List[KnowledgeRelationCreate],
+        created_by_ai: bool = False
+    ) -> Dict[str, int]:
+        """
+        批量创建知识关系（一个事务）
+        
+        按 (parent_id, child_id, relation_type) 去重：请求内重复或已存在的关系跳过；
+        端点知识点不存在或首尾相同的关系记为无效。端点和已有关系都按批用 IN 查询，
+        新关系用多行 INSERT 写入，整批只提交一次。
+        
+        Returns:
+            {"created_count": 新建数, "duplicate_count": 重复数, "invalid_count": 无效数,
+             "relations": 新建关系的响应行（按请求中的顺序）}
+        
+        Raises:
+            IntegrityError: 并发写入了相同的关系（整批回滚）
+        """
+        edges: Dict[Tuple[int, int, str], KnowledgeRelationCreate] = {}
+        for data in relations:
+            edges.setdefault((data.parent_id, data.child_id, data.relation_type), data)
+        
+        node_ids = list({node_id for key in edges for node_id in key[:2]})
+        existing_ids: Set[int] = set()
+        for chunk in _chunks(node_ids, _IN_CHUNK_SIZE):
+            existing_ids.update(await self.db.scalars(
+                select(KnowledgePoint.id).where(KnowledgePoint.id.in_(chunk))
+            ))
+        valid = [
+            key for key in edges
+            if key[0] != key[1] and key[0] in existing_ids and key[1] in existing_ids
+        ]
+        
+        # 已有关系按 parent_id 批量读取（唯一索引以 parent_id 开头），在内存中比对关系键
+        edge_key = (KnowledgeRelation.parent_id, KnowledgeRelation.child_id, KnowledgeRelation.relation_type)
+        existing_edges: Set[Tuple[int, int, str]] = set()
+        for chunk in _chunks(list({key[0] for key in valid}), _IN_CHUNK_SIZE):
+            existing_edges.update(
+                tuple(row) for row in await self.db.execute(
+                    select(*edge_key).where(KnowledgeRelation.parent_id.in_(chunk))
                 )
-            ).all()
+            )
+        new = [key for key in valid if key not in existing_edges]
+        
+        # 参数列表执行时按批展开为多行 INSERT ... VALUES (...), (...) RETURNING，语句只编译一次
+        now = datetime.utcnow()
+        inserted = []
+        try:
+            if new:
+                inserted = (await self.db.execute(
+                    insert(KnowledgeRelation).returning(
+                        *response_columns(KnowledgeRelation, KnowledgeRelationResponse)
+                    ),
+                    [
+                        {
+                            "parent_id": key[0],
+                            "child_id": key[1],
+                            "relation_type": key[2],
+                            "strength": edges[key].strength,
+                            "description": edges[key].description,
+                            "created_at": now,
+                            "created_by_ai": created_by_ai,
+                        }
+                        for key in new
+                    ]
+                )).all()
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise
+        
+        # 图谱索引按ID递增追加，RETURNING 的顺序不保证
+        graph_index.add_edges(sorted(inserted, key=lambda row: row.id))
+        
+        by_key = {(row.parent_id, row.child_id, row.relation_type): row for row in inserted}
+        return {
+            "created_count": len(new),
+            "duplicate_count": len(relations) - len(edges) + len(valid) - len(new),
+            "invalid_count": len(edges) - len(valid),
+            "relations": [by_key[key]._asdict() for key in new]
+        }
+    
+    async def get_knowledge_graph(
+        self,
+        center_id: Optional[int] = None,
+        depth: int = 2,
+        max_nodes: int = 200,
+        max_edges: int = 1000
+    ) -> Dict:
+        """
+        获取知识图谱
+        
+        Args:
+            center_id: 中心节点ID，为空则返回全局图谱
+            depth: 以中心节点为起点的最大跳数（关系按无向边计算，由内存索引遍历）
+            max_nodes: 子图最多返回的节点数，按离中心的距离优先保留
+            max_edges: 子图最多返回的边数
+        """
+        truncated = False
+        
+        if center_id:
+            # 获取以某个知识点为中心的 N 跳子图
+            if not await self._knowledge_point_exists(center_id):
+                return {"nodes": [], "edges": [], "truncated": False}
             
-            node_ids = {center_id}
-            for rel in related_relations:
-                node_ids.add(rel.parent_id)
-                node_ids.add(rel.child_id)
+            # 从内存索引遍历 N 跳邻域，再按ID批量读取节点列
+            await self._ensure_graph_index()
+            node_ids, truncated = graph_index.traverse(center_id, depth, max_nodes)
+            rows = (await self.db.execute(
+                self._graph_node_query().where(KnowledgePoint.id.in_(node_ids))
+            )).all()
+            rows_by_id = {row.id: row for row in rows}
+            nodes = [rows_by_id[node_id] for node_id in node_ids if node_id in rows_by_id]
             
-            nodes = self.db.query(KnowledgePoint).filter(
-                KnowledgePoint.id.in_(node_ids)
-            ).all()
+            graph_edges, edges_truncated = graph_index.subgraph_edges(
+                [kp.id for kp in nodes], max_edges
+            )
+            truncated = truncated or edges_truncated
             
         else:
-            # 获取全局图谱
-            nodes = self.db.query(KnowledgePoint).all()
-            related_relations = self.db.query(KnowledgeRelation).all()
+            # 获取全局图谱（只查询图谱需要的列）
+            nodes = (await self.db.execute(self._graph_node_query())).all()
+            graph_edges = [
+                {
+                    "source": rel.parent_id,
+                    "target": rel.child_id,
+                    "relation_type": rel.relation_type,
+                    "strength": rel.strength
+                }
+                for rel in await self.db.execute(self._graph_edge_query())
+            ]
         
         # 构建图数据
         graph_nodes = [
@@ -324,56 +1030,227 @@ class KnowledgeService:
             for kp in nodes
         ]
         
-        graph_edges = [
+        return {
+            "nodes": graph_nodes,
+            "edges": graph_edges,
+            "truncated": truncated
+        }
+    
+    async def iter_knowledge_graph(
+        self,
+        chunk_size: int = 1000
+    ) -> AsyncIterator[Tuple[str, List[Dict]]]:
+        """
+        分块迭代全局图谱
+        
+        只查询图谱需要的列，按 chunk_size 分批从游标读取，
+        内存占用与图谱规模无关。
+        
+        Yields:
+            ("node" 或 "edge", 该批节点/边列表)
+        """
+        nodes = await self.db.stream(
+            self._graph_node_query()
+            .order_by(KnowledgePoint.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        async for rows in nodes.partitions():
+            yield "node", [
+                {
+                    "id": kp.id,
+                    "title": kp.title,
+                    "category": kp.category,
+                    "is_mastered": kp.is_mastered,
+                    "ease_factor": kp.ease_factor,
+                    "repetitions": kp.repetitions
+                }
+                for kp in rows
+            ]
+        
+        edges = await self.db.stream(
+            self._graph_edge_query()
+            .order_by(KnowledgeRelation.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        async for rows in edges.partitions():
+            yield "edge", [
+                {
+                    "source": rel.parent_id,
+                    "target": rel.child_id,
+                    "relation_type": rel.relation_type,
+                    "strength": rel.strength
+                }
+                for rel in rows
+            ]
+    
+    @staticmethod
+    def _graph_node_query():
+        return select(
+            KnowledgePoint.id,
+            KnowledgePoint.title,
+            KnowledgePoint.category,
+            KnowledgePoint.is_mastered,
+            KnowledgePoint.ease_factor,
+            KnowledgePoint.repetitions
+        )
+    
+    @staticmethod
+    def _graph_edge_query():
+        return select(
+            KnowledgeRelation.parent_id,
+            KnowledgeRelation.child_id,
+            KnowledgeRelation.relation_type,
+            KnowledgeRelation.strength
+        )
+    
+    async def _knowledge_point_exists(self, kp_id: int) -> bool:
+        return await self.db.scalar(
+            select(KnowledgePoint.id).where(KnowledgePoint.id == kp_id)
+        ) is not None
+    
+    async def _ensure_graph_index(self):
+        """图谱索引在工作线程中用独立的同步会话构建，不阻塞事件循环"""
+        if not graph_index.loaded:
+            await asyncio.to_thread(run_in_session, graph_index.ensure_loaded)
+    
+    async def get_neighbors(self, kp_id: int, direction: str = "both") -> Optional[Dict]:
+        """查询知识点的直接邻居和度数，知识点不存在时返回 None"""
+        if not await self._knowledge_point_exists(kp_id):
+            return None
+        
+        await self._ensure_graph_index()
+        return {
+            "knowledge_point_id": kp_id,
+            **graph_index.degree(kp_id),
+            "neighbors": [
+                {"id": neighbor, "relation_type": relation_type, "strength": strength}
+                for neighbor, relation_type, strength in graph_index.neighbors(kp_id, direction)
+            ]
+        }
+    
+    @staticmethod
+    def similarity_index_ready() -> bool:
+        """相似度索引是否可以查询；未就绪时在后台线程中核对或重建（不等待完成）"""
+        if similarity_index.ready:
+            return True
+        similarity_index.start_loading(SessionLocal)
+        return False
+    
+    @staticmethod
+    async def wait_similarity_index():
+        """
+        等待相似度索引就绪（正在后台构建时等待其完成）
+        
+        核对和重建在工作线程中用独立的会话进行，调用方不要在持有数据库会话时等待。
+        """
+        if not similarity_index.ready:
+            await asyncio.to_thread(run_in_session, similarity_index.ensure_loaded)
+    
+    async def get_similar_knowledge_points(self, kp_id: int, limit: int = 10) -> Optional[List[Dict]]:
+        """
+        查询内容最相似的知识点，知识点不存在时返回 None
+        
+        相似度为本地 TF-IDF 向量的余弦相似度，不调用 AI。
+        调用前用 similarity_index_ready 确认索引已就绪。
+        """
+        if not await self._knowledge_point_exists(kp_id):
+            return None
+        
+        # 矩阵乘法在线程池中执行，不阻塞事件循环
+        [similar] = await asyncio.to_thread(similarity_index.similar, [kp_id], limit)
+        if not similar:
+            return []
+        
+        rows = await self.db.execute(
+            select(KnowledgePoint.id, KnowledgePoint.title, KnowledgePoint.category)
+            .where(KnowledgePoint.id.in_([similar_id for similar_id, _ in similar]))
+        )
+        points = {row.id: row for row in rows}
+        return [
             {
-                "source": rel.parent_id,
-                "target": rel.child_id,
-                "relation_type": rel.relation_type,
-                "strength": rel.strength
+                "id": similar_id,
+                "title": points[similar_id].title,
+                "category": points[similar_id].category,
+                "score": score
             }
-            for rel in related_relations
+            for similar_id, score in similar
+            if similar_id in points
         ]
+    
+    async def auto_suggest_relations(self, kp_id: int, max_suggestions: int = 5) -> Optional[AIJob]:
+        """提交自动建议知识关系的后台任务，知识点不存在时返回 None"""
+        kp = await self.get_knowledge_point(kp_id)
+        if not kp:
+            return None
         
-        return {
-            "nodes": graph_nodes,
-            "edges": graph_edges
-        }
+        return await job_queue.enqueue(
+            self.db,
+            JobType.SUGGEST_RELATIONS,
+            {"knowledge_point_id": kp_id, "max_suggestions": max_suggestions},
+            dedup_key=f"{JobType.SUGGEST_RELATIONS}:{kp_id}:{max_suggestions}"
+        )
     
-    def auto_suggest_relations(self, kp_id: int, max_suggestions: int = 5) -> List[Dict]:
-        """自动建议知识关系"""
-        kp = self.get_knowledge_point(kp_id)
+    async def get_relation_candidates(
+        self,
+        kp_id: int,
+        limit: Optional[int] = None
+    ) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        获取建议关系所需的当前知识点和候选知识点
+        
+        候选知识点按本地相似度从高到低选取，已与当前知识点存在关系的不再作为候选。
+        调用前用 wait_similarity_index 等待索引就绪。
+        
+        Args:
+            limit: 候选数量，默认 RELATION_CANDIDATE_LIMIT
+        """
+        kp = await self.get_knowledge_point(kp_id)
         if not kp:
-            return []
+            return None
         
-        # 获取其他知识点
-        other_kps = self.db.query(KnowledgePoint).filter(
-            KnowledgePoint.id != kp_id
-        ).limit(50).all()
+        limit = limit or settings.RELATION_CANDIDATE_LIMIT
+        related_ids = await self.get_related_point_ids(kp_id)
+        [similar] = await asyncio.to_thread(
+            similarity_index.similar, [kp_id], limit + len(related_ids)
+        )
+        candidate_ids = [
+            similar_id for similar_id, _ in similar if similar_id not in related_ids
+        ][:limit]
         
-        if not other_kps:
-            return []
+        other_kps = {}
+        if candidate_ids:
+            other_kps = {
+                other_kp.id: other_kp
+                for other_kp in await self.db.scalars(
+                    select(KnowledgePoint).where(KnowledgePoint.id.in_(candidate_ids))
+                )
+            }
         
-        # 使用GPT建议关系
-        import asyncio
-        suggestions = asyncio.run(
-            openai_service.suggest_knowledge_relations(
+        return (
+            {
+                "id": kp.id,
+                "title": kp.title,
+                "content": kp.content,
+                "summary": kp.summary
+            },
+            [
                 {
-                    "id": kp.id,
-                    "title": kp.title,
-                    "content": kp.content,
-                    "summary": kp.summary
-                },
-                [
-                    {
-                        "id": other_kp.id,
-                        "title": other_kp.title,
-                        "content": other_kp.content,
-                        "summary": other_kp.summary
-                    }
-                    for other_kp in other_kps
-                ]
+                    "id": other_kp.id,
+                    "title": other_kp.title,
+                    "content": other_kp.content,
+                    "summary": other_kp.summary
+                }
+                for other_kp in (other_kps.get(other_id) for other_id in candidate_ids)
+                if other_kp is not None
+            ]
+        )
+    
+    async def get_related_point_ids(self, kp_id: int) -> Set[int]:
+        """与知识点已存在关系（任一方向）的知识点ID"""
+        rows = await self.db.execute(
+            select(KnowledgeRelation.child_id).where(KnowledgeRelation.parent_id == kp_id)
+            .union(
+                select(KnowledgeRelation.parent_id).where(KnowledgeRelation.child_id == kp_id)
             )
         )
-        
-        return suggestions[:max_suggestions]
-
+        return set(rows.scalars())
@@ -0,0 +1,262 @@
+"""
+LLM 结果缓存 - 按内容寻址的两级缓存
+
+键为提示类型、部署名和输入文本的 SHA-256 摘要，相同输入重复调用时直接返回，
+不再消耗 token。第一级是进程内 LRU，第二级是独立的 SQLite 文件，
+两级都按 TTL 过期，并按条目数上限淘汰最久未访问的结果。
+持久层的读写放到工作线程执行，不阻塞事件循环。
+"""
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from logging import getLogger
+from typing import Any, Dict, Optional
+
+from ..core.config import settings
+
+
+logger = getLogger(__name__)
+
+# 未命中标记（缓存值本身可能是空列表等假值）
+MISS = object()
+
+
+class LLMCache:
+    """LLM 结果的内存 LRU + SQLite 两级缓存"""
+
+    # 每写入多少次检查一次持久层容量
+    _EVICT_EVERY = 100
+    # 持久层命中后的访问时间先记在内存里，攒够这么多条（或下次写入/淘汰时）再批量写回
+    _TOUCH_FLUSH_EVERY = 100
+
+    def __init__(
+        self,
+        enabled: bool,
+        path: Optional[str],
+        ttl_seconds: float,
+        memory_entries: int,
+        max_entries: int
+    ):
+        self.enabled = enabled
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()  # 保护内存层和计数
+        self._disk_lock = threading.Lock()  # 串行化持久层连接上的操作
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes_since_evict = 0
+        self._pending_touches: Dict[str, float] = {}
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "memory_evictions": 0,
+            "evictions": 0
+        }
+
+    @staticmethod
+    def make_key(prompt_type: str, deployment: Optional[str], *inputs: str) -> str:
+        """根据提示类型、部署名和输入文本计算缓存键"""
+        digest = hashlib.sha256()
+        for part in (prompt_type, deployment or "", *inputs):
+            encoded = (part or "").encode("utf-8")
+            # 写入长度前缀，避免不同切分方式拼出相同的字节串
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    # ========== 读写 ==========
+
+    async def get(self, key: str) -> Any:
+        """读取缓存，未命中返回 MISS"""
+        if not self.enabled:
+            return MISS
+
+        now = time.time()
+        with self._lock:
+            value = self._memory_get(key, now)
+        if value is not MISS:
+            return value
+
+        if self.path:
+            value = await asyncio.to_thread(self._disk_get, key, now)
+        with self._lock:
+            if value is MISS:
+                self._stats["misses"] += 1
+                return MISS
+            self._stats["disk_hits"] += 1
+            self._memory_set(key, value, now + self.ttl_seconds)
+        return value
+
+    async def set(self, key: str, value: Any):
+        """写入缓存（值需可 JSON 序列化）"""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._memory_set(key, value, expires_at)
+            self._stats["writes"] += 1
+        if self.path:
+            await asyncio.to_thread(self._disk_set, key, value, now, expires_at)
+
+    def clear(self):
+        """清空两级缓存"""
+        with self._lock:
+            self._memory.clear()
+        with self._disk_lock:
+            self._pending_touches.clear()
+            conn = self._connection()
+            if conn is not None:
+                conn.execute("DELETE FROM llm_cache")
+                conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中/未命中计数"""
+        with self._lock:
+            lookups = self._stats["memory_hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            hits = lookups - self._stats["misses"]
+            return {
+                **self._stats,
+                "memory_entries": len(self._memory),
+                "hit_rate": round(hits / lookups, 4) if lookups else 0
+            }
+
+    # ========== 内存层 ==========
+
+    def _memory_get(self, key: str, now: float) -> Any:
+        entry = self._memory.get(key)
+        if entry is None:
+            return MISS
+        value, expires_at = entry
+        if expires_at <= now:
+            del self._memory[key]
+            return MISS
+        self._memory.move_to_end(key)
+        self._stats["memory_hits"] += 1
+        return value
+
+    def _memory_set(self, key: str, value: Any, expires_at: float):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["memory_evictions"] += 1
+
+    # ========== 持久层 ==========
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._conn is None:
+            try:
+                conn = sqlite3.connect(self.path, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    """CREATE TABLE IF NOT EXISTS llm_cache (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        expires_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL
+                    )"""
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed_at ON llm_cache (accessed_at)"
+                )
+                conn.commit()
+                self._conn = conn
+            except sqlite3.Error as e:
+                # 持久层不可用时退化为纯内存缓存
+                logger.warning(f"LLM 缓存文件不可用，仅使用内存缓存: {e}")
+                self.path = None
+                return None
+        return self._conn
+
+    def _disk_get(self, key: str, now: float) -> Any:
+        with self._disk_lock:
+            conn = self._connection()
+            if conn is None:
+                return MISS
+
+            row = conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return MISS
+
+            value, expires_at = row
+            if expires_at <= now:
+                self._pending_touches.pop(key, None)
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                conn.commit()
+                return MISS
+
+            self._pending_touches[key] = now
+            if len(self._pending_touches) >= self._TOUCH_FLUSH_EVERY:
+                self._flush_touches(conn)
+                conn.commit()
+            return json.loads(value)
+
+    def _disk_set(self, key: str, value: Any, now: float, expires_at: float):
+        with self._disk_lock:
+            conn = self._connection()
+            if conn is None:
+                return
+
+            self._pending_touches.pop(key, None)
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, now)
+            )
+            self._flush_touches(conn)
+            conn.commit()
+
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= self._EVICT_EVERY:
+                self._writes_since_evict = 0
+                self._disk_evict(conn, now)
+
+    def _flush_touches(self, conn: sqlite3.Connection):
+        """批量写回攒下的访问时间（不提交，由调用方提交）"""
+        if self._pending_touches:
+            conn.executemany(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._pending_touches.items()]
+            )
+            self._pending_touches.clear()
+
+    def _disk_evict(self, conn: sqlite3.Connection, now: float):
+        """删除过期条目，超出容量时淘汰最久未访问的条目"""
+        evicted = conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,)).rowcount
+        (count,) = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            evicted += conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,)
+            ).rowcount
+        conn.commit()
+        with self._lock:
+            self._stats["evictions"] += evicted
+
+
+# 创建全局实例
+llm_cache = LLMCache(
+    enabled=settings.LLM_CACHE_ENABLED,
+    path=settings.LLM_CACHE_PATH,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    memory_entries=settings.LLM_CACHE_MEMORY_ENTRIES,
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES
+)
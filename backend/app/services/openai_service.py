@@ -1,10 +1,12 @@
 """
 Azure OpenAI 服务 - 用于知识点生成、总结和知识体系构建
 """
-from typing import List, Dict, Optional
+from typing import List, Dict
 import json
-from openai import AzureOpenAI
+import httpx
+from openai import AsyncAzureOpenAI, DefaultAsyncHttpxClient
 from ..core.config import settings
+from .llm_cache import llm_cache, MISS
 from logging import getLogger
 
 
@@ -16,23 +18,69 @@ class OpenAIService:
     def __init__(self):
         self.client = None
         if settings.AZURE_OPENAI_API_KEY and settings.AZURE_OPENAI_ENDPOINT:
-            self.client = AzureOpenAI(
+            # 所有请求共享一个有上限的连接池，避免每次调用重新建连
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.AZURE_OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.AZURE_OPENAI_MAX_KEEPALIVE_CONNECTIONS
+                ),
+                timeout=httpx.Timeout(
+                    settings.AZURE_OPENAI_TIMEOUT,
+                    connect=settings.AZURE_OPENAI_CONNECT_TIMEOUT
+                )
+            )
+            self.client = AsyncAzureOpenAI(
                 api_key=settings.AZURE_OPENAI_API_KEY,
                 api_version=settings.AZURE_OPENAI_API_VERSION,
-                azure_endpoint=settings.AZURE_OPENAI_ENDPOINT
+                azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+                max_retries=settings.AZURE_OPENAI_MAX_RETRIES,
+                http_client=http_client
             )
     
     def is_available(self) -> bool:
         """检查 OpenAI 服务是否可用"""
         return self.client is not None
     
-    async def generate_knowledge_summary(self, title: str, content: str) -> str:
+    async def close(self):
+        """关闭客户端并释放连接池"""
+        if self.client is not None:
+            await self.client.close()
+    
+    async def _chat(self, system_prompt: str, prompt: str, max_completion_tokens: int) -> str:
+        """
+        调用聊天补全接口
+        
+        Args:
+            system_prompt: 系统提示词
+            prompt: 用户提示词
+            max_completion_tokens: 最大生成 token 数
+            
+        Returns:
+            去除首尾空白的回复内容
+        """
+        response = await self.client.chat.completions.create(
+            model=settings.AZURE_OPENAI_DEPLOYMENT_NAME,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            max_completion_tokens=max_completion_tokens
+        )
+        return response.choices[0].message.content.strip()
+    
+    async def generate_knowledge_summary(
+        self,
+        title: str,
+        content: str,
+        raise_errors: bool = False
+    ) -> str:
         """
         生成知识点摘要
         
         Args:
             title: 知识点标题
             content: 知识点内容
+            raise_errors: 调用失败时抛出异常而不是返回提示文本（供后台任务重试）
             
         Returns:
             生成的摘要
@@ -40,6 +88,13 @@ class OpenAIService:
         if not self.is_available():
             return "OpenAI 服务未配置"
         
+        cache_key = llm_cache.make_key(
+            "knowledge_summary", settings.AZURE_OPENAI_DEPLOYMENT_NAME, title, content
+        )
+        cached = await llm_cache.get(cache_key)
+        if cached is not MISS:
+            return cached
+        
         prompt = f"""请为以下知识点生成一个简洁的摘要（100字以内）：
 
 标题：{title}
@@ -54,28 +109,30 @@ class OpenAIService:
 """
         
         try:
-            response = self.client.chat.completions.create(
-                model=settings.AZURE_OPENAI_DEPLOYMENT_NAME,
-                messages=[
-                    {"role": "system", "content": "你是一个专业的学习助手，擅长提炼知识要点。"},
-                    {"role": "user", "content": prompt}
-                ],
-                #temperature=0.7,
+            result = await self._chat(
+                "你是一个专业的学习助手，擅长提炼知识要点。",
+                prompt,
                 max_completion_tokens=300
             )
-            
-            result =  response.choices[0].message.content.strip()
             logger.info(f"generate_knowledge_summary result: {result}")
+            await llm_cache.set(cache_key, result)
             return result
         except Exception as e:
+            if raise_errors:
+                raise
             return f"生成摘要失败: {str(e)}"
     
-    async def extract_knowledge_points(self, learning_content: str) -> List[Dict[str, str]]:
+    async def extract_knowledge_points(
+        self,
+        learning_content: str,
+        raise_errors: bool = False
+    ) -> List[Dict[str, str]]:
         """
         从学习内容中提取知识点
         
         Args:
             learning_content: 学习内容
+            raise_errors: 调用或解析失败时抛出异常而不是返回空列表
             
         Returns:
             提取的知识点列表 [{"title": "...", "content": "...", "category": "..."}]
@@ -83,6 +140,13 @@ class OpenAIService:
         if not self.is_available():
             return []
         
+        cache_key = llm_cache.make_key(
+            "extract_knowledge_points", settings.AZURE_OPENAI_DEPLOYMENT_NAME, learning_content
+        )
+        cached = await llm_cache.get(cache_key)
+        if cached is not MISS:
+            return cached
+        
         prompt = f"""请从以下学习内容中提取关键知识点，以JSON格式返回：
 
 {learning_content}
@@ -100,18 +164,12 @@ class OpenAIService:
 """
         
         try:
-            response = self.client.chat.completions.create(
-                model=settings.AZURE_OPENAI_DEPLOYMENT_NAME,
-                messages=[
-                    {"role": "system", "content": "你是一个专业的知识提取助手。请严格按照JSON格式返回结果。"},
-                    {"role": "user", "content": prompt}
-                ],
-                # #temperature=0.5,
+            content = await self._chat(
+                "你是一个专业的知识提取助手。请严格按照JSON格式返回结果。",
+                prompt,
                 max_completion_tokens=2000
             )
             
-            content = response.choices[0].message.content.strip()
-            
             # 尝试解析JSON
             if content.startswith("```json"):
                 content = content[7:]
@@ -122,22 +180,27 @@ class OpenAIService:
             
             knowledge_points = json.loads(content.strip())
             logger.info(f"extract_knowledge_points knowledge_points: {knowledge_points}")
+            await llm_cache.set(cache_key, knowledge_points)
             return knowledge_points
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"提取知识点失败: {str(e)}")
             return []
     
     async def suggest_knowledge_relations(
         self,
         knowledge_point: Dict[str, str],
-        existing_points: List[Dict[str, str]]
+        existing_points: List[Dict[str, str]],
+        raise_errors: bool = False
     ) -> List[Dict[str, any]]:
         """
         建议知识点之间的关系
         
         Args:
             knowledge_point: 当前知识点 {"id": 1, "title": "...", "content": "..."}
-            existing_points: 已有的知识点列表
+            existing_points: 已有的知识点列表（调用方按 RELATION_BATCH_SIZE 分批，控制提示词长度）
+            raise_errors: 调用或解析失败时抛出异常而不是返回空列表
             
         Returns:
             建议的关系列表 [{"target_id": 2, "relation_type": "related", "strength": 0.8, "reason": "..."}]
@@ -147,8 +210,8 @@ class OpenAIService:
         
         # 构建已有知识点的简要列表
         points_summary = "\n".join([
-            f"{p['id']}. {p['title']}: {p.get('summary', p.get('content', ''))[:100]}"
-            for p in existing_points[:20]  # 限制数量避免token过多
+            f"{p['id']}. {p['title']}: {(p.get('summary') or p.get('content') or '')[:100]}"
+            for p in existing_points
         ])
         
         prompt = f"""当前知识点：
@@ -176,18 +239,12 @@ class OpenAIService:
 """
         
         try:
-            response = self.client.chat.completions.create(
-                model=settings.AZURE_OPENAI_DEPLOYMENT_NAME,
-                messages=[
-                    {"role": "system", "content": "你是一个知识图谱构建专家。请严格按照JSON格式返回结果。"},
-                    {"role": "user", "content": prompt}
-                ],
-                #temperature=0.6,
+            content = await self._chat(
+                "你是一个知识图谱构建专家。请严格按照JSON格式返回结果。",
+                prompt,
                 max_completion_tokens=1000
             )
             
-            content = response.choices[0].message.content.strip()
-            
             # 清理JSON标记
             if content.startswith("```json"):
                 content = content[7:]
@@ -200,6 +257,8 @@ class OpenAIService:
             logger.info(f"suggest_knowledge_relations relations: {relations}")
             return relations
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"建议知识关系失败: {str(e)}")
             return []
     
@@ -216,6 +275,7 @@ class OpenAIService:
         if not self.is_available():
             return f"请回顾：{knowledge_point['title']}"
         
+        # 复习问题不走缓存：每次请求都应生成新的问题（“换一题”）
         prompt = f"""根据以下知识点生成一个复习问题：
 
 标题：{knowledge_point['title']}
@@ -228,17 +288,11 @@ class OpenAIService:
 """
         
         try:
-            response = self.client.chat.completions.create(
-                model=settings.AZURE_OPENAI_DEPLOYMENT_NAME,
-                messages=[
-                    {"role": "system", "content": "你是一个专业的教学设计师。"},
-                    {"role": "user", "content": prompt}
-                ],
-                #temperature=0.8,
+            result = await self._chat(
+                "你是一个专业的教学设计师。",
+                prompt,
                 max_completion_tokens=300
             )
-            
-            result = response.choices[0].message.content.strip()
             logger.info(f"generate_review_question result: {result}")
             return result
         except Exception as e:
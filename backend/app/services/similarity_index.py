@@ -0,0 +1,574 @@
+"""
+知识点相似度索引 - 哈希 TF-IDF 向量的内存映射存储
+
+知识点的标题（双倍权重）、摘要和正文按字符 2/3-gram 切分，中文无需分词。
+每个 n-gram 取与进程无关的稳定哈希：低位索引文档频率表（IDF），
+高位决定投影到的维度和符号（带符号的特征哈希），得到 SIMILARITY_DIM 维的单位向量。
+
+向量以知识点ID为行号存放在 vectors.npy，文档频率存放在 df.npy，都以内存映射方式打开：
+同一台机器上的多个工作进程共享操作系统页缓存，不会各自复制一份；
+一个进程写入的行其他进程立即可见，扩容或重建后其他进程在下次访问时重新映射。
+相似查询把向量分块与查询向量做矩阵乘法（余弦相似度），再用 argpartition 合并 top-k。
+
+新增和修改知识点时增量写入对应行，文档频率只在新增时累加；
+增量写入持有文件锁，与其他进程的写入、扩容和重建互斥。
+meta.json 记录索引对应的数据库版本戳（知识点行数、最大ID和 data_versions 版本号），
+进程首次使用索引时与数据库核对，不一致则在后台重建；进程正常退出时更新版本戳。
+数据变化较大导致 IDF 漂移时可以全量重建：
+    python -m app.services.similarity_index --rebuild
+"""
+import json
+import os
+import re
+import sys
+import threading
+from contextlib import contextmanager
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.knowledge import KnowledgePoint
+from ..models.version import DataVersion
+
+try:
+    import fcntl
+except ImportError:  # Windows 下只有进程内锁
+    fcntl = None
+
+
+logger = getLogger(__name__)
+
+_NGRAM_SIZES = (2, 3)
+_DF_BITS = 20
+_DF_MASK = np.uint64((1 << _DF_BITS) - 1)
+_DF_BUCKETS = 1 << _DF_BITS  # df.npy 最后一个元素存文档总数
+_SIGN_BIT = np.uint64(63)
+_PRIMES = (np.uint64(0x9E3779B185EBCA87), np.uint64(0xC2B2AE3D27D4EB4F), np.uint64(0x165667B19E3779F9))
+_WHITESPACE = re.compile(r"\s+")
+_MIN_CAPACITY = 1024
+
+# 相似结果：(知识点ID, 余弦相似度)
+Similar = Tuple[int, float]
+
+
+def document_text(title: Optional[str], content: Optional[str], summary: Optional[str]) -> str:
+    """参与索引的文本，标题重复一次以提高权重"""
+    return "\n".join(part for part in (title, title, summary, content) if part)
+
+
+def _hash_ngrams(text: str) -> np.ndarray:
+    """文本中所有字符 n-gram 的 64 位哈希"""
+    text = _WHITESPACE.sub(" ", text.lower()).strip()
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+
+    hashes = []
+    for n in _NGRAM_SIZES:
+        count = len(codes) - n + 1
+        if count <= 0:
+            continue
+        h = np.full(count, n, dtype=np.uint64)
+        for i in range(n):
+            h = (h * _PRIMES[i]) ^ codes[i:i + count]
+        hashes.append(h)
+    if not hashes:
+        return np.zeros(0, dtype=np.uint64)
+
+    # splitmix64 混合，使高低位都均匀分布
+    h = np.concatenate(hashes)
+    h ^= h >> np.uint64(30)
+    h *= np.uint64(0xBF58476D1CE4E5B9)
+    h ^= h >> np.uint64(27)
+    h *= np.uint64(0x94D049BB133111EB)
+    h ^= h >> np.uint64(31)
+    return h
+
+
+def _features(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """去重后的 n-gram 哈希及其出现次数"""
+    return np.unique(_hash_ngrams(text), return_counts=True)
+
+
+def _df_buckets(features: np.ndarray) -> np.ndarray:
+    return np.unique(features & _DF_MASK).astype(np.int64)
+
+
+def _vectorize(features: np.ndarray, counts: np.ndarray, df: np.ndarray, dim: int) -> np.ndarray:
+    """计算 TF-IDF 加权、投影到 dim 维的单位向量"""
+    vector = np.zeros(dim, dtype=np.float64)
+    if len(features):
+        n_docs = float(df[-1])
+        idf = np.log((n_docs + 1.0) / (df[(features & _DF_MASK).astype(np.int64)] + 1.0)) + 1.0
+        weights = (1.0 + np.log(counts)) * idf
+        signs = np.where((features >> _SIGN_BIT).astype(bool), -1.0, 1.0)
+        dims = ((features >> np.uint64(_DF_BITS)) % np.uint64(dim)).astype(np.int64)
+        vector = np.bincount(dims, weights=weights * signs, minlength=dim)
+
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).astype(np.float32)
+
+
+def _db_stamp(db: Session) -> List[int]:
+    """
+    数据库版本戳：知识点行数、最大ID和 data_versions 中的版本号
+
+    版本号由触发器在每次写入时加一（只在 SQLite 上维护，其他数据库上只比较行数和最大ID），
+    索引文件记录的版本戳与之不符说明数据库在索引之外被修改过（恢复备份、进程异常退出等）。
+    """
+    rows, max_id = db.query(func.count(KnowledgePoint.id), func.max(KnowledgePoint.id)).one()
+    version = db.query(DataVersion.version).filter(
+        DataVersion.table_name == KnowledgePoint.__tablename__
+    ).scalar()
+    return [rows, max_id or 0, version or 0]
+
+
+def _capacity(rows: int) -> int:
+    capacity = _MIN_CAPACITY
+    while capacity < rows:
+        capacity *= 2
+    return capacity
+
+
+class _BuildCancelled(Exception):
+    """进程退出时中止后台重建"""
+
+
+class SimilarityIndex:
+    """基于内存映射文件的知识点相似度索引"""
+
+    def __init__(self, directory: str, dim: int, block_rows: int):
+        self.directory = Path(directory)
+        self.dim = dim
+        self.block_rows = block_rows
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._vectors: Optional[np.memmap] = None
+        self._df: Optional[np.memmap] = None
+        self._inode: Optional[int] = None
+        self._verified = False  # 本进程是否已核对索引文件与数据库一致（或已重建）
+        self._loader: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._file_lock_depth = threading.local()  # 本线程持有文件锁的嵌套层数
+        # 重建期间收到的增量写入，替换文件后按顺序重放
+        self._journal: Optional[List[Tuple[str, tuple]]] = None
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.directory / "vectors.npy"
+
+    @property
+    def df_path(self) -> Path:
+        return self.directory / "df.npy"
+
+    @property
+    def meta_path(self) -> Path:
+        return self.directory / "meta.json"
+
+    @property
+    def ready(self) -> bool:
+        """索引已核对或重建完毕，查询结果与数据库一致"""
+        return self._verified
+
+    # ========== 构建与维护 ==========
+
+    def ensure_loaded(self, db: Session):
+        """
+        打开索引文件并核对数据库版本戳，文件不存在、维度与配置不一致或版本戳不符时从数据库重建
+
+        重建耗时与知识点数量成正比（10 万个约半分钟），应在工作线程中调用。
+        """
+        if self._verified:
+            return
+        with self._build_lock:
+            if self._verified:
+                return
+            stamp = _db_stamp(db)
+            with self._lock:
+                current = self._refresh() and self._read_stamp() == stamp
+            if not current:
+                logger.info("相似度索引不存在或与数据库版本不一致，开始重建")
+                self.rebuild(db, force=False)
+            self._verified = True
+
+    def start_loading(self, session_factory: Callable[[], Session]):
+        """在后台线程中执行 ensure_loaded（已就绪或正在加载时直接返回）"""
+        with self._lock:
+            if self._verified or (self._loader is not None and self._loader.is_alive()):
+                return
+            self._loader = threading.Thread(
+                target=self._load, args=(session_factory,), name="similarity-index", daemon=True
+            )
+            self._loader.start()
+
+    def stop_loading(self):
+        """取消后台加载（进程退出前调用，未完成的重建丢弃，下次启动时重新构建）"""
+        loader = self._loader
+        if loader is None:
+            return
+        self._stopping.set()
+        loader.join()
+        self._stopping.clear()
+
+    def _load(self, session_factory: Callable[[], Session]):
+        try:
+            with session_factory() as db:
+                self.ensure_loaded(db)
+        except _BuildCancelled:
+            logger.info("相似度索引构建已取消")
+        except Exception:
+            logger.exception("相似度索引加载失败")
+
+    def rebuild(self, db: Session, force: bool = True):
+        """
+        从数据库全量重建（两遍：先统计文档频率，再计算向量）
+
+        计算期间不持有查询锁，查询继续使用旧文件；期间的增量写入记入日志，替换文件后重放。
+        force 为 False 时，如果等待文件锁期间其他进程已重建出与数据库一致的索引则直接使用。
+        """
+        # 先开始记录日志再读取版本戳：读取之后提交的写入都会被重放
+        with self._lock:
+            self._journal = []
+        max_id = -1
+        tmp_vectors = self.vectors_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            stamp = _db_stamp(db)
+            _, max_id, _ = stamp
+            rows = db.query(
+                KnowledgePoint.id,
+                KnowledgePoint.title,
+                KnowledgePoint.content,
+                KnowledgePoint.summary
+            ).filter(KnowledgePoint.id <= max_id).order_by(KnowledgePoint.id)
+
+            with self._file_lock():
+                with self._lock:
+                    if not force and self._refresh() and self._read_stamp() == stamp:
+                        return
+
+                df = np.zeros(_DF_BUCKETS + 1, dtype=np.int32)
+                for row in self._cancellable(rows.yield_per(1000)):
+                    features, _ = _features(document_text(row.title, row.content, row.summary))
+                    df[_df_buckets(features)] += 1
+                    df[-1] += 1
+
+                self.directory.mkdir(parents=True, exist_ok=True)
+                vectors = np.lib.format.open_memmap(
+                    tmp_vectors, mode="w+", dtype=np.float32, shape=(_capacity(max_id + 1), self.dim)
+                )
+                for row in self._cancellable(rows.yield_per(1000)):
+                    features, counts = _features(document_text(row.title, row.content, row.summary))
+                    vectors[row.id] = _vectorize(features, counts, df, self.dim)
+                vectors.flush()
+                del vectors
+
+                tmp_df = self.df_path.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp_df, "wb") as f:
+                    np.save(f, df)
+
+                with self._lock:
+                    os.replace(tmp_df, self.df_path)
+                    os.replace(tmp_vectors, self.vectors_path)
+                    self._write_stamp(stamp)
+                    self._close()
+                    self._open()
+                logger.info(f"相似度索引已重建: {int(df[-1])} 个知识点, {self.dim} 维")
+        except BaseException:
+            tmp_vectors.unlink(missing_ok=True)
+            raise
+        finally:
+            # 与增量写入相同，先取文件锁再取进程内锁
+            with self._file_lock(), self._lock:
+                journal, self._journal = self._journal, None
+                for operation, args in journal:
+                    if operation == "upsert":
+                        kp_id, features, counts, is_new = args
+                        # 快照中已有的新增知识点不再累加文档频率
+                        args = (kp_id, features, counts, is_new and kp_id > max_id)
+                    self._apply(operation, args)
+
+    def _cancellable(self, rows: Iterator[Any]) -> Iterator[Any]:
+        for row in rows:
+            if self._stopping.is_set():
+                raise _BuildCancelled()
+            yield row
+
+    def save_stamp(self, db: Session):
+        """
+        记录索引当前对应的数据库版本戳
+
+        进程正常退出时调用：此前本进程的写入都已同步到索引文件，
+        下次启动时版本戳一致即可直接使用；异常退出或数据库被外部修改后会重建。
+        """
+        if not self._verified:
+            return
+        stamp = _db_stamp(db)
+        with self._lock:
+            if self._journal is None and self._refresh():
+                self._vectors.flush()
+                self._df.flush()
+                self._write_stamp(stamp)
+
+    def upsert(
+        self,
+        kp_id: int,
+        title: Optional[str],
+        content: Optional[str],
+        summary: Optional[str],
+        is_new: bool = False
+    ):
+        """
+        写入或更新一个知识点的向量
+
+        索引文件尚未建立时忽略，首次查询构建时会从数据库读取。
+        只有新增知识点时累加文档频率。
+        """
+        features, counts = _features(document_text(title, content, summary))
+        self._write("upsert", (kp_id, features, counts, is_new))
+
+    def remove(self, kp_ids: Sequence[int]):
+        """清零已删除知识点的向量"""
+        self._write("remove", (kp_ids,))
+
+    def _write(self, operation: str, args: tuple):
+        """
+        增量写入：本进程正在重建时记入日志，否则持有文件锁写入
+
+        文档频率累加是读-改-写，文件锁使其与其他进程的写入、扩容和重建互斥；
+        加锁顺序与重建一致（先文件锁、后进程内锁）。
+        """
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((operation, args))
+                return
+            if not self._refresh():
+                # 索引文件尚未建立，构建时会从数据库读取
+                return
+        with self._file_lock(), self._lock:
+            if self._journal is not None:
+                self._journal.append((operation, args))
+                return
+            self._apply(operation, args)
+
+    def _apply(self, operation: str, args: tuple):
+        """执行一次写入（调用方持有文件锁和进程内锁）"""
+        # 没有文件锁时（Windows）文件可能在写入期间被其他进程替换，写入落在旧文件上，重新映射后重做
+        while self._refresh():
+            if operation == "upsert":
+                self._upsert(*args)
+            else:
+                self._remove(*args)
+            if self._is_current():
+                return
+
+    def _upsert(self, kp_id: int, features: np.ndarray, counts: np.ndarray, is_new: bool):
+        if is_new:
+            self._df[_df_buckets(features)] += 1
+            self._df[-1] += 1
+        if kp_id >= len(self._vectors):
+            self._grow(kp_id + 1)
+        self._vectors[kp_id] = _vectorize(features, counts, self._df, self.dim)
+
+    def _remove(self, kp_ids: Sequence[int]):
+        ids = np.asarray(kp_ids, dtype=np.int64)
+        self._vectors[ids[(ids >= 0) & (ids < len(self._vectors))]] = 0
+
+    def invalidate(self):
+        """关闭内存映射，下次访问时重新打开文件，下次查询前重新核对版本戳"""
+        with self._lock:
+            self._close()
+            self._verified = False
+
+    def _open(self) -> bool:
+        try:
+            vectors = np.load(self.vectors_path, mmap_mode="r+")
+            df = np.load(self.df_path, mmap_mode="r+")
+        except (FileNotFoundError, ValueError):
+            return False
+
+        if (
+            vectors.ndim != 2
+            or vectors.shape[1] != self.dim
+            or vectors.dtype != np.float32
+            or df.shape != (_DF_BUCKETS + 1,)
+        ):
+            logger.info("相似度索引与当前配置不一致，需要重建")
+            return False
+
+        self._vectors, self._df = vectors, df
+        self._inode = os.stat(self.vectors_path).st_ino
+        return True
+
+    def _read_stamp(self) -> Optional[List[int]]:
+        try:
+            return json.loads(self.meta_path.read_text())["stamp"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def _write_stamp(self, stamp: List[int]):
+        tmp_meta = self.meta_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_meta.write_text(json.dumps({"stamp": stamp}))
+        os.replace(tmp_meta, self.meta_path)
+
+    def _close(self):
+        self._vectors = None
+        self._df = None
+        self._inode = None
+
+    def _is_current(self) -> bool:
+        """当前映射的是否仍是磁盘上的向量文件"""
+        try:
+            return os.stat(self.vectors_path).st_ino == self._inode
+        except FileNotFoundError:
+            return False
+
+    def _refresh(self) -> bool:
+        """其他进程扩容或重建后文件会被替换，重新映射；返回索引是否可用"""
+        if self._vectors is not None:
+            if self._is_current():
+                return True
+            self._close()
+        return self._open()
+
+    def _grow(self, rows: int):
+        """扩容向量文件（写入新文件后原子替换）"""
+        with self._file_lock():
+            self._refresh()
+            if rows <= len(self._vectors):
+                return
+            tmp_vectors = self.vectors_path.with_suffix(f".{os.getpid()}.tmp")
+            vectors = np.lib.format.open_memmap(
+                tmp_vectors, mode="w+", dtype=np.float32, shape=(_capacity(rows), self.dim)
+            )
+            vectors[:len(self._vectors)] = self._vectors
+            vectors.flush()
+            del vectors
+            os.replace(tmp_vectors, self.vectors_path)
+            self._close()
+            self._open()
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """跨进程互斥增量写入、扩容和重建（同一线程内可重入，写入时扩容不会自锁）"""
+        depth = getattr(self._file_lock_depth, "value", 0)
+        if fcntl is None or depth:
+            self._file_lock_depth.value = depth + 1
+            try:
+                yield
+            finally:
+                self._file_lock_depth.value = depth
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._file_lock_depth.value = 1
+            try:
+                yield
+            finally:
+                self._file_lock_depth.value = 0
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ========== 查询 ==========
+
+    def similar(self, kp_ids: Sequence[int], k: int) -> List[List[Similar]]:
+        """
+        批量查询与每个知识点最相似的 k 个知识点
+
+        Returns:
+            与 kp_ids 一一对应的 [(知识点ID, 相似度), ...]，按相似度降序，
+            不含自身和相似度不大于 0 的结果（未索引或已删除的知识点）
+        """
+        with self._lock:
+            if not self._refresh():
+                return [[] for _ in kp_ids]
+            vectors = self._vectors
+
+        queries = np.zeros((len(kp_ids), self.dim), dtype=np.float32)
+        for row, kp_id in enumerate(kp_ids):
+            if 0 <= kp_id < len(vectors):
+                queries[row] = vectors[kp_id]
+        return self._search(vectors, queries, k, exclude=kp_ids)
+
+    def _search(
+        self,
+        vectors: np.ndarray,
+        queries: np.ndarray,
+        k: int,
+        exclude: Sequence[int] = ()
+    ) -> List[List[Similar]]:
+        num_queries = len(queries)
+        best_scores = np.empty((num_queries, 0), dtype=np.float32)
+        best_ids = np.empty((num_queries, 0), dtype=np.int64)
+
+        for start in range(0, len(vectors), self.block_rows):
+            block = vectors[start:start + self.block_rows]
+            scores = queries @ block.T  # (查询数, 本块行数)
+            for row, kp_id in enumerate(exclude):
+                if start <= kp_id < start + len(block):
+                    scores[row, kp_id - start] = -np.inf
+
+            ids = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_ids = np.concatenate([best_ids, ids], axis=1)
+            if best_scores.shape[1] > k:
+                top = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, top, axis=1)
+                best_ids = np.take_along_axis(best_ids, top, axis=1)
+
+        results = []
+        for scores, ids in zip(best_scores, best_ids):
+            order = np.argsort(-scores, kind="stable")
+            results.append([
+                (int(ids[i]), round(float(scores[i]), 4))
+                for i in order
+                if scores[i] > 0
+            ])
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        """索引规模"""
+        with self._lock:
+            if not self._refresh():
+                return {
+                    "loaded": False,
+                    "ready": self._verified,
+                    "rows": 0,
+                    "documents": 0,
+                    "dim": self.dim,
+                    "nbytes": 0
+                }
+            return {
+                "loaded": True,
+                "ready": self._verified,
+                "rows": len(self._vectors),
+                "documents": int(self._df[-1]),
+                "dim": self.dim,
+                "nbytes": self._vectors.nbytes + self._df.nbytes
+            }
+
+
+# 创建全局实例
+similarity_index = SimilarityIndex(
+    directory=settings.SIMILARITY_INDEX_DIR,
+    dim=settings.SIMILARITY_DIM,
+    block_rows=settings.SIMILARITY_BLOCK_ROWS
+)
+
+
+def main(argv: List[str]) -> int:
+    from ..db.database import SessionLocal
+
+    if "--rebuild" not in argv:
+        print("用法: python -m app.services.similarity_index --rebuild")
+        return 1
+    with SessionLocal() as db:
+        similarity_index.rebuild(db)
+    print(similarity_index.stats())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,14 +1,189 @@
 """
 遗忘曲线算法实现 - 基于 SuperMemo SM-2 算法
 该算法根据复习质量动态调整复习间隔
+
+调度器以 NumPy 数组批量计算，一次调用即可处理整套卡片；
+新的算法实现 Scheduler 接口并通过 register_scheduler 注册即可替换 SM-2。
+优先级规则同时提供等价的 SQL 表达式，复习计划可以直接在数据库中按优先级聚合。
 """
+from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
-from typing import Tuple
+from typing import Dict, NamedTuple, Optional, Tuple, Type
+
+import numpy as np
+from sqlalchemy import and_, case
+from sqlalchemy.sql.elements import ColumnElement
+
+from ..core.config import settings
+
+
+PRIORITY_LEVELS = ("high", "medium", "low")
+
+_ONE_DAY = np.timedelta64(1, "D")
+
+
+class ScheduleResult(NamedTuple):
+    """批量调度结果，各字段为等长数组"""
+    ease_factor: np.ndarray  # float64
+    interval: np.ndarray  # int64，天
+    repetitions: np.ndarray  # int64
+    next_review_date: np.ndarray  # datetime64[us]
+
+
+def _now64(now: Optional[datetime]) -> np.datetime64:
+    return np.datetime64(now or datetime.utcnow(), "us")
+
+
+class Scheduler(ABC):
+    """间隔重复调度器接口（批量）"""
+
+    name: str = ""
+
+    @abstractmethod
+    def schedule(
+        self,
+        quality: np.ndarray,
+        ease_factor: np.ndarray,
+        interval: np.ndarray,
+        repetitions: np.ndarray,
+        now: Optional[datetime] = None
+    ) -> ScheduleResult:
+        """
+        根据复习质量批量计算新的复习参数
+
+        Args:
+            quality: 复习质量评分 (0-5)
+            ease_factor: 难易度因子
+            interval: 当前间隔天数
+            repetitions: 重复次数
+            now: 复习时间，默认为当前 UTC 时间（整批只读取一次）
+
+        Returns:
+            新的 ease_factor、interval、repetitions 和下次复习日期
+        """
+
+    @abstractmethod
+    def priority(
+        self,
+        next_review_date: np.ndarray,
+        ease_factor: np.ndarray,
+        now: Optional[datetime] = None
+    ) -> np.ndarray:
+        """批量计算复习优先级，返回 "high" / "medium" / "low" 字符串数组"""
+
+    @abstractmethod
+    def priority_expression(
+        self,
+        next_review_date: ColumnElement,
+        ease_factor: ColumnElement,
+        now: Optional[datetime] = None
+    ) -> ColumnElement:
+        """与 priority 等价的 SQL 表达式，用于在数据库中按优先级聚合和过滤"""
+
+    @abstractmethod
+    def estimate_time(self, repetitions: np.ndarray, ease_factor: np.ndarray) -> np.ndarray:
+        """批量估算复习时间（分钟），返回整数数组"""
+
+
+class SM2Scheduler(Scheduler):
+    """SuperMemo SM-2 算法的向量化实现"""
+
+    name = "sm2"
+
+    def schedule(self, quality, ease_factor, interval, repetitions, now=None) -> ScheduleResult:
+        # 确保 quality 在有效范围内
+        quality = np.clip(np.asarray(quality, dtype=np.int64), 0, 5)
+        ease_factor = np.asarray(ease_factor, dtype=np.float64)
+        interval = np.asarray(interval, dtype=np.int64)
+        repetitions = np.asarray(repetitions, dtype=np.int64)
+
+        # 计算新的难易度因子，不能低于 1.3
+        lapse = 5 - quality
+        new_ease_factor = np.maximum(1.3, ease_factor + (0.1 - lapse * (0.08 + lapse * 0.02)))
+
+        # 质量差时重置重复次数和间隔，否则按重复次数计算新间隔
+        passed = quality >= 3
+        new_repetitions = np.where(passed, repetitions + 1, 0)
+        new_interval = np.select(
+            [~passed, new_repetitions == 1, new_repetitions == 2],
+            [1, 1, 6],
+            default=np.rint(interval * new_ease_factor).astype(np.int64)
+        ).astype(np.int64)
+
+        # 计算下次复习日期
+        next_review_date = _now64(now) + new_interval * _ONE_DAY
+
+        return ScheduleResult(new_ease_factor, new_interval, new_repetitions, next_review_date)
+
+    def priority(self, next_review_date, ease_factor, now=None) -> np.ndarray:
+        next_review_date = np.asarray(next_review_date, dtype="datetime64[us]")
+        ease_factor = np.asarray(ease_factor, dtype=np.float64)
+
+        # 与 timedelta.days 一致，向下取整
+        days_until_review = (next_review_date - _now64(now)) // _ONE_DAY
+
+        return np.select(
+            [
+                # 已逾期或今天需要复习
+                days_until_review <= 0,
+                # 难易度因子低（困难）且即将需要复习
+                (ease_factor < 2.0) & (days_until_review <= 2),
+                # 未来1-3天需要复习
+                days_until_review <= 3
+            ],
+            ["high", "high", "medium"],
+            default="low"
+        )
+
+    def priority_expression(self, next_review_date, ease_factor, now=None) -> ColumnElement:
+        now = now or datetime.utcnow()
+
+        # days_until_review <= n 等价于 next_review_date < now + (n + 1) 天，
+        # 直接比较日期时间即可，不依赖数据库的日期函数
+        return case(
+            (next_review_date < now + timedelta(days=1), "high"),
+            (and_(ease_factor < 2.0, next_review_date < now + timedelta(days=3)), "high"),
+            (next_review_date < now + timedelta(days=4), "medium"),
+            else_="low"
+        )
+
+    def estimate_time(self, repetitions, ease_factor) -> np.ndarray:
+        repetitions = np.asarray(repetitions, dtype=np.float64)
+        ease_factor = np.asarray(ease_factor, dtype=np.float64)
+
+        # 基础时间5分钟，熟练度越高越快，越困难花费时间越多
+        base_time = 5
+        time_reduction = np.minimum(repetitions * 0.5, 3)
+        difficulty_adjustment = np.maximum(0, (3.0 - ease_factor) * 2)
+
+        estimated_time = base_time - time_reduction + difficulty_adjustment
+
+        return np.maximum(2, np.rint(estimated_time)).astype(np.int64)  # 最少2分钟
+
+
+_SCHEDULERS: Dict[str, Type[Scheduler]] = {}
+
+
+def register_scheduler(scheduler_cls: Type[Scheduler]) -> Type[Scheduler]:
+    """注册调度算法（可用作类装饰器）"""
+    _SCHEDULERS[scheduler_cls.name] = scheduler_cls
+    return scheduler_cls
+
+
+def get_scheduler(name: Optional[str] = None) -> Scheduler:
+    """获取调度器实例，默认使用配置的 SCHEDULER_ALGORITHM"""
+    name = name or settings.SCHEDULER_ALGORITHM
+    if name not in _SCHEDULERS:
+        raise ValueError(f"未知的调度算法: {name}")
+    return _SCHEDULERS[name]()
+
+
+register_scheduler(SM2Scheduler)
 
 
 class SpacedRepetitionAlgorithm:
-    """间隔重复算法（SuperMemo SM-2）"""
-    
+    """间隔重复算法（单张卡片接口，委托给配置的批量调度器）"""
+
     @staticmethod
     def calculate_next_review(
         quality: int,
@@ -18,7 +193,7 @@ class SpacedRepetitionAlgorithm:
     ) -> Tuple[float, int, int, datetime]:
         """
         计算下次复习时间
-        
+
         Args:
             quality: 复习质量评分 (0-5)
                 0: 完全不记得
@@ -30,89 +205,42 @@ class SpacedRepetitionAlgorithm:
             ease_factor: 难易度因子 (初始值 2.5)
             interval: 当前间隔天数
             repetitions: 重复次数
-            
+
         Returns:
             (新的ease_factor, 新的interval, 新的repetitions, 下次复习日期)
         """
-        # 确保 quality 在有效范围内
-        quality = max(0, min(5, quality))
-        
-        # 计算新的难易度因子
-        new_ease_factor = ease_factor + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
-        
-        # 难易度因子不能低于 1.3
-        new_ease_factor = max(1.3, new_ease_factor)
-        
-        # 根据质量决定是否增加重复次数
-        if quality < 3:
-            # 如果质量差，重置重复次数和间隔
-            new_repetitions = 0
-            new_interval = 1
-        else:
-            new_repetitions = repetitions + 1
-            
-            # 根据重复次数计算新间隔
-            if new_repetitions == 1:
-                new_interval = 1
-            elif new_repetitions == 2:
-                new_interval = 6
-            else:
-                new_interval = round(interval * new_ease_factor)
-        
-        # 计算下次复习日期
-        next_review_date = datetime.utcnow() + timedelta(days=new_interval)
-        
-        return new_ease_factor, new_interval, new_repetitions, next_review_date
-    
+        result = get_scheduler().schedule([quality], [ease_factor], [interval], [repetitions])
+        return (
+            float(result.ease_factor[0]),
+            int(result.interval[0]),
+            int(result.repetitions[0]),
+            result.next_review_date[0].astype(datetime)
+        )
+
     @staticmethod
     def get_priority_level(next_review_date: datetime, ease_factor: float) -> str:
         """
         获取复习优先级
-        
+
         Args:
             next_review_date: 下次复习日期
             ease_factor: 难易度因子
-            
+
         Returns:
             优先级: "high", "medium", "low"
         """
-        days_until_review = (next_review_date - datetime.utcnow()).days
-        
-        # 已逾期或今天需要复习
-        if days_until_review <= 0:
-            return "high"
-        # 难易度因子低（困难）且即将需要复习
-        elif ease_factor < 2.0 and days_until_review <= 2:
-            return "high"
-        # 未来1-3天需要复习
-        elif days_until_review <= 3:
-            return "medium"
-        else:
-            return "low"
-    
+        return str(get_scheduler().priority([next_review_date], [ease_factor])[0])
+
     @staticmethod
     def estimate_review_time(repetitions: int, ease_factor: float) -> int:
         """
         估算复习时间（分钟）
-        
+
         Args:
             repetitions: 重复次数
             ease_factor: 难易度因子
-            
+
         Returns:
             预估时间（分钟）
         """
-        # 基础时间：5分钟
-        base_time = 5
-        
-        # 根据重复次数减少时间（熟练度提高）
-        time_reduction = min(repetitions * 0.5, 3)
-        
-        # 根据难易度因子调整时间
-        difficulty_factor = 3.0 - ease_factor  # 越困难花费时间越多
-        difficulty_adjustment = max(0, difficulty_factor * 2)
-        
-        estimated_time = base_time - time_reduction + difficulty_adjustment
-        
-        return max(2, round(estimated_time))  # 最少2分钟
-
+        return int(get_scheduler().estimate_time([repetitions], [ease_factor])[0])
@@ -0,0 +1,272 @@
+"""
+统计服务 - 仪表盘统计和每日学习、复习汇总
+
+SQLite 上读取由触发器维护的计数表（category_stats、review_stats，见迁移 0006）
+和每日汇总表（daily_learning_stats、daily_review_stats，见迁移 0007），
+读取代价与知识点和复习记录数量无关；其他数据库上直接聚合查询。
+计数或汇总出现偏差时可以重建：
+    python -m app.services.stats_service --rebuild
+"""
+import asyncio
+import sys
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Date, case, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.knowledge import KnowledgePoint, LearningContent, ReviewRecord
+from ..models.stats import CategoryStats, ReviewStats, DailyLearningStats, DailyReviewStats
+
+
+UNCATEGORIZED = "未分类"
+QUALITY_LEVELS = range(6)
+
+
+class StatsService:
+    """统计服务"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    @property
+    def _counters_maintained(self) -> bool:
+        """计数表只在 SQLite 上由触发器维护"""
+        return self.db.bind.dialect.name == "sqlite"
+    
+    # ========== 查询 ==========
+    
+    async def get_category_stats(self) -> List[Dict[str, Any]]:
+        """
+        各分类的知识点数、已掌握数和难度因子之和
+        
+        Returns:
+            [{"category": "分类", "point_count": 10, "mastered_count": 3, "ease_factor_sum": 25.0}]，
+            未分类为空字符串
+        """
+        query = (
+            select(
+                CategoryStats.category,
+                CategoryStats.point_count,
+                CategoryStats.mastered_count,
+                CategoryStats.ease_factor_sum
+            )
+            if self._counters_maintained
+            else self._category_aggregate()
+        )
+        rows = await self.db.execute(query)
+        return [
+            {
+                "category": row.category,
+                "point_count": row.point_count,
+                "mastered_count": row.mastered_count or 0,
+                "ease_factor_sum": row.ease_factor_sum or 0.0
+            }
+            for row in rows.mappings()
+        ]
+    
+    async def get_review_totals(self) -> Dict[str, int]:
+        """复习记录总数和复习质量之和"""
+        query = (
+            select(ReviewStats.review_count, ReviewStats.quality_sum).where(ReviewStats.id == 1)
+            if self._counters_maintained
+            else self._review_aggregate()
+        )
+        row = (await self.db.execute(query)).first()
+        return {
+            "review_count": row.review_count if row else 0,
+            "quality_sum": (row.quality_sum or 0) if row else 0
+        }
+    
+    async def get_knowledge_summary(self) -> Dict[str, Any]:
+        """知识点总数、掌握情况和按分类计数"""
+        categories = await self.get_category_stats()
+        total = sum(c["point_count"] for c in categories)
+        mastered = sum(c["mastered_count"] for c in categories)
+        
+        return {
+            "total": total,
+            "mastered": mastered,
+            "in_progress": total - mastered,
+            "mastery_rate": round(mastered / total * 100, 2) if total > 0 else 0,
+            "by_category": {
+                c["category"] or UNCATEGORIZED: c["point_count"] for c in categories
+            }
+        }
+    
+    async def get_categories(self) -> List[Dict[str, Any]]:
+        """各分类的知识点数、平均难度因子和掌握率"""
+        return [
+            {
+                "name": c["category"] or UNCATEGORIZED,
+                "count": c["point_count"],
+                "average_ease_factor": round(c["ease_factor_sum"] / c["point_count"], 2),
+                "mastered_count": c["mastered_count"],
+                "mastery_rate": round(c["mastered_count"] / c["point_count"] * 100, 2)
+            }
+            for c in await self.get_category_stats()
+            if c["point_count"] > 0
+        ]
+    
+    async def get_average_quality(self) -> float:
+        """全部复习记录的平均质量"""
+        totals = await self.get_review_totals()
+        if not totals["review_count"]:
+            return 0
+        return round(totals["quality_sum"] / totals["review_count"], 2)
+    
+    # ========== 每日汇总 ==========
+    
+    async def get_daily_learning(self, start_day: date) -> Dict[str, int]:
+        """start_day（含）以来每天的学习内容数量 {"YYYY-MM-DD": 数量}，没有学习的日期不返回"""
+        query = (
+            select(DailyLearningStats.day, DailyLearningStats.item_count)
+            .where(DailyLearningStats.day >= start_day)
+            if self._counters_maintained
+            else self._daily_learning_aggregate(start_day)
+        )
+        rows = await self.db.execute(query.order_by("day"))
+        return {row.day.isoformat(): row.item_count for row in rows}
+    
+    async def get_daily_reviews(self, start_day: date) -> Dict[str, Dict[str, Any]]:
+        """
+        start_day（含）以来每天的复习汇总，没有复习的日期不返回
+        
+        Returns:
+            {"YYYY-MM-DD": {"count": 10, "average_quality": 3.5,
+                            "quality_distribution": [0-5 各评分次数], "time_spent_seconds": 600}}
+        """
+        query = (
+            select(DailyReviewStats.__table__).where(DailyReviewStats.day >= start_day)
+            if self._counters_maintained
+            else self._daily_review_aggregate(start_day)
+        )
+        rows = await self.db.execute(query.order_by("day"))
+        return {
+            row.day.isoformat(): {
+                "count": row.review_count,
+                "average_quality": round(row.quality_sum / row.review_count, 2),
+                "quality_distribution": [getattr(row, f"quality_{q}") for q in QUALITY_LEVELS],
+                "time_spent_seconds": row.time_spent_seconds
+            }
+            for row in rows
+            if row.review_count > 0
+        }
+    
+    async def get_review_count_on(self, day: date) -> int:
+        """某一天的复习次数"""
+        return (await self.get_daily_reviews(day)).get(day.isoformat(), {}).get("count", 0)
+    
+    # ========== 重建 ==========
+    
+    async def rebuild(self):
+        """按当前数据重新计算计数表和每日汇总表（在一个事务中替换）"""
+        await self.db.execute(delete(CategoryStats))
+        await self.db.execute(
+            insert(CategoryStats).from_select(
+                ["category", "point_count", "mastered_count", "ease_factor_sum"],
+                self._category_aggregate()
+            )
+        )
+        
+        totals = (await self.db.execute(self._review_aggregate())).one()
+        result = await self.db.execute(
+            update(ReviewStats)
+            .where(ReviewStats.id == 1)
+            .values(review_count=totals.review_count, quality_sum=totals.quality_sum)
+        )
+        if result.rowcount == 0:
+            self.db.add(ReviewStats(
+                id=1, review_count=totals.review_count, quality_sum=totals.quality_sum
+            ))
+        
+        await self.db.execute(delete(DailyLearningStats))
+        await self.db.execute(
+            insert(DailyLearningStats).from_select(
+                ["day", "item_count"], self._daily_learning_aggregate()
+            )
+        )
+        await self.db.execute(delete(DailyReviewStats))
+        await self.db.execute(
+            insert(DailyReviewStats).from_select(
+                [
+                    "day", "review_count", "quality_sum",
+                    *[f"quality_{q}" for q in QUALITY_LEVELS],
+                    "time_spent_seconds"
+                ],
+                self._daily_review_aggregate()
+            )
+        )
+        await self.db.commit()
+    
+    @staticmethod
+    def _category_aggregate():
+        category = func.coalesce(KnowledgePoint.category, "")
+        return select(
+            category.label("category"),
+            func.count(KnowledgePoint.id).label("point_count"),
+            func.coalesce(
+                func.sum(case((KnowledgePoint.is_mastered == True, 1), else_=0)), 0
+            ).label("mastered_count"),
+            func.coalesce(func.sum(KnowledgePoint.ease_factor), 0.0).label("ease_factor_sum")
+        ).group_by(category)
+    
+    @staticmethod
+    def _daily_learning_aggregate(start_day: Optional[date] = None):
+        day = func.date(LearningContent.learning_date, type_=Date)
+        query = select(
+            day.label("day"),
+            func.count(LearningContent.id).label("item_count")
+        ).where(LearningContent.learning_date.isnot(None)).group_by(day)
+        if start_day:
+            query = query.where(LearningContent.learning_date >= datetime.combine(start_day, time.min))
+        return query
+    
+    @staticmethod
+    def _daily_review_aggregate(start_day: Optional[date] = None):
+        day = func.date(ReviewRecord.reviewed_at, type_=Date)
+        query = select(
+            day.label("day"),
+            func.count(ReviewRecord.id).label("review_count"),
+            func.sum(ReviewRecord.quality).label("quality_sum"),
+            *[
+                func.sum(case((ReviewRecord.quality == q, 1), else_=0)).label(f"quality_{q}")
+                for q in QUALITY_LEVELS
+            ],
+            func.coalesce(func.sum(ReviewRecord.time_spent_seconds), 0).label("time_spent_seconds")
+        ).where(ReviewRecord.reviewed_at.isnot(None)).group_by(day)
+        if start_day:
+            query = query.where(ReviewRecord.reviewed_at >= datetime.combine(start_day, time.min))
+        return query
+    
+    @staticmethod
+    def _review_aggregate():
+        return select(
+            func.count(ReviewRecord.id).label("review_count"),
+            func.coalesce(func.sum(ReviewRecord.quality), 0).label("quality_sum")
+        )
+
+
+async def _rebuild():
+    from ..db.database import AsyncSessionLocal, dispose_engines
+
+    try:
+        async with AsyncSessionLocal() as db:
+            service = StatsService(db)
+            await service.rebuild()
+            print(await service.get_knowledge_summary())
+            print(await service.get_review_totals())
+    finally:
+        await dispose_engines()
+
+
+def main(argv: List[str]) -> int:
+    if "--rebuild" not in argv:
+        print("用法: python -m app.services.stats_service --rebuild")
+        return 1
+    asyncio.run(_rebuild())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,10 @@
+"""
+性能基准脚本
+
+在 backend 目录下以模块方式运行，每个脚本在临时目录中建立独立的数据库，不读取 .env 中的 Azure 配置：
+    python -m benchmarks.llm_concurrency
+    python -m benchmarks.async_stack
+    python -m benchmarks.list_serialization
+
+结果与机器相关，用于对比同一台机器上改动前后的数字（切换到改动前的提交运行同一脚本）。
+"""
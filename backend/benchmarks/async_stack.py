@@ -0,0 +1,109 @@
+"""
+异步数据库栈基准
+
+启动一个 uvicorn 进程，用多个线程同时读（GET /review/due）写（POST /review/），
+统计固定时长内的吞吐量和延迟分位数。数据在服务启动建表后直接写入，
+同一脚本也能在改动前的同步栈提交上运行，用于对比。
+
+    python -m benchmarks.async_stack [--readers 8] [--writers 8] [--duration 8] [--points 20000]
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from .common import percentiles, seed_knowledge_points, setup
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 60):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"服务启动失败，退出码 {process.returncode}")
+        try:
+            httpx.get(f"{base_url}/review/due", timeout=5)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError("等待服务启动超时")
+
+
+def _load(base_url: str, readers: int, writers: int, duration: float, points: int) -> Dict[str, List]:
+    import httpx
+
+    latencies: Dict[str, List] = {"read": [], "write": [], "errors": []}
+    stop_at = time.monotonic() + duration
+
+    def read():
+        with httpx.Client(timeout=60) as client:
+            while time.monotonic() < stop_at:
+                started = time.perf_counter()
+                response = client.get(f"{base_url}/review/due", params={"limit": 20})
+                latencies["read"].append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    latencies["errors"].append(response.text[:80])
+
+    def write():
+        rng = random.Random()
+        with httpx.Client(timeout=60) as client:
+            while time.monotonic() < stop_at:
+                body = {"knowledge_point_id": rng.randint(1, points), "quality": 4}
+                started = time.perf_counter()
+                response = client.post(f"{base_url}/review/", json=body)
+                latencies["write"].append(time.perf_counter() - started)
+                if response.status_code != 201:
+                    latencies["errors"].append(response.text[:80])
+
+    threads = [threading.Thread(target=read) for _ in range(readers)]
+    threads += [threading.Thread(target=write) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=8)
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    database = setup()
+    base_url = f"http://127.0.0.1:{args.port}/api/v1"
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=os.environ.copy()
+    )
+    try:
+        _wait_ready(base_url, process)
+        seed_knowledge_points(database, args.points)
+        latencies = _load(base_url, args.readers, args.writers, args.duration, args.points)
+    finally:
+        process.terminate()
+        process.wait()
+
+    print(f"{args.readers} 个读线程 + {args.writers} 个写线程，{args.duration}s，{args.points} 个知识点")
+    for kind, label in (("read", "GET /review/due"), ("write", "POST /review/")):
+        samples = latencies[kind]
+        print(f"  {label}: {len(samples) / args.duration:.0f} 次/秒，延迟(ms) {percentiles(samples)}")
+    if latencies["errors"]:
+        print(f"  失败 {len(latencies['errors'])} 次，例如: {latencies['errors'][0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+基准脚本公共部分：临时数据库、占位配置和造数
+
+setup() 必须在导入 app 之前调用，配置在导入时读取。
+"""
+import logging
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+
+def setup(**env: str) -> Path:
+    """在临时目录中配置数据库、相似度索引和 LLM 缓存，返回数据库文件路径"""
+    tmpdir = Path(tempfile.mkdtemp(prefix="learner-bench-"))
+    database = tmpdir / "bench.db"
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{database}",
+        "SIMILARITY_INDEX_DIR": str(tmpdir / "similarity_index"),
+        "LLM_CACHE_PATH": "",
+        "RESPONSE_CACHE_ENABLED": "false",
+        "AZURE_OPENAI_ENDPOINT": "https://benchmark.openai.azure.com",
+        "AZURE_OPENAI_API_KEY": "benchmark",
+        "AZURE_OPENAI_DEPLOYMENT_NAME": "benchmark",
+        "AZURE_OPENAI_API_VERSION": "2024-06-01",
+        **env
+    })
+    logging.disable(logging.INFO)
+    return database
+
+
+def migrate(database: Path):
+    """建表（与应用启动时相同的 Alembic 迁移）"""
+    from sqlalchemy import create_engine
+
+    from app.db.migrate import upgrade_database
+
+    engine = create_engine(f"sqlite:///{database}")
+    upgrade_database(engine)
+    engine.dispose()
+
+
+def _timestamp(value: datetime) -> str:
+    # 与 SQLAlchemy 写入 SQLite 的格式一致（游标分页按字符串比较）
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def seed_knowledge_points(database: Path, count: int, content_length: int = 300, seed: int = 1):
+    """直接用 sqlite3 批量写入知识点，一半已到期；计数、汇总和全文索引由触发器维护"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    rows = []
+    for i in range(count):
+        created_at = now - timedelta(minutes=count - i)
+        rows.append((
+            f"知识点 {i}",
+            f"内容 {i} " + "学习" * (content_length // 2),
+            f"摘要 {i}",
+            f"分类{i % 20}",
+            2.5,
+            rng.randint(0, 30),
+            rng.randint(0, 5),
+            _timestamp(now + timedelta(days=rng.randint(-15, 15))),
+            _timestamp(created_at),
+            _timestamp(created_at),
+            0
+        ))
+    with sqlite3.connect(database) as conn:
+        conn.executemany(
+            "INSERT INTO knowledge_points (title, content, summary, category, ease_factor, interval, "
+            "repetitions, next_review_date, created_at, updated_at, is_mastered) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+
+def seed_learning_contents(database: Path, count: int, knowledge_points: int):
+    """批量写入学习内容，依次关联到已有知识点"""
+    now = datetime.utcnow()
+    rows = [
+        (
+            i % knowledge_points + 1,
+            f"学习内容 {i}",
+            "web",
+            _timestamp(now - timedelta(minutes=count - i)),
+            _timestamp(now)
+        )
+        for i in range(count)
+    ]
+    with sqlite3.connect(database) as conn:
+        conn.executemany(
+            "INSERT INTO learning_contents (knowledge_point_id, content, source, learning_date, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+
+
+def percentiles(samples: Sequence[float], points: Tuple[int, ...] = (50, 99)) -> Dict[str, float]:
+    """毫秒为单位的分位数"""
+    if len(samples) < 2:
+        return {f"p{p}": round(samples[0] * 1000, 1) if samples else 0.0 for p in points}
+    quantiles: List[float] = statistics.quantiles(samples, n=100)
+    return {f"p{p}": round(quantiles[p - 1] * 1000, 1) for p in points}
@@ -0,0 +1,70 @@
+"""
+列表与复习计划响应的序列化基准
+
+在 ASGI 进程内重复请求大列表，统计每个响应消耗的 CPU 时间（process_time）和墙钟时间，
+覆盖 /knowledge/、/learning/ 和 /review/due 的 1k、10k 行响应以及 /review/plan。
+
+    python -m benchmarks.list_serialization [--points 20000] [--learning 20000] [--budget 30000]
+"""
+import argparse
+import asyncio
+import time
+
+from .common import migrate, seed_knowledge_points, seed_learning_contents, setup
+
+
+CASES = [
+    ("/api/v1/knowledge/", {"limit": 1000}),
+    ("/api/v1/knowledge/", {"limit": 10000}),
+    ("/api/v1/learning/", {"limit": 1000}),
+    ("/api/v1/learning/", {"limit": 10000}),
+    ("/api/v1/review/due", {"limit": 1000}),
+    ("/api/v1/review/due", {"limit": 10000}),
+    ("/api/v1/review/plan", {"page_size": 200}),
+    ("/api/v1/review/plan/high", {"limit": 200}),
+]
+
+
+async def run(budget: int):
+    import httpx
+
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for url, params in CASES:
+            response = await client.get(url, params=params)
+            assert response.status_code == 200, response.text
+            # 响应越大重复次数越少，每个用例总共处理约 budget 行（按每行约 300 字节估算）
+            repeats = min(50, max(3, budget // max(1, len(response.content) // 300)))
+
+            cpu_started, wall_started = time.process_time(), time.perf_counter()
+            for _ in range(repeats):
+                response = await client.get(url, params=params)
+            cpu = (time.process_time() - cpu_started) / repeats * 1000
+            wall = (time.perf_counter() - wall_started) / repeats * 1000
+
+            body = response.json()
+            rows = len(body) if isinstance(body, list) else "-"
+            print(
+                f"{url} {params}: 行数 {rows}，{len(response.content)} 字节，"
+                f"CPU {cpu:.1f}ms，耗时 {wall:.1f}ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--learning", type=int, default=20000)
+    parser.add_argument("--budget", type=int, default=30000)
+    args = parser.parse_args()
+
+    database = setup()
+    migrate(database)
+    seed_knowledge_points(database, args.points)
+    seed_learning_contents(database, args.learning, args.points)
+    asyncio.run(run(args.budget))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+并发 LLM 调用基准
+
+把 Azure OpenAI 的聊天补全替换为固定延迟的桩，同时发起多个 GET /review/question/{id}，
+对比逐个调用与并发调用的总耗时：共享的异步客户端下，并发调用的总耗时应接近单次延迟。
+
+    python -m benchmarks.llm_concurrency [--requests 10] [--latency 0.5]
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from .common import migrate, setup
+
+
+async def _fake_completion(latency: float, **kwargs):
+    await asyncio.sleep(latency)
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="复习问题"))])
+
+
+async def run(requests: int, latency: float):
+    import httpx
+
+    from app.main import app
+    from app.services.openai_service import openai_service
+
+    async def create(**kwargs):
+        return await _fake_completion(latency, **kwargs)
+
+    openai_service.client.chat.completions.create = create
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        response = await client.post(
+            "/api/v1/knowledge/",
+            params={"generate_summary": False},
+            json={"title": "二分查找", "content": "在有序数组中每次折半缩小查找范围"}
+        )
+        kp_id = response.json()["id"]
+        url = f"/api/v1/review/question/{kp_id}"
+
+        started = time.perf_counter()
+        for _ in range(requests):
+            assert (await client.get(url)).status_code == 200
+        sequential = time.perf_counter() - started
+
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(client.get(url) for _ in range(requests)))
+        concurrent = time.perf_counter() - started
+        assert all(response.status_code == 200 for response in responses)
+
+    print(f"{requests} 个请求，单次 LLM 延迟 {latency}s")
+    print(f"  逐个调用: {sequential:.2f}s")
+    print(f"  并发调用: {concurrent:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    database = setup(LLM_CACHE_ENABLED="false")
+    migrate(database)
+    asyncio.run(run(args.requests, args.latency))
+
+
+if __name__ == "__main__":
+    main()
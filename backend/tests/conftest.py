@@ -0,0 +1,42 @@
+"""
+测试配置：临时目录中的 SQLite 数据库和相似度索引，不访问 Azure OpenAI
+"""
+import os
+import tempfile
+
+import pytest
+
+_TMP_DIR = tempfile.mkdtemp(prefix="learner-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP_DIR}/learner.db"
+os.environ["SIMILARITY_INDEX_DIR"] = os.path.join(_TMP_DIR, "similarity_index")
+os.environ["LLM_CACHE_PATH"] = ""
+for name, value in (
+    ("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com"),
+    ("AZURE_OPENAI_API_KEY", "test"),
+    ("AZURE_OPENAI_DEPLOYMENT_NAME", "test"),
+    ("AZURE_OPENAI_API_VERSION", "2024-06-01"),
+):
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def create_point(client):
+    """创建知识点（不生成摘要），返回ID"""
+    def create(title: str, content: str = "测试内容", **fields) -> int:
+        response = client.post(
+            "/api/v1/knowledge/",
+            params={"generate_summary": False},
+            json={"title": title, "content": content, **fields}
+        )
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+    return create
@@ -0,0 +1,43 @@
+"""
+AI 富化任务：任务与记录同事务提交，知识提取重试用尽后关联默认知识点
+"""
+import time
+
+from app.core.config import settings
+from app.services.job_queue import JobStatus
+from app.services.openai_service import openai_service
+
+
+def _wait_finished(client, job_id: int, timeout: float = 10.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/api/v1/jobs/{job_id}").json()
+        if job["status"] in (JobStatus.SUCCEEDED, JobStatus.FAILED):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"任务 {job_id} 未在 {timeout} 秒内结束")
+
+
+def test_extract_falls_back_to_default_point_after_last_attempt(client, monkeypatch):
+    async def fail(*args, **kwargs):
+        raise RuntimeError("模拟 AI 调用失败")
+
+    monkeypatch.setattr(openai_service, "extract_knowledge_points", fail)
+    monkeypatch.setattr(openai_service, "generate_knowledge_summary", fail)
+    monkeypatch.setattr(settings, "JOB_MAX_ATTEMPTS", 1)
+
+    response = client.post("/api/v1/learning/", json={"content": "提取失败的学习内容"})
+    assert response.status_code == 201, response.text
+    created = response.json()
+    assert created["knowledge_point_id"] is None
+    assert created["job_id"] is not None
+
+    job = _wait_finished(client, created["job_id"])
+    assert job["status"] == JobStatus.SUCCEEDED, job
+    assert job["result"]["fallback"] is True
+    kp_id = job["result"]["knowledge_point_ids"][0]
+
+    contents = client.get("/api/v1/learning/", params={"knowledge_point_id": kp_id}).json()
+    assert [lc["id"] for lc in contents] == [created["id"]]
+    kp = client.get(f"/api/v1/knowledge/{kp_id}").json()
+    assert kp["content"] == "提取失败的学习内容"
@@ -0,0 +1,117 @@
+"""
+知识图谱内存索引测试
+"""
+from types import SimpleNamespace
+
+from app.services.graph_index import GraphIndex
+
+
+def _relation(parent_id: int, child_id: int, relation_type: str = "related", strength: float = 1.0):
+    return SimpleNamespace(
+        parent_id=parent_id,
+        child_id=child_id,
+        relation_type=relation_type,
+        strength=strength
+    )
+
+
+class _FakeSession:
+    """query().all() 返回固定的关系行，读取时执行 during_load 模拟并发提交"""
+
+    def __init__(self, rows, during_load=None):
+        self.rows = rows
+        self.during_load = during_load
+
+    def query(self, *columns):
+        return self
+
+    def all(self):
+        if self.during_load:
+            self.during_load()
+        return self.rows
+
+
+def test_reused_node_id_keeps_new_edges():
+    index = GraphIndex()
+    index.ensure_loaded(_FakeSession([_relation(1, 3), _relation(2, 3)]))
+
+    index.remove_nodes([3])
+    assert index.neighbors(1) == []
+
+    # 节点 3 被删除后ID被复用
+    index.add_edges([_relation(1, 3, "extends")])
+    assert index.neighbors(1) == [(3, "extends", 1.0)]
+    assert index.neighbors(3) == [(1, "extends", 1.0)]
+    assert index.degree(2) == {"out_degree": 0, "in_degree": 0}
+
+    index._compact()
+    assert index.neighbors(3) == [(1, "extends", 1.0)]
+    assert index.neighbors(2) == []
+
+
+def test_remove_drops_pending_edges_of_removed_node():
+    index = GraphIndex()
+    index.ensure_loaded(_FakeSession([]))
+
+    index.add_edges([_relation(1, 2), _relation(2, 3)])
+    index.remove_nodes([2])
+    assert index.neighbors(1) == []
+    assert index.stats()["pending_edges"] == 0
+
+    index.add_edges([_relation(2, 3)])
+    assert index.neighbors(3) == [(2, "related", 1.0)]
+
+
+def test_duplicate_edges_are_ignored():
+    index = GraphIndex()
+    index.ensure_loaded(_FakeSession([_relation(1, 2)]))
+
+    index.add_edges([_relation(1, 2), _relation(1, 2, "extends"), _relation(1, 2, "extends")])
+    assert sorted(index.neighbors(1, "out")) == [(2, "extends", 1.0), (2, "related", 1.0)]
+
+
+def test_changes_during_load_are_replayed():
+    index = GraphIndex()
+
+    def commit_during_load():
+        # 快照中已有的边、快照之后提交的边和删除都在构建完成后重放
+        index.add_edges([_relation(1, 2), _relation(2, 4)])
+        index.remove_nodes([3])
+
+    index.ensure_loaded(_FakeSession([_relation(1, 2), _relation(1, 3)], commit_during_load))
+    assert index.neighbors(1) == [(2, "related", 1.0)]
+    assert index.neighbors(2, "out") == [(4, "related", 1.0)]
+    assert index.stats()["edges"] == 3
+
+
+def test_invalidate_during_load_discards_snapshot():
+    index = GraphIndex()
+    index.ensure_loaded(_FakeSession([_relation(1, 2)], index.invalidate))
+    assert not index.loaded
+
+    index.ensure_loaded(_FakeSession([]))
+    assert index.neighbors(1) == []
+
+
+def test_neighbors_after_delete_and_recreate(client, create_point):
+    first = create_point("图谱-起点")
+    second = create_point("图谱-终点")
+    response = client.post("/api/v1/graph/relations", json={"parent_id": first, "child_id": second})
+    assert response.status_code == 201, response.text
+    assert client.get(f"/api/v1/graph/neighbors/{first}").json()["out_degree"] == 1
+
+    # 删除ID最大的知识点和关系后，SQLite 会复用这两个ID
+    assert client.delete(f"/api/v1/knowledge/{second}").status_code == 204
+    recreated = create_point("图谱-重建")
+    assert recreated == second
+    response = client.post(
+        "/api/v1/graph/relations",
+        json={"parent_id": first, "child_id": recreated, "relation_type": "extends"}
+    )
+    assert response.status_code == 201, response.text
+
+    neighbors = client.get(f"/api/v1/graph/neighbors/{first}").json()
+    assert neighbors["out_degree"] == 1
+    assert neighbors["neighbors"] == [{"id": recreated, "relation_type": "extends", "strength": 1.0}]
+    neighbors = client.get(f"/api/v1/graph/neighbors/{recreated}").json()
+    assert neighbors["in_degree"] == 1
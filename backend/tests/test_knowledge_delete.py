@@ -0,0 +1,45 @@
+"""
+批量删除知识点测试
+"""
+import pytest
+
+from app.services.graph_index import graph_index
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_bulk_delete_then_recreate_keeps_graph_neighbors(client, create_point, monkeypatch, compact):
+    if compact:
+        # 墓碑立即合并进 CSR（删除超过 COMPACT_THRESHOLD 个知识点时的路径）
+        monkeypatch.setattr(graph_index, "COMPACT_THRESHOLD", 0)
+
+    category = f"批量删除-{compact}"
+    hub = create_point("批量删除-中心")
+    old_ids = [create_point(f"批量删除-旧{i}", category=category) for i in range(3)]
+    response = client.post(
+        "/api/v1/graph/batch-relations",
+        json=[{"parent_id": hub, "child_id": kp_id} for kp_id in old_ids]
+    )
+    assert response.json()["created_count"] == 3
+    assert client.get(f"/api/v1/graph/neighbors/{hub}").json()["out_degree"] == 3
+
+    response = client.request("DELETE", "/api/v1/knowledge/", json={"category": category})
+    assert sorted(response.json()["deleted_ids"]) == old_ids
+    assert client.get(f"/api/v1/graph/neighbors/{hub}").json()["neighbors"] == []
+
+    # 重新创建的知识点复用被删除的ID
+    new_ids = [create_point(f"批量删除-新{i}") for i in range(3)]
+    assert new_ids == old_ids
+    response = client.post(
+        "/api/v1/graph/batch-relations",
+        json=[
+            {"parent_id": kp_id, "child_id": hub, "relation_type": "prerequisite"}
+            for kp_id in new_ids
+        ]
+    )
+    assert response.json()["created_count"] == 3
+
+    neighbors = client.get(f"/api/v1/graph/neighbors/{hub}").json()
+    assert (neighbors["out_degree"], neighbors["in_degree"]) == (0, 3)
+    assert sorted(neighbor["id"] for neighbor in neighbors["neighbors"]) == new_ids
+    for kp_id in new_ids:
+        assert client.get(f"/api/v1/graph/neighbors/{kp_id}").json()["out_degree"] == 1
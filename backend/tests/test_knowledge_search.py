@@ -0,0 +1,32 @@
+"""
+全文搜索：少于 3 个字符的搜索词按子串扫描
+"""
+
+
+def test_short_terms_fall_back_to_substring_scan(client, create_point):
+    ids = [
+        create_point("排序算法", "快速排序是一种分治算法"),
+        create_point("图论", "最短路径算法：Dijkstra"),
+        create_point("数据结构", "栈和队列"),
+    ]
+
+    response = client.get("/api/v1/knowledge/search", params={"q": "算法", "limit": 1})
+    assert response.status_code == 200, response.text
+    first = response.json()
+    assert [hit["id"] for hit in first["items"]] == [ids[1]]
+    assert "<mark>算法</mark>" in first["items"][0]["snippet"]
+    assert first["items"][0]["rank"] == 0
+
+    second = client.get(
+        "/api/v1/knowledge/search", params={"q": "算法", "limit": 1, "cursor": first["next_cursor"]}
+    ).json()
+    assert [hit["id"] for hit in second["items"]] == [ids[0]]
+
+    # 多个短词需同时出现
+    both = client.get("/api/v1/knowledge/search", params={"q": "算法 路径"}).json()
+    assert [hit["id"] for hit in both["items"]] == [ids[1]]
+
+
+def test_blank_query_is_rejected(client):
+    response = client.get("/api/v1/knowledge/search", params={"q": "  "})
+    assert response.status_code == 400
@@ -0,0 +1,45 @@
+"""
+LLM 结果缓存：持久层读写与访问时间的批量写回
+"""
+import asyncio
+import sqlite3
+
+from app.services.llm_cache import LLMCache, MISS
+
+
+def _cache(path: str, memory_entries: int = 1) -> LLMCache:
+    return LLMCache(
+        enabled=True,
+        path=path,
+        ttl_seconds=60,
+        memory_entries=memory_entries,
+        max_entries=1000
+    )
+
+
+def _accessed_at(path: str, key: str) -> float:
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT accessed_at FROM llm_cache WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_disk_tier_round_trip_and_batched_touches(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+
+    async def run():
+        cache = _cache(path)
+        await cache.set("a", ["x", 1])
+        await cache.set("b", "y")  # 内存层只留一条，挤出 a
+        written = _accessed_at(path, "a")
+
+        assert await cache.get("a") == ["x", 1]
+        assert cache.stats()["disk_hits"] == 1
+        # 命中只记在内存里，不逐次提交
+        assert _accessed_at(path, "a") == written
+
+        await cache.set("c", "z")  # 下一次写入时一并写回
+        assert _accessed_at(path, "a") > written
+
+        assert await cache.get("missing") is MISS
+        assert cache.stats()["misses"] == 1
+
+    asyncio.run(run())
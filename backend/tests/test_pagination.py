@@ -0,0 +1,27 @@
+"""
+游标分页：limit 边界
+"""
+import pytest
+
+from app.db.pagination import next_page
+
+
+def test_next_page_handles_empty_rows_and_non_positive_limit():
+    rows = [{"id": 2}, {"id": 1}]
+    assert next_page([], 5, ("id",)) == ([], None)
+    assert next_page(rows[:1], 0, ("id",)) == ([], None)
+    assert next_page(rows, -1, ("id",)) == ([], None)
+
+    page, cursor = next_page(rows, 1, ("id",))
+    assert page == rows[:1] and cursor is not None
+
+
+@pytest.mark.parametrize("path", [
+    "/api/v1/knowledge/",
+    "/api/v1/learning/",
+    "/api/v1/review/history/1",
+])
+def test_list_endpoints_reject_limit_zero(client, path):
+    assert client.get(path, params={"limit": 0}).status_code == 422
+    assert client.get(path, params={"limit": 10**6}).status_code == 422
+    assert client.get(path, params={"limit": 1}).status_code == 200
@@ -0,0 +1,21 @@
+"""
+热点查询计划：在迁移到最新版本的临时数据库上执行全部热点查询，出现全表扫描即失败
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def test_hot_queries_use_indexes():
+    # 检查会替换全局的图谱/相似度索引和数据库依赖，放到独立进程中运行，不影响共享的测试应用
+    result = subprocess.run(
+        [sys.executable, "-m", "app.db.query_plans"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        timeout=300
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,32 @@
+"""
+知识关系：单条与批量创建的校验一致
+"""
+
+
+def test_batch_relations_return_created_relations(client, create_point):
+    a, b, c = (create_point(f"批量关系-{name}") for name in "ABC")
+    response = client.post(
+        "/api/v1/graph/batch-relations",
+        json=[
+            {"parent_id": a, "child_id": b, "relation_type": "prerequisite", "strength": 0.5},
+            {"parent_id": a, "child_id": b, "relation_type": "prerequisite"},  # 请求内重复
+            {"parent_id": c, "child_id": c},  # 首尾相同
+            {"parent_id": b, "child_id": c, "description": "B 推出 C"},
+        ]
+    )
+    assert response.status_code == 201, response.text
+    body = response.json()
+    assert (body["created_count"], body["duplicate_count"], body["invalid_count"]) == (2, 1, 1)
+    assert [(r["parent_id"], r["child_id"], r["relation_type"]) for r in body["relations"]] == [
+        (a, b, "prerequisite"), (b, c, "related")
+    ]
+    first, second = body["relations"]
+    assert first["strength"] == 0.5 and first["created_by_ai"] is True
+    assert second["description"] == "B 推出 C" and second["id"] and second["created_at"]
+
+
+def test_self_loop_is_rejected_by_single_create(client, create_point):
+    kp_id = create_point("自环")
+    response = client.post("/api/v1/graph/relations", json={"parent_id": kp_id, "child_id": kp_id})
+    assert response.status_code == 400
+    assert client.get(f"/api/v1/graph/neighbors/{kp_id}").json()["neighbors"] == []
@@ -0,0 +1,151 @@
+"""
+知识点相似度索引测试
+"""
+import threading
+import time
+
+import pytest
+
+from app.db.database import SessionLocal
+from app.services.similarity_index import SimilarityIndex, similarity_index
+
+
+def _wait_ready(timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while not similarity_index.ready:
+        assert time.monotonic() < deadline, "相似度索引未在限定时间内就绪"
+        time.sleep(0.05)
+
+
+def test_similar_returns_503_until_ready(client, create_point, monkeypatch):
+    kp_id = create_point("相似度-红黑树", "红黑树是一种自平衡二叉查找树")
+    create_point("相似度-AVL树", "AVL 树是最早的自平衡二叉查找树")
+    _wait_ready()
+
+    monkeypatch.setattr(similarity_index, "_verified", False)
+    monkeypatch.setattr(similarity_index, "start_loading", lambda session_factory: None)
+    response = client.get(f"/api/v1/knowledge/{kp_id}/similar")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+
+    monkeypatch.undo()
+    response = client.get(f"/api/v1/knowledge/{kp_id}/similar")
+    assert response.status_code == 200, response.text
+    assert response.json()[0]["title"] == "相似度-AVL树"
+
+
+def test_stamp_mismatch_triggers_rebuild(client, create_point, tmp_path):
+    create_point("版本戳-一", "版本戳测试内容")
+    with SessionLocal() as db:
+        SimilarityIndex(str(tmp_path), dim=64, block_rows=1024).ensure_loaded(db)
+    built = (tmp_path / "vectors.npy").stat().st_ino
+
+    # 版本戳与数据库一致：直接使用已有文件
+    index = SimilarityIndex(str(tmp_path), dim=64, block_rows=1024)
+    with SessionLocal() as db:
+        index.ensure_loaded(db)
+    assert index.ready
+    assert (tmp_path / "vectors.npy").stat().st_ino == built
+
+    # 数据库在索引之外被修改（这里的索引实例没有收到写入通知）
+    kp_id = create_point("版本戳-二", "版本戳测试内容")
+    index = SimilarityIndex(str(tmp_path), dim=64, block_rows=1024)
+    with SessionLocal() as db:
+        index.ensure_loaded(db)
+    assert (tmp_path / "vectors.npy").stat().st_ino != built
+    assert index.similar([kp_id], 1)[0], "重建后应包含新知识点"
+
+
+def test_writes_during_rebuild_are_replayed(client, create_point, tmp_path):
+    kp_id = create_point("重建-原文", "重建期间更新的知识点")
+    other_id = create_point("重建-删除", "重建期间删除的知识点")
+    index = SimilarityIndex(str(tmp_path), dim=64, block_rows=1024)
+    cancellable = index._cancellable
+    replayed = []
+
+    def write_during_build(rows):
+        if not replayed:
+            replayed.append(True)
+            index.upsert(kp_id, "重建-改写", "完全不同的新内容", None)
+            index.remove([other_id])
+        return cancellable(rows)
+
+    index._cancellable = write_during_build
+    with SessionLocal() as db:
+        index.rebuild(db)
+
+    assert replayed
+    assert not index.similar([other_id], 5)[0]
+    index.upsert(other_id, "重建-改写", "完全不同的新内容", None)
+    assert index.similar([other_id], 1)[0][0][0] == kp_id
+
+
+def test_relation_job_waits_for_index_before_opening_session(client, create_point, monkeypatch):
+    from app.services import ai_jobs
+    from app.services.job_queue import JobStatus
+    from app.services.knowledge_service import KnowledgeService
+
+    kp_id = create_point("候选-哈希表", "哈希表用散列函数把键映射到桶")
+    other_id = create_point("候选-散列", "散列函数把键映射到桶，冲突用链表解决")
+    _wait_ready()
+    similarity_index.invalidate()
+    monkeypatch.setattr(similarity_index, "start_loading", lambda session_factory: None)
+
+    events = []
+    ensure_loaded = similarity_index.ensure_loaded
+    get_relation_candidates = KnowledgeService.get_relation_candidates
+
+    def record_ensure_loaded(db):
+        events.append("index")
+        ensure_loaded(db)
+
+    async def record_candidates(self, *args, **kwargs):
+        events.append("candidates")
+        result = await get_relation_candidates(self, *args, **kwargs)
+        events.append([point["id"] for point in result[1]])
+        return result
+
+    async def no_suggestions(knowledge_point, candidates):
+        return []
+
+    monkeypatch.setattr(similarity_index, "ensure_loaded", record_ensure_loaded)
+    monkeypatch.setattr(KnowledgeService, "get_relation_candidates", record_candidates)
+    monkeypatch.setattr(ai_jobs, "_suggest_in_batches", no_suggestions)
+
+    job_id = client.get(f"/api/v1/graph/suggest/{kp_id}").json()["job_id"]
+    deadline = time.monotonic() + 30
+    while client.get(f"/api/v1/jobs/{job_id}").json()["status"] != JobStatus.SUCCEEDED:
+        assert time.monotonic() < deadline, "关系建议任务未在限定时间内完成"
+        time.sleep(0.05)
+
+    # 索引在打开数据库会话之前就绪，候选查询只在会话中执行一次
+    assert events[:2] == ["index", "candidates"]
+    assert events[2][0] == other_id
+
+
+def test_writes_wait_for_other_processes_file_lock(client, create_point, tmp_path):
+    fcntl = pytest.importorskip("fcntl")
+    create_point("文件锁-基准", "文件锁测试内容")
+    index = SimilarityIndex(str(tmp_path), dim=64, block_rows=1024)
+    with SessionLocal() as db:
+        index.ensure_loaded(db)
+    documents = index.stats()["documents"]
+    new_id = 1 << 12  # 超出初始容量，写入时需要扩容
+
+    # 另一个进程持有文件锁（扩容、重建或写入中），本进程的写入必须等待，不能与其并发读改写
+    with open(tmp_path / ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        writer = threading.Thread(
+            target=index.upsert, args=(new_id, "文件锁-新增", "等待文件锁的写入", None, True)
+        )
+        writer.start()
+        writer.join(timeout=0.3)
+        assert writer.is_alive()
+        assert index.stats()["documents"] == documents
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    writer.join(timeout=10)
+    assert not writer.is_alive()
+
+    reader = SimilarityIndex(str(tmp_path), dim=64, block_rows=1024)
+    assert reader.stats()["documents"] == documents + 1
+    assert reader.similar([new_id], 1)[0]
@@ -0,0 +1,112 @@
+"""
+向量化 SM-2 调度器与逐张卡片的标量实现逐项比对
+"""
+import itertools
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.services.spaced_repetition import SM2Scheduler
+
+
+NOW = datetime(2024, 5, 17, 12, 30, 15, 123456)
+
+
+# ========== 标量参考实现（向量化之前的逐张卡片算法） ==========
+
+def _schedule(quality, ease_factor, interval, repetitions, now):
+    quality = max(0, min(5, quality))
+    new_ease_factor = max(1.3, ease_factor + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)))
+    if quality < 3:
+        new_repetitions = 0
+        new_interval = 1
+    else:
+        new_repetitions = repetitions + 1
+        if new_repetitions == 1:
+            new_interval = 1
+        elif new_repetitions == 2:
+            new_interval = 6
+        else:
+            new_interval = round(interval * new_ease_factor)
+    return new_ease_factor, new_interval, new_repetitions, now + timedelta(days=new_interval)
+
+
+def _priority(next_review_date, ease_factor, now):
+    days_until_review = (next_review_date - now).days
+    if days_until_review <= 0:
+        return "high"
+    elif ease_factor < 2.0 and days_until_review <= 2:
+        return "high"
+    elif days_until_review <= 3:
+        return "medium"
+    return "low"
+
+
+def _estimate_time(repetitions, ease_factor):
+    time_reduction = min(repetitions * 0.5, 3)
+    difficulty_adjustment = max(0, (3.0 - ease_factor) * 2)
+    return max(2, round(5 - time_reduction + difficulty_adjustment))
+
+
+# ========== 比对 ==========
+
+def _check_schedule(cards):
+    quality, ease_factor, interval, repetitions = (list(column) for column in zip(*cards))
+    result = SM2Scheduler().schedule(quality, ease_factor, interval, repetitions, now=NOW)
+    for i, card in enumerate(cards):
+        expected = _schedule(*card, NOW)
+        assert float(result.ease_factor[i]) == expected[0], card
+        assert int(result.interval[i]) == expected[1], card
+        assert int(result.repetitions[i]) == expected[2], card
+        assert result.next_review_date[i].astype(datetime) == expected[3], card
+
+
+def test_schedule_matches_scalar_grid():
+    cards = list(itertools.product(
+        range(-1, 7),  # 含越界评分
+        [1.3, 1.5, 1.96, 2.0, 2.36, 2.5, 2.6, 3.1],
+        [0, 1, 2, 3, 6, 15, 100],
+        [0, 1, 2, 5]
+    ))
+    _check_schedule(cards)
+
+
+def test_schedule_matches_scalar_random():
+    rng = random.Random(8)
+    cards = [
+        (rng.randint(0, 5), round(rng.uniform(1.3, 3.5), 2), rng.randint(0, 400), rng.randint(0, 20))
+        for _ in range(5000)
+    ]
+    _check_schedule(cards)
+
+
+def test_schedule_rounds_half_to_even():
+    # 评分 4 时难易度因子不变，interval * 2.5 恰好落在 .5 上：round 与 np.rint 都取偶数
+    cards = [(4, 2.5, interval, 2) for interval in (1, 3, 5, 7, 9)]
+    _check_schedule(cards)
+    result = SM2Scheduler().schedule([4] * 5, [2.5] * 5, [1, 3, 5, 7, 9], [2] * 5, now=NOW)
+    assert result.interval.tolist() == [2, 8, 12, 18, 22]
+
+
+def test_priority_floors_days_like_timedelta():
+    offsets = [
+        timedelta(days=-3, hours=1), timedelta(seconds=-1), timedelta(0),
+        timedelta(microseconds=1), timedelta(hours=23, minutes=59, seconds=59),
+        timedelta(days=1), timedelta(days=2, hours=23), timedelta(days=3),
+        timedelta(days=3, hours=23, microseconds=999999), timedelta(days=4), timedelta(days=30)
+    ]
+    cards = [(NOW + offset, ease) for offset, ease in itertools.product(offsets, (1.3, 1.99, 2.0, 2.5))]
+    dates, eases = (list(column) for column in zip(*cards))
+
+    levels = SM2Scheduler().priority(dates, eases, now=NOW)
+    assert levels.tolist() == [_priority(d, e, NOW) for d, e in cards]
+
+
+def test_estimate_time_matches_scalar_including_ties():
+    # (5, 3.0) -> 2.5、(3, 3.0) -> 3.5、(1, 3.0) -> 4.5 都是 .5 的平局
+    cards = list(itertools.product(range(0, 10), [1.3, 1.75, 2.0, 2.25, 2.5, 2.75, 3.0, 3.5]))
+    repetitions, eases = (list(column) for column in zip(*cards))
+    minutes = SM2Scheduler().estimate_time(repetitions, eases)
+    assert minutes.dtype == np.int64
+    assert minutes.tolist() == [_estimate_time(r, e) for r, e in cards]
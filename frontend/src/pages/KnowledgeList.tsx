@@ -19,10 +19,10 @@ const KnowledgeList: React.FC = () => {
   const loadKnowledgePoints = async () => {
     try {
       setLoading(true);
-      const data = await knowledgeApi.list({
+      const { items } = await knowledgeApi.list({
         category: selectedCategory || undefined,
       });
-      setKnowledgePoints(data);
+      setKnowledgePoints(items);
     } catch (error) {
       console.error('Failed to load knowledge points:', error);
     } finally {
@@ -140,7 +140,7 @@ const Review: React.FC = () => {
         <>
           <div className="priority-section">
             <h2 className="priority-title high">
-              {t('review.highPriority')} ({plan.reviews_by_priority.high.length})
+              {t('review.highPriority')} ({plan.counts_by_priority.high})
             </h2>
             <div className="review-list">
               {plan.reviews_by_priority.high.map((kp) => (
@@ -164,10 +164,10 @@ const Review: React.FC = () => {
             </div>
           </div>
 
-          {plan.reviews_by_priority.medium.length > 0 && (
+          {plan.counts_by_priority.medium > 0 && (
             <div className="priority-section">
               <h2 className="priority-title medium">
-                {t('review.mediumPriority')} ({plan.reviews_by_priority.medium.length})
+                {t('review.mediumPriority')} ({plan.counts_by_priority.medium})
               </h2>
               <div className="review-list">
                 {plan.reviews_by_priority.medium.map((kp) => (
@@ -1,7 +1,13 @@
 import axios from 'axios';
 import type {
   KnowledgePoint,
+  KnowledgePointCompact,
+  ListView,
+  TagCount,
+  KnowledgeSearchResult,
+  SimilarKnowledgePoint,
   LearningContent,
+  LearningContentCreateResult,
   ReviewRecord,
   ReviewPlan,
   KnowledgeGraph,
@@ -19,16 +25,36 @@ const api = axios.create({
   },
 });
 
+// 列表接口在响应头中返回下一页游标，没有下一页时为 null
+const nextCursor = (headers: Record<string, any>): string | null =>
+  headers['x-next-cursor'] ?? null;
+
 // 知识点 API
 export const knowledgeApi = {
   list: async (params?: {
     category?: string;
     tag?: string;
+    tags?: string; // 逗号分隔的多个标签
+    tag_match?: 'any' | 'all';
     is_mastered?: boolean;
     skip?: number;
     limit?: number;
+    cursor?: string;
+    view?: ListView;
   }) => {
     const response = await api.get<KnowledgePoint[]>('/knowledge/', { params });
+    return { items: response.data, nextCursor: nextCursor(response.headers) };
+  },
+
+  search: async (q: string, params?: { limit?: number; cursor?: string }) => {
+    const response = await api.get<KnowledgeSearchResult>('/knowledge/search', {
+      params: { q, ...params },
+    });
+    return response.data;
+  },
+
+  getTags: async (limit: number = 100) => {
+    const response = await api.get<TagCount[]>('/knowledge/tags', { params: { limit } });
     return response.data;
   },
 
@@ -37,6 +63,13 @@ export const knowledgeApi = {
     return response.data;
   },
 
+  getSimilar: async (id: number, limit: number = 10) => {
+    const response = await api.get<SimilarKnowledgePoint[]>(`/knowledge/${id}/similar`, {
+      params: { limit },
+    });
+    return response.data;
+  },
+
   create: async (data: KnowledgePointForm, generateSummary: boolean = true) => {
     const response = await api.post<KnowledgePoint>('/knowledge/', data, {
       params: { generate_summary: generateSummary },
@@ -53,6 +86,22 @@ export const knowledgeApi = {
     await api.delete(`/knowledge/${id}`);
   },
 
+  // 按ID列表或筛选条件批量删除（二者选一）
+  deleteMany: async (data: {
+    ids?: number[];
+    category?: string;
+    tag?: string;
+    tags?: string[];
+    tag_match?: 'any' | 'all';
+    is_mastered?: boolean;
+  }) => {
+    const response = await api.delete<{ deleted_count: number; deleted_ids: number[] }>(
+      '/knowledge/',
+      { data }
+    );
+    return response.data;
+  },
+
   getStats: async () => {
     const response = await api.get('/knowledge/stats/summary');
     return response.data;
@@ -66,13 +115,15 @@ export const learningApi = {
     days?: number;
     skip?: number;
     limit?: number;
+    cursor?: string;
+    view?: ListView;
   }) => {
     const response = await api.get<LearningContent[]>('/learning/', { params });
-    return response.data;
+    return { items: response.data, nextCursor: nextCursor(response.headers) };
   },
 
   create: async (data: LearningContentForm, autoExtract: boolean = true) => {
-    const response = await api.post<LearningContent>('/learning/', data, {
+    const response = await api.post<LearningContentCreateResult>('/learning/', data, {
       params: { auto_extract: autoExtract },
     });
     return response.data;
@@ -100,6 +151,18 @@ export const reviewApi = {
     return response.data;
   },
 
+  getPlanPage: async (
+    priority: 'high' | 'medium' | 'low',
+    skip: number = 0,
+    limit: number = 20,
+    date?: string
+  ) => {
+    const response = await api.get<KnowledgePoint[]>(`/review/plan/${priority}`, {
+      params: { skip, limit, date },
+    });
+    return response.data;
+  },
+
   getDueReviews: async (limit: number = 10) => {
     const response = await api.get<KnowledgePoint[]>('/review/due', {
       params: { limit },
@@ -107,22 +170,44 @@ export const reviewApi = {
     return response.data;
   },
 
+  // 精简视图，只含列表展示需要的字段
+  getDueReviewsCompact: async (limit: number = 10) => {
+    const response = await api.get<KnowledgePointCompact[]>('/review/due', {
+      params: { limit, view: 'compact' },
+    });
+    return response.data;
+  },
+
   generateQuestion: async (kpId: number) => {
     const response = await api.get(`/review/question/${kpId}`);
     return response.data;
   },
 
-  getHistory: async (kpId: number, limit: number = 50) => {
+  getHistory: async (kpId: number, limit: number = 50, cursor?: string) => {
     const response = await api.get<ReviewRecord[]>(`/review/history/${kpId}`, {
-      params: { limit },
+      params: { limit, cursor },
     });
-    return response.data;
+    return { items: response.data, nextCursor: nextCursor(response.headers) };
   },
 
   getStats: async () => {
     const response = await api.get('/review/stats/overall');
     return response.data;
   },
+
+  getDailyStats: async (days: number = 30) => {
+    const response = await api.get('/review/stats/daily', {
+      params: { days },
+    });
+    return response.data;
+  },
+
+  getActivity: async (days: number = 365) => {
+    const response = await api.get('/review/stats/activity', {
+      params: { days },
+    });
+    return response.data;
+  },
 };
 
 // 知识图谱 API
@@ -16,9 +16,43 @@ export interface KnowledgePoint {
   is_mastered: boolean;
 }
 
+// 列表视图：compact 不含正文、摘要和调度参数
+export type ListView = 'full' | 'compact';
+
+export type KnowledgePointCompact = Pick<
+  KnowledgePoint,
+  'id' | 'title' | 'category' | 'tags' | 'repetitions' | 'next_review_date' | 'created_at' | 'is_mastered'
+>;
+
+export interface TagCount {
+  name: string;
+  count: number;
+}
+
+export interface KnowledgeSearchHit {
+  id: number;
+  title: string;
+  category?: string;
+  tags?: string;
+  snippet: string; // 命中词用 <mark></mark> 标出
+  rank: number;
+}
+
+export interface KnowledgeSearchResult {
+  items: KnowledgeSearchHit[];
+  next_cursor?: string;
+}
+
+export interface SimilarKnowledgePoint {
+  id: number;
+  title: string;
+  category?: string;
+  score: number; // 余弦相似度，越大越相似
+}
+
 export interface LearningContent {
   id: number;
-  knowledge_point_id: number;
+  knowledge_point_id: number | null; // 后台提取知识点的任务完成前为空
   content: string;
   source?: string;
   notes?: string;
@@ -26,6 +60,10 @@ export interface LearningContent {
   created_at: string;
 }
 
+export interface LearningContentCreateResult extends LearningContent {
+  job_id: number | null; // 提取知识点的后台任务ID，未提交任务时为空
+}
+
 export interface ReviewRecord {
   id: number;
   knowledge_point_id: number;
@@ -54,6 +92,9 @@ export interface ReviewPlan {
   date: string;
   total_reviews: number;
   estimated_time_minutes: number;
+  counts_by_priority: Record<'high' | 'medium' | 'low', number>;
+  estimated_time_by_priority: Record<'high' | 'medium' | 'low', number>;
+  // 每个优先级只包含第一页，其余通过 /review/plan/{priority} 分页获取
   reviews_by_priority: {
     high: KnowledgePoint[];
     medium: KnowledgePoint[];